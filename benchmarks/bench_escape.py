@@ -0,0 +1,81 @@
+"""
+Compares the character-loop ``_unescape`` that ``OBOReader`` used to have with the current one, and writing with
+and without the cache of escaped ids in ``OBOWriter``.
+
+Usage::
+
+    python benchmarks/bench_escape.py [path/to/file.obo ...]
+"""
+import io
+import os
+import sys
+import timeit
+
+from obo.reader import OBOReader
+from obo.writer import OBOWriter, ESCAPE_TRANSLATION_TABLE
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'files')
+
+
+def unescape_loop(s):
+    out, escape = '', False
+    for char in s:
+        if escape:
+            if char in 'ntW':
+                out += {
+                    'n': '\n',
+                    't': '\t',
+                    'W': ' '
+                }[char]
+            else:
+                out += char
+            escape = False
+        elif char == '\\':
+            escape = True
+        else:
+            out += char
+    return out
+
+
+class UncachedWriter(OBOWriter):
+    def _escape(self, s):
+        return s.translate(ESCAPE_TRANSLATION_TABLE)
+
+
+def best(function, repeat, number=1):
+    return min(timeit.Timer(function).repeat(repeat=repeat, number=number)) / number
+
+
+def bench_unescape(repeat=5, number=100000):
+    reader = OBOReader()
+    cases = [
+        ('plain id', 'SO:0000001'),
+        ('plain url', 'http://en.wikipedia.org/wiki/Sequence_feature'),
+        ('escaped', 'a\\Wname\\Wwith\\Wescaped\\Wspaces\\Wand\\W\\"quotes\\"'),
+    ]
+
+    print('unescape ({} calls)'.format(number))
+    for name, value in cases:
+        assert unescape_loop(value) == reader._unescape(value)
+        before = best(lambda: unescape_loop(value), repeat, number)
+        after = best(lambda: reader._unescape(value), repeat, number)
+        print('  {:10} {:8.3f} us -> {:8.3f} us ({:.1f}x)'.format(name, before * 1e6, after * 1e6, before / after))
+
+
+def bench_write(path, repeat=5):
+    with open(path, 'r') as fp:
+        ontology = OBOReader().read(fp)
+
+    def write(writer):
+        writer.write(ontology, io.StringIO())
+
+    before = best(lambda: write(UncachedWriter()), repeat)
+    after = best(lambda: write(OBOWriter()), repeat)
+    print('{}: write {:8.3f} s -> {:8.3f} s ({:.1f}x)'.format(os.path.basename(path), before, after, before / after))
+
+
+if __name__ == '__main__':
+    bench_unescape()
+    paths = sys.argv[1:] or [os.path.join(FILES_DIR, name) for name in ('so-xp.obo', 'taxrank.obo')]
+    for path in paths:
+        bench_write(path)
@@ -0,0 +1,42 @@
+"""
+Measures the memory used per term with the default and the compact (``CompactTerm``) stanza layout, and when
+values are decoded lazily.
+
+Usage::
+
+    python benchmarks/bench_memory.py [path/to/file.obo ...]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+from obo.reader import OBOReader
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'files')
+
+
+def measure(path, **kwargs):
+    with open(path, 'r') as fp:
+        lines = fp.readlines()
+
+    gc.collect()
+    tracemalloc.start()
+    ontology = OBOReader(**kwargs).read(lines)
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(ontology.terms), size, peak
+
+
+def bench(path):
+    print(os.path.basename(path))
+    for label, kwargs in (('Term', {}), ('CompactTerm', {'compact': True}), ('lazy Term', {'lazy': True})):
+        terms, size, peak = measure(path, **kwargs)
+        print('  {:12} {:8.1f} MiB total, {:6.0f} bytes per term, peak {:8.1f} MiB'.format(
+            label, size / 2 ** 20, size / terms, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:] or [os.path.join(FILES_DIR, 'so-xp.obo')]:
+        bench(path)
@@ -0,0 +1,35 @@
+"""
+Compares the ``str.find`` tokenizer with the escape-aware character scanner in ``OBOReader``.
+
+Usage::
+
+    python benchmarks/bench_tokenizer.py [path/to/file.obo ...]
+"""
+import os
+import sys
+import timeit
+
+from obo.reader import OBOReader
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'files')
+
+
+def bench(path, repeat=5):
+    with open(path, 'r') as fp:
+        lines = fp.readlines()
+
+    results = {}
+    for fast_tokenizer in (False, True):
+        reader = OBOReader(fast_tokenizer=fast_tokenizer)
+        timer = timeit.Timer(lambda: reader.read(lines))
+        results[fast_tokenizer] = min(timer.repeat(repeat=repeat, number=1))
+
+    print('{}: {} lines'.format(os.path.basename(path), len(lines)))
+    print('  escaped tokenizer: {:8.3f} s'.format(results[False]))
+    print('  fast tokenizer:    {:8.3f} s ({:.1f}x)'.format(results[True], results[False] / results[True]))
+
+
+if __name__ == '__main__':
+    paths = sys.argv[1:] or [os.path.join(FILES_DIR, name) for name in ('so-xp.obo', 'taxrank.obo')]
+    for path in paths:
+        bench(path)
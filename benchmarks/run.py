@@ -0,0 +1,200 @@
+"""
+Runs the reader and writer benchmarks on synthetic ontologies and the files in tests/files.
+
+Each case is timed as the best of several runs. Reading is also measured with tracemalloc. Results are printed and
+can be saved as JSON and compared with an earlier run, e.g. of another commit::
+
+    python benchmarks/run.py --sizes 10000 100000 --output before.json
+    git checkout other-branch
+    python benchmarks/run.py --sizes 10000 100000 --compare before.json
+
+Synthetic files are generated once and kept in the cache directory.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from obo.reader import OBOReader
+from obo.writer import OBOWriter
+
+from synthetic import generate
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'files')
+LOOKUPS = 10000
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def read(text):
+    return OBOReader().read(io.StringIO(text))
+
+
+def write(ontology):
+    output = io.StringIO()
+    OBOWriter().write(ontology, output)
+    return output.getvalue()
+
+
+def measure_read(text):
+    gc.collect()
+    tracemalloc.start()
+    ontology = read(text)
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ontology, size, peak
+
+
+def lookups(ontology):
+    rng = random.Random(0)
+    terms = list(ontology.terms)
+    ids = [rng.choice(terms).id for _ in range(LOOKUPS)]
+    names = [rng.choice(terms).name for _ in range(LOOKUPS)]
+
+    def by_id():
+        for id_ in ids:
+            ontology.terms[id_]
+
+    def by_name():
+        for name in names:
+            ontology.term_by_name(name)
+
+    def ancestors():
+        graph = ontology.graph
+        for id_ in ids:
+            graph.ancestors(id_)
+        graph._cache.clear()
+
+    return by_id, by_name, ancestors
+
+
+def bench(name, text, repeat):
+    ontology, size, peak = measure_read(text)
+    by_id, by_name, ancestors = lookups(ontology)
+    ontology.graph  # built outside of the timed ancestor lookups
+
+    results = {
+        'terms': len(ontology.terms),
+        'bytes': len(text.encode('utf-8')),
+        'memory': size,
+        'memory_peak': peak,
+        'read': best_time(lambda: read(text), repeat),
+        'write': best_time(lambda: write(ontology), repeat),
+        'round_trip': best_time(lambda: write(read(text)), repeat),
+        'lookup_by_id': best_time(by_id, repeat) / LOOKUPS,
+        'lookup_by_name': best_time(by_name, repeat) / LOOKUPS,
+        'ancestors': best_time(ancestors, repeat) / LOOKUPS,
+    }
+
+    print('{} ({} terms, {:.1f} MiB)'.format(name, results['terms'], results['bytes'] / 2 ** 20))
+    print('  read       {:9.3f} s  {:8.1f} MiB/s'.format(results['read'],
+                                                      results['bytes'] / 2 ** 20 / results['read']))
+    print('  write      {:9.3f} s'.format(results['write']))
+    print('  round trip {:9.3f} s'.format(results['round_trip']))
+    print('  memory     {:9.1f} MiB, peak {:.1f} MiB'.format(size / 2 ** 20, peak / 2 ** 20))
+    print('  lookups    {:9.2f} us by id, {:.2f} us by name, {:.2f} us ancestors'.format(
+        results['lookup_by_id'] * 1e6, results['lookup_by_name'] * 1e6, results['ancestors'] * 1e6))
+    return results
+
+
+def synthetic_text(terms, cache_dir):
+    path = os.path.join(cache_dir, 'synthetic-{}.obo'.format(terms))
+    if not os.path.exists(path):
+        with tempfile.NamedTemporaryFile('w', dir=cache_dir, delete=False, encoding='utf-8') as fp:
+            generate(fp, terms)
+        os.replace(fp.name, path)
+    with open(path, 'r', encoding='utf-8') as fp:
+        return fp.read()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change of each measurement from `baseline` and returns the number that grew by more than
+    `threshold`.
+    """
+    print('\ncompared with {}'.format(baseline.get('commit') or 'baseline'))
+    regressions = 0
+    for name, cases in sorted(results['results'].items()):
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for case, value in sorted(cases.items()):
+            if case in ('terms', 'bytes') or case not in before or not before[case]:
+                continue
+            ratio = value / before[case]
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print('  {:24} {:14} {:6.2f}x{}'.format(name, case, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000],
+                        help='numbers of terms of the synthetic ontologies (default: 10000)')
+    parser.add_argument('--files', nargs='*', default=None,
+                        help='OBO files to benchmark (default: the files in tests/files)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per timing; the best is kept')
+    parser.add_argument('--cache-dir', default=os.path.join(tempfile.gettempdir(), 'obo-benchmarks'))
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='compare with the JSON results in this file')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    files = args.files if args.files is not None else \
+        [os.path.join(FILES_DIR, name) for name in ('so-xp.obo', 'taxrank.obo')]
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as fp:
+            results['results'][os.path.basename(path)] = bench(os.path.basename(path), fp.read(), args.repeat)
+    for terms in args.sizes:
+        name = 'synthetic-{}'.format(terms)
+        results['results'][name] = bench(name, synthetic_text(terms, args.cache_dir), args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            return 1 if compare(results, json.load(fp), args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Generates synthetic OBO files for benchmarks.
+
+Terms form a DAG and have roughly the density of tags of the Gene Ontology: most have a definition with xrefs,
+a few synonyms of different scopes and one or two parents, and some have part_of relationships, alt_ids or are
+obsolete.
+
+Usage::
+
+    python benchmarks/synthetic.py TERMS OUTPUT [SEED]
+
+Outputs ending in ``.gz``, ``.bz2`` or ``.xz`` are compressed.
+"""
+import random
+import sys
+
+from obo.compression import open_file
+
+WORDS = ('protein', 'binding', 'activity', 'cell', 'membrane', 'transport', 'regulation', 'positive', 'negative',
+         'process', 'metabolic', 'biosynthetic', 'catabolic', 'complex', 'receptor', 'signaling', 'pathway', 'nuclear',
+         'mitochondrial', 'kinase', 'phosphatase', 'transferase', 'development', 'response', 'stimulus', 'ion',
+         'channel', 'import', 'export', 'organelle', 'assembly', 'DNA', 'RNA', 'repair', 'replication', 'chromatin')
+
+NAMESPACES = ('biological_process', 'molecular_function', 'cellular_component')
+SCOPES = ('EXACT', 'EXACT', 'RELATED', 'RELATED', 'NARROW', 'BROAD')
+XREF_PREFIXES = ('PMID', 'GOC', 'Wikipedia', 'EC', 'Reactome')
+
+
+def _id(n):
+    return 'SYN:{:07d}'.format(n)
+
+
+def _words(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _xref(rng):
+    return '{}:{}'.format(rng.choice(XREF_PREFIXES), rng.randint(1, 10 ** 7))
+
+
+def generate(fp, terms, seed=0):
+    """
+    Writes an ontology with `terms` terms to the text file `fp`.
+    """
+    rng = random.Random(seed)
+    write = fp.write
+
+    write('format-version: 1.2\n'
+          'data-version: synthetic/{}\n'
+          'subsetdef: goslim_generic "Generic GO slim"\n'
+          'synonymtypedef: systematic_synonym "Systematic synonym" EXACT\n'
+          'default-namespace: synthetic\n'
+          'ontology: synthetic\n\n'.format(terms))
+
+    for n in range(1, terms + 1):
+        write('[Term]\nid: {}\nname: {} {}\nnamespace: {}\n'.format(
+            _id(n), _words(rng, 1, 4), n, NAMESPACES[n % len(NAMESPACES)]))
+        if rng.random() < 0.05:
+            write('alt_id: {}\n'.format(_id(terms + n)))
+        if rng.random() < 0.9:
+            write('def: "{}." [{}]\n'.format(_words(rng, 6, 20).capitalize(),
+                                             ', '.join(_xref(rng) for _ in range(rng.randint(1, 3)))))
+        if rng.random() < 0.1:
+            write('subset: goslim_generic\n')
+        for _ in range(rng.choice((0, 1, 1, 2, 2, 3, 4))):
+            write('synonym: "{}" {} [{}]\n'.format(_words(rng, 1, 5), rng.choice(SCOPES), _xref(rng)))
+        for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+            write('xref: {}\n'.format(_xref(rng)))
+
+        if rng.random() < 0.02:
+            write('comment: This term was made obsolete because it was unnecessary.\nis_obsolete: true\n')
+        elif n > 1:
+            for parent in sorted(set(rng.randint(max(1, n - 1000), n - 1) for _ in range(rng.choice((1, 1, 1, 2))))):
+                write('is_a: {} ! parent\n'.format(_id(parent)))
+            if rng.random() < 0.2:
+                write('relationship: part_of {}\n'.format(_id(rng.randint(1, n - 1))))
+        write('\n')
+
+    write('[Typedef]\nid: part_of\nname: part of\nis_transitive: true\n\n'
+          '[Typedef]\nid: regulates\nname: regulates\ntransitive_over: part_of\n')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4):
+        sys.exit(__doc__)
+    with open_file(sys.argv[2], 'w') as fp:
+        generate(fp, int(sys.argv[1]), int(sys.argv[3]) if len(sys.argv) == 4 else 0)
@@ -1,7 +1,8 @@
+import os
 from collections import defaultdict
 from enum import Enum
 
-from obo.stanzas import Term, Typedef, Object, TagValueProperty, TagValueSetProperty
+from obo.stanzas import Term, Typedef, Instance, Object, TagValueProperty, TagValueSetProperty
 from obo.util import StanzaSet
 
 __version__ = (1, 0, 0)
@@ -18,17 +19,35 @@ class XRef(object):
     This class makes no assumptions about the format of `name`. This is because not all ontologies use the common
     "name:value" format for DB-xrefs, but may use URLs or other names instead.
 
+    XRefs are immutable and hashable, so that equal xrefs can be shared.
+
     """
     __slots__ = ('name', 'description')
 
     def __init__(self, name, description=None):
-        self.name = name
-        self.description = description
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'description', description)
         # NOTE trailing modifiers are ignored by this implementation.
         # https://oboformat.googlecode.com/svn/trunk/doc/GO.format.obo-1_2.html#S.1.4
         # Parser implementations may choose to decode and/or round-trip these trailing modifiers.
         # However, this is not required. A parser may choose to ignore or strip away trailing modifiers.
 
+    def __setattr__(self, name, value):
+        raise AttributeError("'{}' object is immutable".format(self.__class__.__name__))
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return self.__class__, (self.name, self.description)
+
+    def __eq__(self, other):
+        return self.__class__ is other.__class__ and \
+            self.name == other.name and \
+            self.description == other.description
+
+    def __hash__(self):
+        return hash((self.name, self.description))
+
     @property
     def database(self):
         return self.name.split(':', 1)[0]
@@ -179,21 +198,159 @@ class Ontology(Object):
         self.unrecognized_stanzas = []
 
     @classmethod
-    def read(cls, fp, format='obo'):
+    def read(cls, fp, format='obo', threaded=False, **kwargs):
+        """
+        Reads an ontology from `fp`, a text file for the "obo" format or a binary file for the "snapshot" format
+        (see :mod:`obo.snapshot`).
+
+        `fp` may also be a path. OBO files compressed with gzip, bzip2, xz or Zstandard are decompressed while they
+        are read, in a background thread if `threaded` is set (see :func:`obo.compression.open_file`).
+
+        Further keyword arguments are passed to :class:`obo.reader.OBOReader`. For example, ``lazy=True`` defers
+        decoding and ``tags``, ``stanza_types`` and ``namespaces`` read only part of the file::
+
+            Ontology.read('go.obo', tags={'name', 'is_a'}, stanza_types={'Term'}, namespaces={'biological_process'})
+        """
+        if format not in ('obo', 'snapshot'):
+            raise NotImplementedError('Only the "obo" and "snapshot" formats are supported.')
+
+        if isinstance(fp, (str, os.PathLike)):
+            if format == 'obo':
+                from obo.compression import open_file
+                fp = open_file(fp, threaded=threaded)
+            else:
+                fp = open(fp, 'rb')
+            with fp:
+                return cls.read(fp, format, **kwargs)
+
         if format == 'obo':
             from obo.reader import OBOReader
-            return OBOReader().read(fp)
+            return OBOReader(**kwargs).read(fp)
+        else:
+            from obo import snapshot
+            return snapshot.load(fp)
+
+    def write(self, fp, **kwargs):
+        """
+        Writes the ontology in the OBO format to `fp`, a text file or a path. Files are compressed according to the
+        extension of the path (see :func:`obo.compression.open_file`).
+
+        Keyword arguments are passed to :meth:`obo.writer.OBOWriter.write`.
+        """
+        from obo.writer import OBOWriter
+        OBOWriter().write(self, fp, **kwargs)
+
+    @classmethod
+    async def aread(cls, path, reader=None, chunk_size=1 << 16, executor=None, **kwargs):
+        """
+        Reads the OBO file at `path` without blocking the event loop; see :func:`obo.aio.aread`.
+
+        As with :meth:`read`, further keyword arguments are passed to :class:`obo.reader.OBOReader`, unless a
+        `reader` is given.
+        """
+        from obo.aio import aread
+        if reader is None:
+            from obo.reader import OBOReader
+            reader = OBOReader(**kwargs)
+        elif kwargs:
+            raise TypeError('Reader options cannot be combined with a reader: {}'.format(', '.join(sorted(kwargs))))
+        return await aread(path, reader=reader, chunk_size=chunk_size, executor=executor)
+
+    def add_stanza(self, stanza):
+        """
+        Adds a stanza to `terms`, `typedefs` or `instances` depending on its type. Stanzas of an unrecognized type are
+        appended to `unrecognized_stanzas`.
+        """
+        if isinstance(stanza, Term):
+            self.terms.add(stanza)
+        elif isinstance(stanza, Typedef):
+            self.typedefs.add(stanza)
+        elif isinstance(stanza, Instance):
+            self.instances.add(stanza)
         else:
-            raise NotImplementedError('Only the "obo" format is supported.')
+            self.unrecognized_stanzas.append(stanza)
+
+    def _graph_version(self):
+        return id(self.terms), self.terms._version, id(self.typedefs), self.typedefs._version
+
+    @property
+    def graph(self):
+        """
+        An :class:`obo.graph.OntologyGraph` of the terms. It is rebuilt on first access after the terms or typedefs
+        have changed.
+        """
+        graph = self.__dict__.get('_graph')
+        if graph is None or graph.version != self._graph_version():
+            from obo.graph import OntologyGraph
+            graph = self._graph = OntologyGraph(self)
+        return graph
+
+    def closure_index(self, relations=('is_a', 'part_of')):
+        """
+        Returns an :class:`obo.closure.ClosureIndex` over `relations`. Indexes are cached and rebuilt on first use
+        after the terms or typedefs have changed.
+        """
+        relations = tuple(relations)
+        indexes = self.__dict__.setdefault('_closure_indexes', {})
+        index = indexes.get(relations)
+        if index is None or index.version != self._graph_version():
+            from obo.closure import ClosureIndex
+            index = indexes[relations] = ClosureIndex(self.graph, relations)
+        return index
+
+    def arrays(self):
+        """
+        Returns an :class:`obo.arrays.GraphArrays` of :attr:`graph` as NumPy arrays. The arrays are cached and
+        rebuilt with the graph.
+        """
+        graph = self.graph
+        arrays = self.__dict__.get('_arrays')
+        if arrays is None or arrays.graph is not graph:
+            from obo.arrays import GraphArrays
+            arrays = self._arrays = GraphArrays(graph, self)
+        return arrays
+
+    def label_index(self):
+        """
+        Returns an :class:`obo.label_index.LabelIndex` of the terms. The index is cached and rebuilt on first use
+        after the terms have changed.
+        """
+        index = self.__dict__.get('_label_index')
+        version = (id(self.terms), self.terms._version)
+        if index is None or index.version != version:
+            from obo.label_index import LabelIndex
+            index = self._label_index = LabelIndex(self)
+        return index
 
-    # TODO replace terms with a better data structure for O(1) lookup
     # deprecated
     def term_by_id(self, id_):
         return self.terms[id_]
 
-    # TODO replace terms with a better data structure for O(1) lookup
     def term_by_name(self, name):
         try:
-            return next(term for term in self.terms if term.name == name)
-        except StopIteration:
+            return self.terms.by_name(name)
+        except KeyError:
             raise KeyError('No term with name: {}'.format(name))
+
+    def term_by_alt_id(self, alt_id):
+        try:
+            return self.terms.by_alt_id(alt_id)
+        except KeyError:
+            raise KeyError('No term with alt_id: {}'.format(alt_id))
+
+    def terms_by_synonym(self, text):
+        return self.terms.by_synonym(text)
+
+
+def iter_stanzas(fp, format='obo', **kwargs):
+    """
+    Iterates over an ontology without building it in memory.
+
+    Yields an :class:`Ontology` with the header tags first, then each stanza as soon as it has been read. Keyword
+    arguments are passed to :class:`obo.reader.OBOReader`.
+    """
+    if format == 'obo':
+        from obo.reader import OBOReader
+        return OBOReader(**kwargs).iter_stanzas(fp)
+    else:
+        raise NotImplementedError('Only the "obo" format is supported.')
@@ -0,0 +1,61 @@
+"""
+Loading ontologies from asyncio code without blocking the event loop.
+"""
+import asyncio
+
+from obo.reader import OBOPushParser
+
+
+async def aread(path, reader=None, chunk_size=1 << 16, executor=None):
+    """
+    Reads the OBO file at `path` in chunks of `chunk_size` bytes with an :class:`obo.reader.OBOPushParser`.
+
+    Each chunk is read, parsed and added to the ontology in `executor` (the default executor of the event loop if
+    ``None``), so the event loop is free while the file is parsed and control returns to it after each chunk.
+    """
+    loop = asyncio.get_running_loop()
+    parser = OBOPushParser(reader=reader)
+    events = parser.events
+    ontology = None
+
+    def read_chunk(fp):
+        nonlocal ontology
+        chunk = fp.read(chunk_size)
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+
+        if ontology is None and events:
+            ontology = events.popleft()
+        while events:
+            ontology.add_stanza(events.popleft())
+        return bool(chunk)
+
+    with open(path, 'rb') as fp:
+        while await loop.run_in_executor(executor, read_chunk, fp):
+            pass
+    return ontology
+
+
+class LiveOntology(object):
+    """
+    Holds the current version of an ontology for a long-running service.
+
+    :meth:`reload` reads a new version in the background and replaces :attr:`ontology` once it has been read
+    completely. Requests that use :attr:`ontology` see either the old or the new version, never a partially read one.
+    """
+
+    def __init__(self, ontology=None):
+        self.ontology = ontology
+        self._lock = asyncio.Lock()
+
+    async def reload(self, path, **kwargs):
+        """
+        Reads the OBO file at `path` with :func:`aread` and makes it the current ontology. Concurrent reloads are
+        applied one after the other.
+        """
+        async with self._lock:
+            ontology = await aread(path, **kwargs)
+            self.ontology = ontology
+            return ontology
@@ -0,0 +1,155 @@
+"""
+NumPy arrays of the term graph of an ontology. Requires NumPy.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from obo.closure import ClosureIndex
+from obo.graph import IS_A
+
+
+class GraphArrays(object):
+    """
+    The edges of an :class:`obo.graph.OntologyGraph` in compressed sparse row (CSR) form, as NumPy arrays.
+
+    Row `n` holds the outgoing edges of node `n`: ``indices[indptr[n]:indptr[n + 1]]`` are its parents and
+    ``relation_codes`` over the same range the types of the edges, as positions in :attr:`relations`. Nodes are
+    numbered as in the graph; :attr:`ids` maps node numbers to ids and :attr:`index` ids to node numbers.
+
+    The arrays are a snapshot. Use :meth:`Ontology.arrays` to get arrays of the current terms.
+
+    :param ontology: the ontology of `graph`, if any; its cached closure indexes are used while they are of `graph`.
+    """
+
+    def __init__(self, graph, ontology=None):
+        if np is None:
+            raise ImportError('GraphArrays requires NumPy')
+
+        self.graph = graph
+        self.ontology = ontology
+        self.ids = np.array(graph.ids, dtype=object)
+        self.index = graph.index
+        self.relations = list(graph.relations)
+
+        indptr, indices, relation_codes = graph._parents
+        self.indptr = np.array(indptr, dtype=np.intp)
+        self.indices = np.array(indices, dtype=np.intp)
+        self.relation_codes = np.array(relation_codes, dtype=np.intp)
+        self._closures = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nodes(self, ids):
+        """
+        Returns the node numbers of `ids` as an array.
+        """
+        node = self.graph._node
+        return np.fromiter((node(id_) for id_ in ids), dtype=np.intp, count=len(ids))
+
+    def _edges(self, relations):
+        children = np.repeat(np.arange(len(self), dtype=np.intp), np.diff(self.indptr))
+        parents = self.indices
+        if relations is not None:
+            allowed = np.isin(self.relation_codes, np.fromiter(self.graph._relation_filter(relations), dtype=np.intp))
+            children, parents = children[allowed], parents[allowed]
+        return children, parents
+
+    def _closure(self, relations):
+        if relations is None:
+            # all relations, as for OntologyGraph
+            relations = tuple(self.relations)
+        elif isinstance(relations, str):
+            relations = (relations,)
+        else:
+            relations = tuple(relations)
+        try:
+            return self._closures[relations]
+        except KeyError:
+            closure = None
+            if self.ontology is not None:
+                closure = self.ontology.closure_index(relations)
+            if closure is None or closure.graph is not self.graph:
+                closure = ClosureIndex(self.graph, relations)
+            arrays = self._closures[relations] = (np.array(closure._indptr, dtype=np.intp),
+                                                  np.array(closure._indices, dtype=np.intp))
+            return arrays
+
+    def to_scipy(self, relations=None):
+        """
+        Returns the adjacency matrix over `relations` (all if ``None``) as a :class:`scipy.sparse.csr_matrix`.
+        Requires SciPy.
+        """
+        from scipy.sparse import csr_matrix
+        children, parents = self._edges(relations)
+        size = len(self)
+        return csr_matrix((np.ones(len(children), dtype=bool), (children, parents)), shape=(size, size))
+
+    def depth(self, relations=(IS_A,)):
+        """
+        Returns the length of the longest path from each node to a root through `relations`.
+        """
+        children, parents = self._edges(relations)
+        depth = np.zeros(len(self), dtype=np.intp)
+        for _ in range(len(self) + 1):
+            new = np.zeros_like(depth)
+            np.maximum.at(new, children, depth[parents] + 1)
+            if np.array_equal(new, depth):
+                return depth
+            depth = new
+        raise ValueError('The graph has a cycle')
+
+    def ancestor_mask(self, ids, relations=(IS_A,), include_self=True):
+        """
+        Returns a boolean array with a row for each of `ids` and a column for each node, which is true where the node
+        is an ancestor of the term.
+        """
+        nodes = self.nodes(ids)
+        indptr, indices = self._closure(relations)
+        starts = indptr[nodes]
+        lengths = indptr[nodes + 1] - starts
+
+        # positions of the ancestors of all nodes in `indices`, one run per node
+        rows = np.repeat(np.arange(len(nodes)), lengths)
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        mask = np.zeros((len(nodes), len(self)), dtype=bool)
+        mask[rows, indices[positions]] = True
+        if include_self:
+            mask[np.arange(len(nodes)), nodes] = True
+        return mask
+
+    def _counts(self, counts):
+        own = np.zeros(len(self))
+        if counts is None:
+            own[:] = 1
+        else:
+            for id_, count in counts.items():
+                own[self.graph._node(id_)] += count
+        return own
+
+    def annotation_totals(self, counts=None, relations=(IS_A,)):
+        """
+        Returns for each node the sum of the annotation `counts` of the node and all its descendants.
+
+        :param counts: a mapping of ids to annotation counts. If ``None``, each node counts once.
+        """
+        own = self._counts(counts)
+        indptr, indices = self._closure(relations)
+        rows = np.repeat(np.arange(len(self), dtype=np.intp), np.diff(indptr))
+        totals = own.copy()
+        np.add.at(totals, indices, own[rows])
+        return totals
+
+    def information_content(self, counts=None, relations=(IS_A,)):
+        """
+        Returns the information content ``-log(p)`` of each node, where `p` is the share of all annotations that
+        are to the node or its descendants. Nodes without annotations have an infinite information content.
+
+        :param counts: a mapping of ids to annotation counts. If ``None``, each node counts once, giving an
+            information content based on the structure of the graph alone.
+        """
+        totals = self.annotation_totals(counts, relations)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return -np.log(totals / self._counts(counts).sum())
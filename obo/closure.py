@@ -0,0 +1,69 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from obo.graph import IS_A
+
+
+class ClosureIndex(object):
+    """
+    A precomputed transitive closure of an :class:`obo.graph.OntologyGraph` over a fixed set of relations.
+
+    The ancestors of every node are stored as a sorted run of node numbers in one shared array, with a second array
+    holding the offset of each run. Subsumption checks are a binary search within a single run, which is effectively
+    constant time because terms have few ancestors compared to the size of the ontology.
+
+    :attr:`build_time` holds the time taken to build the index in seconds and :attr:`nbytes` its size in memory.
+
+    Use :meth:`Ontology.closure_index` for an index that is rebuilt when the terms change.
+    """
+
+    def __init__(self, graph, relations=(IS_A, 'part_of')):
+        start = time.perf_counter()
+
+        self.graph = graph
+        self.version = graph.version
+        self.relations = tuple(relations)
+
+        allowed = graph._relation_filter(self.relations)
+        self._indptr = indptr = array('i', [0])
+        self._indices = indices = array('i')
+        for node in range(len(graph.ids)):
+            indices.extend(sorted(graph._closure(node, allowed, True)))
+            indptr.append(len(indices))
+
+        self.build_time = time.perf_counter() - start
+
+    @property
+    def nbytes(self):
+        return sum(a.buffer_info()[1] * a.itemsize for a in (self._indptr, self._indices))
+
+    def __len__(self):
+        # number of (term, ancestor) pairs
+        return len(self._indices)
+
+    def ancestor_array(self, id_):
+        """
+        Returns the node numbers of the ancestors of the term `id_` as a sorted array. Node numbers are positions in
+        ``graph.ids``.
+        """
+        node = self.graph._node(id_)
+        return self._indices[self._indptr[node]:self._indptr[node + 1]]
+
+    def ancestors(self, id_):
+        ids = self.graph.ids
+        return frozenset(ids[n] for n in self.ancestor_array(id_))
+
+    def is_ancestor(self, ancestor, id_):
+        index = self.graph.index
+        try:
+            node, target = index[id_], index[ancestor]
+        except KeyError:
+            return False
+
+        start, end = self._indptr[node], self._indptr[node + 1]
+        i = bisect_left(self._indices, target, start, end)
+        return i != end and self._indices[i] == target
+
+    def is_descendant(self, descendant, id_):
+        return self.is_ancestor(id_, descendant)
@@ -0,0 +1,156 @@
+"""
+Opening plain and compressed OBO files by path.
+
+Compressed files are recognized by their magic bytes when reading and by their file extension when writing. gzip,
+bzip2 and xz are supported through the standard library, Zstandard if the `zstandard` package is installed.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC_BYTES = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
+
+def detect_compression(path):
+    """
+    Returns the compression of the file at `path` as one of ``'gzip'``, ``'bz2'``, ``'xz'`` and ``'zstd'``, or
+    ``None`` if it is not compressed.
+    """
+    with open(path, 'rb') as fp:
+        start = fp.read(6)
+    for magic, compression in MAGIC_BYTES:
+        if start.startswith(magic):
+            return compression
+    return None
+
+
+def _zstandard():
+    if zstandard is None:
+        raise ImportError('Zstandard-compressed files require the zstandard package')
+    return zstandard
+
+
+def _open_binary(path, mode, compression, buffer_size):
+    if compression is None:
+        return open(path, mode + 'b', buffering=buffer_size)
+    elif compression == 'gzip':
+        return gzip.open(path, mode + 'b')
+    elif compression == 'bz2':
+        return bz2.open(path, mode + 'b')
+    elif compression == 'xz':
+        return lzma.open(path, mode + 'b')
+    elif compression == 'zstd':
+        if mode == 'r':
+            return _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return _zstandard().ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+    raise ValueError('Unsupported compression: {}'.format(compression))
+
+
+class _ThreadedReader(io.RawIOBase):
+    """
+    Reads a binary file in a background thread, so that decompression overlaps with parsing.
+    """
+
+    def __init__(self, fp, chunk_size, queue_size=4):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(queue_size)
+        self._chunk = memoryview(b'')
+        self._eof = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._fp.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._chunk:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(item)
+
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self._fp.close()
+        super(_ThreadedReader, self).close()
+
+
+def open_file(path, mode='r', compression=None, threaded=False, buffer_size=1 << 20):
+    """
+    Opens the OBO file at `path` as a UTF-8 text file for reading (``'r'``) or writing (``'w'``).
+
+    :param compression: ``'gzip'``, ``'bz2'``, ``'xz'``, ``'zstd'`` or ``None`` to detect it from the magic bytes of
+        the file when reading and from its extension when writing.
+    :param threaded: when reading, decompress in a background thread.
+    :param buffer_size: size of the reads from the file or the decompressor.
+    """
+    if mode not in ('r', 'w'):
+        raise ValueError("Mode must be 'r' or 'w'")
+
+    if compression is None:
+        if mode == 'r':
+            compression = detect_compression(path)
+        else:
+            compression = EXTENSIONS.get(os.path.splitext(path)[1])
+
+    fp = _open_binary(path, mode, compression, buffer_size)
+    if mode == 'w' or compression is None:
+        return io.TextIOWrapper(fp, encoding='utf-8')
+
+    if threaded:
+        fp = _ThreadedReader(fp, buffer_size)
+    return io.TextIOWrapper(io.BufferedReader(fp, buffer_size), encoding='utf-8')
@@ -0,0 +1,202 @@
+"""
+Differences between two releases of an ontology.
+
+:func:`diff` compares stanzas by type and id. Both sides are read as streams of stanzas and a stanza is only kept in
+memory until its counterpart has been seen, so when both releases are in roughly the same order, as releases written
+by the same tool are, memory is bounded by the number of changes rather than the size of the releases.
+"""
+from collections import Counter
+from itertools import zip_longest
+
+from obo import Ontology, BUILT_IN_TYPEDEFS, Definition, TermSubset, SynonymType, iter_stanzas
+from obo.stanzas import Stanza, PropertyValue
+
+
+def _value_key(value):
+    # a hashable key by which tag values are compared
+    if isinstance(value, Definition):
+        return 'def', value.description, value.xrefs
+    elif isinstance(value, (TermSubset, SynonymType)):
+        return value.__class__, str(value)
+    elif isinstance(value, PropertyValue):
+        return value.__class__, value.name, value.value, value.datatype
+    elif isinstance(value, Stanza):
+        return value.id
+    return value
+
+
+def _multiset_difference(values, others):
+    remaining = Counter(_value_key(value) for value in others)
+    difference = []
+    for value in values:
+        key = _value_key(value)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            difference.append(value)
+    return difference
+
+
+class StanzaDiff(object):
+    """
+    The tags that changed in one stanza, or in the header if `stanza_name` is ``None``.
+
+    :attr:`tags` maps each changed tag name to a pair of the old and the new values.
+    """
+    __slots__ = ('stanza_name', 'id', 'tags')
+
+    def __init__(self, stanza_name, id_, tags):
+        self.stanza_name = stanza_name
+        self.id = id_
+        self.tags = tags
+
+    @property
+    def added(self):
+        return {name: _multiset_difference(new, old) for name, (old, new) in self.tags.items()
+                if _multiset_difference(new, old)}
+
+    @property
+    def removed(self):
+        return {name: _multiset_difference(old, new) for name, (old, new) in self.tags.items()
+                if _multiset_difference(old, new)}
+
+    def __repr__(self):
+        return '<StanzaDiff {} {}: {}>'.format(self.stanza_name, self.id, ', '.join(sorted(self.tags)))
+
+
+def _diff_tags(old, new):
+    tags = {}
+    for name in set(old.tags) | set(new.tags):
+        old_values, new_values = list(old.tags.get(name, ())), list(new.tags.get(name, ()))
+        if Counter(map(_value_key, old_values)) != Counter(map(_value_key, new_values)):
+            tags[name] = old_values, new_values
+    return tags
+
+
+def _stanzas(source):
+    """
+    Returns the header and an iterator over the stanzas of an ontology or an OBO file.
+    """
+    if isinstance(source, Ontology):
+        stanzas = (
+            [typedef for typedef in source.typedefs if not any(typedef is built_in for built_in in BUILT_IN_TYPEDEFS)],
+            source.terms,
+            source.instances,
+            source.unrecognized_stanzas,
+        )
+        return source, (stanza for group in stanzas for stanza in group)
+
+    stanzas = iter_stanzas(source)
+    return next(stanzas), stanzas
+
+
+class OntologyDiff(object):
+    """
+    :attr:`added` and :attr:`removed` are lists of stanzas, :attr:`changed` a list of :class:`StanzaDiff` and
+    :attr:`header` a :class:`StanzaDiff` for the header, or ``None`` if the header is unchanged.
+    """
+
+    def __init__(self):
+        self.header = None
+        self.added = []
+        self.removed = []
+        self.changed = []
+
+    @property
+    def obsoleted(self):
+        """
+        Ids of the stanzas that are obsolete in the new release but were not in the old one.
+        """
+        return [change.id for change in self.changed
+                if 'is_obsolete' in change.tags and
+                True in change.tags['is_obsolete'][1] and
+                True not in change.tags['is_obsolete'][0]]
+
+    def __bool__(self):
+        return bool(self.header or self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return '<OntologyDiff +{} -{} ~{}>'.format(len(self.added), len(self.removed), len(self.changed))
+
+    def apply(self, ontology):
+        """
+        Patches `ontology`, which should be the old release, into the new release.
+
+        Changed tags are replaced with their values in the new release.
+        """
+        if self.header is not None:
+            for name, (_, new_values) in self.header.tags.items():
+                ontology._set_tag(name, list(new_values))
+
+        for stanza in self.removed:
+            collection = self._collection(ontology, stanza._stanza_name)
+            if collection is None:
+                key = (stanza._stanza_name, stanza.id)
+                ontology.unrecognized_stanzas = [other for other in ontology.unrecognized_stanzas
+                                                 if (other._stanza_name, other.id) != key]
+            elif stanza.id in collection:
+                collection.discard(collection[stanza.id])
+
+        for change in self.changed:
+            collection = self._collection(ontology, change.stanza_name)
+            if collection is None:
+                stanza = next(other for other in ontology.unrecognized_stanzas
+                              if (other._stanza_name, other.id) == (change.stanza_name, change.id))
+            else:
+                stanza = collection[change.id]
+
+            for name, (_, new_values) in change.tags.items():
+                stanza._set_tag(name, set(new_values) if isinstance(stanza.tags.get(name), set) else list(new_values))
+
+        for stanza in self.added:
+            ontology.add_stanza(stanza)
+
+        return ontology
+
+    @staticmethod
+    def _collection(ontology, stanza_name):
+        return {
+            'Term': ontology.terms,
+            'Typedef': ontology.typedefs,
+            'Instance': ontology.instances,
+        }.get(stanza_name)
+
+
+def diff(old, new):
+    """
+    Compares two releases of an ontology, each given as an :class:`Ontology` or an OBO file object.
+    """
+    result = OntologyDiff()
+
+    old_header, old_stanzas = _stanzas(old)
+    new_header, new_stanzas = _stanzas(new)
+
+    header_tags = _diff_tags(old_header, new_header)
+    if header_tags:
+        result.header = StanzaDiff(None, None, header_tags)
+
+    def compare(old_stanza, new_stanza):
+        tags = _diff_tags(old_stanza, new_stanza)
+        if tags:
+            result.changed.append(StanzaDiff(new_stanza._stanza_name, new_stanza.id, tags))
+
+    # stanzas wait here until a stanza with the same key is seen on the other side
+    pending_old, pending_new = {}, {}
+    for old_stanza, new_stanza in zip_longest(old_stanzas, new_stanzas):
+        if old_stanza is not None:
+            key = (old_stanza._stanza_name, old_stanza.id)
+            if key in pending_new:
+                compare(old_stanza, pending_new.pop(key))
+            else:
+                pending_old[key] = old_stanza
+
+        if new_stanza is not None:
+            key = (new_stanza._stanza_name, new_stanza.id)
+            if key in pending_old:
+                compare(pending_old.pop(key), new_stanza)
+            else:
+                pending_new[key] = new_stanza
+
+    result.removed.extend(pending_old.values())
+    result.added.extend(pending_new.values())
+    return result
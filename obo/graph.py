@@ -0,0 +1,227 @@
+from array import array
+from collections import deque
+
+from obo.stanzas import Stanza
+
+IS_A = 'is_a'
+
+
+def _target_id(value):
+    # is_a and relationship targets are usually ids, but may also be given as stanzas
+    if isinstance(value, Stanza):
+        return value.id
+    return value
+
+
+class OntologyGraph(object):
+    """
+    A read-only snapshot of the term graph of an ontology, built from `is_a` and `relationship` tags.
+
+    Terms are numbered and edges are stored in adjacency arrays, in both directions. Relation types are given by
+    their typedef id; `is_a` is always available. Closures follow the OBO inference rules for relation chains:
+
+    - ``is_a`` composed with any relation R, in either order, is R;
+    - R composed with R is R if the typedef of R is transitive;
+    - R composed with S is R if R is ``transitive_over`` S.
+
+    Relationship targets that are not terms of the ontology become nodes too.
+
+    Use :attr:`Ontology.graph` for a graph that is rebuilt when the terms change.
+    """
+
+    def __init__(self, ontology):
+        self.version = ontology._graph_version()
+        self.ids = ids = []
+        self.index = index = {}
+        self.relations = relations = [IS_A]
+        self._relation_codes = relation_codes = {IS_A: 0}
+
+        def node(id_):
+            try:
+                return index[id_]
+            except KeyError:
+                index[id_] = n = len(ids)
+                ids.append(id_)
+                return n
+
+        def relation_code(type_):
+            try:
+                return relation_codes[type_]
+            except KeyError:
+                relation_codes[type_] = code = len(relations)
+                relations.append(type_)
+                return code
+
+        edges = []  # (child, relation, parent)
+        for term in ontology.terms:
+            node(term.id)
+        for term in ontology.terms:
+            child = index[term.id]
+            for value in term.tags.get('is_a', ()):
+                edges.append((child, 0, node(_target_id(value))))
+            for relationship in term.tags.get('relationship', ()):
+                edges.append((child, relation_code(relationship.type), node(_target_id(relationship.target_term))))
+
+        self._parents = self._adjacency(edges, 0, 2)
+        self._children = self._adjacency(edges, 2, 0)
+        self._compose = self._composition_table(ontology)
+        self._cache = {}
+
+    def _adjacency(self, edges, source, target):
+        size = len(self.ids)
+        indptr = array('l', bytes(array('l').itemsize * (size + 1)))
+        for edge in edges:
+            indptr[edge[source] + 1] += 1
+        for n in range(size):
+            indptr[n + 1] += indptr[n]
+
+        position = array('l', indptr[:-1])
+        indices = array('l', bytes(array('l').itemsize * len(edges)))
+        relations = array('l', bytes(array('l').itemsize * len(edges)))
+        for edge in edges:
+            k = position[edge[source]]
+            indices[k] = edge[target]
+            relations[k] = edge[1]
+            position[edge[source]] = k + 1
+        return indptr, indices, relations
+
+    def _composition_table(self, ontology):
+        # compose[r][s] is the relation implied by (x r y) and (y s z), or -1
+        size = len(self.relations)
+        compose = [[-1] * size for _ in range(size)]
+
+        for r, type_ in enumerate(self.relations):
+            compose[0][r] = compose[r][0] = r
+
+            typedef = ontology.typedefs.get(type_)
+            if r == 0 or typedef is None:
+                continue
+            if typedef.is_transitive in (True, 'true'):
+                compose[r][r] = r
+            for other in typedef.transitive_over:
+                s = self._relation_codes.get(other)
+                if s is not None:
+                    compose[r][s] = r
+        return compose
+
+    def _relation_filter(self, relations):
+        if relations is None:
+            return None
+        if isinstance(relations, str):
+            relations = (relations,)
+        return frozenset(self._relation_codes[type_] for type_ in relations if type_ in self._relation_codes)
+
+    def _node(self, id_):
+        try:
+            return self.index[id_]
+        except KeyError:
+            raise KeyError('No term with id: {}'.format(id_))
+
+    def _closure(self, node, allowed, upward):
+        """
+        Returns the numbers of all nodes reachable from `node` through a chain of edges that implies a relation.
+        """
+        indptr, indices, edge_relations = self._parents if upward else self._children
+        compose = self._compose
+        width = len(self.relations)
+
+        seen = {node * width}
+        reached = set()
+        stack = [(node, 0)]
+        while stack:
+            n, r = stack.pop()
+            for k in range(indptr[n], indptr[n + 1]):
+                s = edge_relations[k]
+                if allowed is not None and s not in allowed:
+                    continue
+                t = compose[r][s] if upward else compose[s][r]
+                if t == -1:
+                    continue
+                m = indices[k]
+                state = m * width + t
+                if state not in seen:
+                    seen.add(state)
+                    reached.add(m)
+                    stack.append((m, t))
+        return reached
+
+    def _cached_closure(self, id_, relations, upward):
+        key = (id_, relations if relations is None or isinstance(relations, str) else tuple(relations), upward)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        ids = self.ids
+        nodes = self._closure(self._node(id_), self._relation_filter(relations), upward)
+        result = self._cache[key] = frozenset(ids[n] for n in nodes)
+        return result
+
+    def ancestors(self, id_, relations=(IS_A,)):
+        """
+        Returns the ids of all terms that the term `id_` is related to through `relations`, directly or by inference.
+
+        :param relations: relation types to follow; ``None`` for all.
+        """
+        return self._cached_closure(id_, relations, True)
+
+    def descendants(self, id_, relations=(IS_A,)):
+        """
+        Returns the ids of all terms related to the term `id_` through `relations`, directly or by inference.
+
+        :param relations: relation types to follow; ``None`` for all.
+        """
+        return self._cached_closure(id_, relations, False)
+
+    def is_ancestor(self, ancestor, id_, relations=(IS_A,)):
+        return ancestor in self.ancestors(id_, relations)
+
+    def _neighbors(self, id_, relations, upward):
+        indptr, indices, edge_relations = self._parents if upward else self._children
+        allowed = self._relation_filter(relations)
+        n = self._node(id_)
+        return [(self.ids[indices[k]], self.relations[edge_relations[k]])
+                for k in range(indptr[n], indptr[n + 1])
+                if allowed is None or edge_relations[k] in allowed]
+
+    def parents(self, id_, relations=(IS_A,)):
+        """
+        Returns ``(parent_id, relation)`` for each outgoing edge of the term `id_`.
+        """
+        return self._neighbors(id_, relations, True)
+
+    def children(self, id_, relations=(IS_A,)):
+        """
+        Returns ``(child_id, relation)`` for each incoming edge of the term `id_`.
+        """
+        return self._neighbors(id_, relations, False)
+
+    def path_to_root(self, id_, relations=(IS_A,)):
+        """
+        Returns a shortest list of ids from the term `id_` to a root, a term without parents through `relations`.
+        """
+        indptr, indices, edge_relations = self._parents
+        allowed = self._relation_filter(relations)
+
+        start = self._node(id_)
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            n = queue.popleft()
+            is_root = True
+            for k in range(indptr[n], indptr[n + 1]):
+                if allowed is not None and edge_relations[k] not in allowed:
+                    continue
+                is_root = False
+                m = indices[k]
+                if m not in previous:
+                    previous[m] = n
+                    queue.append(m)
+            if is_root:
+                path = []
+                while n is not None:
+                    path.append(self.ids[n])
+                    n = previous[n]
+                return path[::-1]
+
+        # every path ends in a cycle
+        raise ValueError('No root reachable from: {}'.format(id_))
@@ -0,0 +1,127 @@
+"""
+Reloading an OBO file after it has been edited, reparsing only the stanzas that changed.
+"""
+import hashlib
+import io
+import os
+from collections import defaultdict
+
+from obo.reader import OBOReader, _continued_lines
+from obo.stanzas import Term, Typedef, Instance
+
+
+def _block_offsets(data):
+    """
+    Returns the offsets that split `data` into the header and one block per stanza.
+    """
+    offsets = [0]
+    if data.startswith(b'['):
+        offsets.append(0)
+
+    continued = _continued_lines(data)
+    position = data.find(b'\n[')
+    while position != -1:
+        if position + 1 not in continued:
+            offsets.append(position + 1)
+        position = data.find(b'\n[', position + 1)
+
+    offsets.append(len(data))
+    return offsets
+
+
+def _fingerprint(block):
+    # blank lines between stanzas do not count, so appending a stanza does not change the one before it
+    return hashlib.blake2b(block.rstrip(), digest_size=16).digest()
+
+
+class IncrementalLoader(object):
+    """
+    Keeps an :class:`Ontology` up to date with the OBO file at `path`.
+
+    The file is split into raw stanza blocks and each block is fingerprinted by a hash of its text. :meth:`reload`
+    reparses only the blocks whose fingerprint is new and patches :attr:`ontology` in place. The term, typedef and
+    instance indexes are updated as the stanzas are replaced, and the graph and closure indexes are rebuilt on next
+    use.
+
+    Stanzas in :attr:`ontology` should not be modified, as they would no longer match their fingerprints.
+    """
+
+    def __init__(self, path, reader=None):
+        self.path = path
+        self.reader = reader or OBOReader()
+        self.ontology = None
+        self._stat = None
+        self._header = None
+        self._stanzas = {}  # fingerprint -> the stanzas of each block with that text
+
+    def _blocks(self, block):
+        return self.reader._iter_blocks(io.StringIO(block.decode('utf-8'), newline=None))
+
+    def _parse(self, block):
+        """
+        Returns the stanzas in `block`; usually one, but a block holds every stanza up to the next one it was split at.
+        """
+        blocks = self._blocks(block)
+        next(blocks)
+        return [self.reader._build_stanza(stanza, tag_value_pairs) for stanza, tag_value_pairs in blocks]
+
+    def reload(self):
+        """
+        Reads the file if it has changed since it was last read.
+
+        Returns a pair of lists, the stanzas that were added to the ontology and those that were removed from it. A
+        changed stanza appears in both: its new version as added and its old version as removed.
+        """
+        stat = os.stat(self.path)
+        stat = stat.st_mtime_ns, stat.st_size
+        if stat == self._stat:
+            return [], []
+
+        with open(self.path, 'rb') as fp:
+            data = fp.read()
+        offsets = _block_offsets(data)
+
+        header = data[offsets[0]:offsets[1]]
+        if self.ontology is None or _fingerprint(header) != self._header:
+            _, tag_value_pairs = next(self._blocks(header))
+            ontology = self.reader._build_header(tag_value_pairs)
+            if self.ontology is None:
+                self.ontology = ontology
+            else:
+                self.ontology.tags = ontology.tags
+            self._header = _fingerprint(header)
+
+        unchanged = {fingerprint: list(group) for fingerprint, group in self._stanzas.items()}
+        stanzas = defaultdict(list)
+        ordered, added = [], []
+        for start, end in zip(offsets[1:], offsets[2:]):
+            fingerprint = _fingerprint(data[start:end])
+            if unchanged.get(fingerprint):
+                block = unchanged[fingerprint].pop()
+            else:
+                block = self._parse(data[start:end])
+                added.extend(block)
+            stanzas[fingerprint].append(block)
+            ordered.extend(block)
+
+        removed = [stanza for group in unchanged.values() for block in group for stanza in block]
+        self._patch(added, removed, ordered)
+
+        self._stanzas = stanzas
+        self._stat = stat
+        return added, removed
+
+    def _patch(self, added, removed, ordered):
+        ontology = self.ontology
+        for stanza in removed:
+            for stanza_set in (ontology.terms, ontology.typedefs, ontology.instances):
+                if stanza_set.get(stanza.id) is stanza:
+                    stanza_set.discard(stanza)
+
+        for stanza in added:
+            if isinstance(stanza, (Term, Typedef, Instance)):
+                ontology.add_stanza(stanza)
+
+        # unrecognized stanzas are kept in the order of the file
+        ontology.unrecognized_stanzas = [stanza for stanza in ordered
+                                         if not isinstance(stanza, (Term, Typedef, Instance))]
@@ -0,0 +1,244 @@
+"""
+Text search over the names, synonyms and definitions of terms.
+"""
+import heapq
+import marshal
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from math import ceil
+
+from obo.util import RE_SYNONYM
+
+RE_TOKEN = re.compile(r'[^\W_]+')  # underscores separate words in many names
+RE_SPACE = re.compile(r'\s+')
+
+INDEX_VERSION = 1
+
+# kinds of text and how much a match in each counts
+NAME, EXACT, NARROW, BROAD, RELATED, DEFINITION = range(6)
+WEIGHTS = (1.0, 0.9, 0.7, 0.6, 0.5, 0.2)
+SCOPES = {
+    'EXACT': EXACT,
+    'NARROW': NARROW,
+    'BROAD': BROAD,
+    'RELATED': RELATED,
+}
+
+
+def _normalize(text):
+    return RE_SPACE.sub(' ', text.lower()).strip()
+
+
+def _tokenize(text):
+    return RE_TOKEN.findall(text.lower())
+
+
+def _trigrams(text):
+    text = '  {} '.format(text)
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def _postings(index):
+    return {key: array('i', sorted(labels)) for key, labels in index.items()}
+
+
+class LabelIndex(object):
+    """
+    An index of the names, synonyms and definitions of the terms of an ontology.
+
+    Matches are returned as ``(term_id, label, score)`` tuples, best first. The score is the weight of the kind of
+    label that matched: names count most, then synonyms by scope (``EXACT``, ``NARROW``, ``BROAD``, then ``RELATED``
+    or unscoped) and definitions least.
+
+    There are three kinds of query:
+
+    - :meth:`search` finds labels that contain all words of the query, the last word being a prefix;
+    - :meth:`complete` finds names and synonyms that start with the query;
+    - :meth:`fuzzy` finds names and synonyms similar to the query by the trigrams they share.
+
+    :param definitions: whether to index the description of definitions for :meth:`search`.
+    :param max_expansions: the largest number of words a prefix is expanded to, and of labels considered by
+        :meth:`complete`.
+    """
+
+    def __init__(self, ontology=None, definitions=True, max_expansions=1000):
+        self.max_expansions = max_expansions
+        self.version = None if ontology is None else (id(ontology.terms), ontology.terms._version)
+        self.ids = []
+        self._labels = []
+        self._label_terms = array('i')
+        self._label_kinds = array('b')
+        if ontology is not None:
+            for term in ontology.terms:
+                self._add_term(term, definitions)
+        self._build()
+
+    def _add_label(self, text, kind):
+        self._labels.append(text)
+        self._label_terms.append(len(self.ids) - 1)
+        self._label_kinds.append(kind)
+
+    def _add_term(self, term, definitions):
+        self.ids.append(term.id)
+        if term.name:
+            self._add_label(term.name, NAME)
+        for value in term.tags.get('synonym', ()):
+            match = RE_SYNONYM.match(value)
+            if match:
+                self._add_label(match.group('text'), SCOPES.get(match.group('scope'), RELATED))
+        definition = term.definition
+        if definitions and definition:
+            self._add_label(getattr(definition, 'description', definition), DEFINITION)
+
+    def _build(self):
+        tokens, trigrams, labels = {}, {}, []
+        trigram_counts = array('H')
+        for n, (text, kind) in enumerate(zip(self._labels, self._label_kinds)):
+            for token in _tokenize(text):
+                tokens.setdefault(token, set()).add(n)
+            if kind != DEFINITION:
+                normalized = _normalize(text)
+                labels.append((normalized, n))
+                label_trigrams = _trigrams(normalized)
+                for trigram in label_trigrams:
+                    trigrams.setdefault(trigram, set()).add(n)
+                trigram_counts.append(min(len(label_trigrams), 0xffff))
+            else:
+                trigram_counts.append(0)
+
+        labels.sort()
+        self._postings = _postings(tokens)
+        self._tokens = sorted(tokens)
+        self._trigrams = _postings(trigrams)
+        self._trigram_counts = trigram_counts
+        self._sorted_labels = [normalized for normalized, _ in labels]
+        self._sorted_label_numbers = array('i', (n for _, n in labels))
+
+    def _rank(self, labels, limit, scores=None):
+        best = {}
+        for n in labels:
+            term = self._label_terms[n]
+            score = WEIGHTS[self._label_kinds[n]] * (scores[n] if scores else 1)
+            key = (-score, len(self._labels[n]), n)
+            if term not in best or key < best[term]:
+                best[term] = key
+
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: (item[1], self.ids[item[0]]))
+        return [(self.ids[term], self._labels[n], -score) for term, (score, _, n) in ranked]
+
+    def _prefix(self, sorted_keys, prefix):
+        # the keys in `sorted_keys` that start with `prefix`, up to max_expansions of them
+        start = bisect_left(sorted_keys, prefix)
+        end = start
+        while end < len(sorted_keys) and end - start < self.max_expansions and sorted_keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def search(self, query, limit=10, prefix=True):
+        """
+        Returns terms with a label that contains every word of `query`. If `prefix` is set, the last word may be
+        incomplete.
+        """
+        tokens = _tokenize(query)
+        if not tokens:
+            return []
+
+        postings = []
+        for token in tokens[:-1]:
+            if token not in self._postings:
+                return []
+            postings.append(self._postings[token])
+
+        if prefix:
+            start, end = self._prefix(self._tokens, tokens[-1])
+            last = set()
+            for token in self._tokens[start:end]:
+                last.update(self._postings[token])
+        else:
+            last = set(self._postings.get(tokens[-1], ()))
+
+        labels = last
+        for labels_with_token in sorted(postings, key=len):
+            labels = labels.intersection(labels_with_token)
+        return self._rank(labels, limit)
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns terms with a name or synonym that starts with `prefix`.
+        """
+        start, end = self._prefix(self._sorted_labels, _normalize(prefix))
+        return self._rank(self._sorted_label_numbers[start:end], limit)
+
+    def fuzzy(self, query, limit=10, threshold=0.5):
+        """
+        Returns terms with a name or synonym whose trigrams have a Dice similarity of at least `threshold` with those
+        of `query`. Scores are weighted by similarity.
+        """
+        query = _normalize(query)
+        trigrams = _trigrams(query)
+        # a label with fewer trigrams in common than this cannot reach the threshold, so candidates need to share at
+        # least one of the rarest len(trigrams) - min_overlap + 1 trigrams of the query
+        min_overlap = max(1, ceil(threshold * len(trigrams) / (2 - threshold)))
+        rarest = sorted(trigrams, key=lambda trigram: len(self._trigrams.get(trigram, ())))
+
+        prefix_length = len(trigrams) - min_overlap + 1
+
+        overlaps = Counter()
+        for trigram in rarest[:prefix_length]:
+            overlaps.update(self._trigrams.get(trigram, ()))
+        for trigram in rarest[prefix_length:]:
+            labels = self._trigrams.get(trigram, ())
+            for n in overlaps:
+                i = bisect_left(labels, n)
+                if i != len(labels) and labels[i] == n:
+                    overlaps[n] += 1
+
+        scores = {}
+        trigram_counts = self._trigram_counts
+        for n, overlap in overlaps.items():
+            similarity = 2 * overlap / (len(trigrams) + trigram_counts[n])
+            if similarity >= threshold:
+                scores[n] = similarity
+        return self._rank(scores, limit, scores)
+
+    def dump(self, fp):
+        """
+        Writes the index to the binary file `fp`.
+        """
+        fp.write(marshal.dumps((
+            INDEX_VERSION,
+            self.max_expansions,
+            self.ids,
+            self._labels,
+            self._label_terms.tobytes(),
+            self._label_kinds.tobytes(),
+            {token: labels.tobytes() for token, labels in self._postings.items()},
+            {trigram: labels.tobytes() for trigram, labels in self._trigrams.items()},
+            self._trigram_counts.tobytes(),
+            self._sorted_labels,
+            self._sorted_label_numbers.tobytes(),
+        )))
+
+    @classmethod
+    def load(cls, fp):
+        """
+        Reads an index written by :meth:`dump` from the binary file `fp`.
+        """
+        state = marshal.loads(fp.read())
+        if state[0] != INDEX_VERSION:
+            raise ValueError('Unsupported label index version: {}'.format(state[0]))
+
+        index = cls.__new__(cls)
+        index.version = None
+        (_, index.max_expansions, index.ids, index._labels, label_terms, label_kinds, postings, trigrams,
+         trigram_counts, index._sorted_labels, sorted_label_numbers) = state
+        index._label_terms = array('i', label_terms)
+        index._label_kinds = array('b', label_kinds)
+        index._postings = {token: array('i', labels) for token, labels in postings.items()}
+        index._tokens = sorted(index._postings)
+        index._trigrams = {trigram: array('i', labels) for trigram, labels in trigrams.items()}
+        index._trigram_counts = array('H', trigram_counts)
+        index._sorted_label_numbers = array('i', sorted_label_numbers)
+        return index
@@ -0,0 +1,229 @@
+"""
+A read-only ontology backed by a memory-mapped OBO file.
+
+Only the header and the position and id of each stanza are read up front. A stanza is parsed the first time it is
+accessed. Processes that map the same file share its pages through the page cache instead of each holding a parsed
+copy.
+"""
+import io
+import marshal
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Set
+
+from obo import Ontology
+from obo.reader import OBOReader, _continued_lines
+from obo.util import synonym_text
+
+RE_STANZA_LINE = re.compile(rb'^\[(?P<stanza>[^\r\n]+)\][ \t\r]*$', re.MULTILINE)
+RE_ID_LINE = re.compile(rb'^[ \t]*id:[^\r\n]*', re.MULTILINE)
+RE_INDEXED_TAG_LINE = re.compile(rb'^[ \t]*(?:name|alt_id|synonym):[^\r\n]*', re.MULTILINE)
+
+INDEX_VERSION = 1
+
+
+class MappedStanzaSet(Mapping, Set):
+    """
+    A read-only, :class:`obo.util.StanzaSet`-compatible view of the stanzas of one type in a :class:`MappedOntology`.
+
+    Like a `StanzaSet`, iterating yields stanzas. Use :meth:`ids` to iterate over ids without parsing stanzas.
+    """
+    _version = 0
+
+    def __init__(self, ontology, ordinals):
+        self._ontology = ontology
+        self._ordinals = ordinals  # id -> stanza ordinal in the file
+        self._stanzas = {}
+        self._by_name = None
+        self._by_alt_id = None
+        self._by_synonym = None
+
+    def __getitem__(self, id_):
+        try:
+            return self._stanzas[id_]
+        except KeyError:
+            stanza = self._stanzas[id_] = self._ontology._parse_stanza(self._ordinals[id_])
+            return stanza
+
+    def __contains__(self, id_):
+        return id_ in self._ordinals
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        for id_ in self._ordinals:
+            yield self[id_]
+
+    def ids(self):
+        return iter(self._ordinals)
+
+    def _build_indexes(self):
+        by_name, by_alt_id, by_synonym = {}, {}, {}
+        ordinal_ids = {ordinal: id_ for id_, ordinal in self._ordinals.items()}
+        for ordinal, tag, value in self._ontology._scan_tags(RE_INDEXED_TAG_LINE):
+            id_ = ordinal_ids.get(ordinal)
+            if id_ is None:
+                continue
+            elif tag == 'name':
+                by_name.setdefault(value, id_)
+            elif tag == 'alt_id':
+                by_alt_id.setdefault(value, id_)
+            else:
+                by_synonym.setdefault(synonym_text(value), []).append(id_)
+        self._by_name, self._by_alt_id, self._by_synonym = by_name, by_alt_id, by_synonym
+
+    def by_name(self, name):
+        if self._by_name is None:
+            self._build_indexes()
+        return self[self._by_name[name]]
+
+    def by_alt_id(self, alt_id):
+        if self._by_alt_id is None:
+            self._build_indexes()
+        return self[self._by_alt_id[alt_id]]
+
+    def by_synonym(self, text):
+        if self._by_synonym is None:
+            self._build_indexes()
+        return [self[id_] for id_ in self._by_synonym.get(text, ())]
+
+
+class MappedOntology(Ontology):
+    """
+    An :class:`Ontology` whose `terms` and `instances` are parsed on demand from a memory-mapped OBO file. Typedefs
+    and unrecognized stanzas are few and parsed when the file is opened.
+
+    The ontology is read-only. The file must not be modified while it is open.
+
+    :param index_path: a file written by :meth:`write_index`. If given, and it matches the size and modification
+        time of the OBO file, the file is not scanned for stanzas.
+    """
+
+    def __init__(self, path, index_path=None, reader=None):
+        self._reader = reader or OBOReader()
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        stat = os.fstat(self._file.fileno())
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        self._continued = None
+
+        index = None
+        if index_path is not None:
+            index = self._load_index(index_path)
+        if index is None:
+            index = self._scan()
+        self._index = index
+        self._starts, self._ends, stanza_names, ids = index
+
+        header_end = self._starts[0] if self._starts else len(self._map)
+        header = self._reader._build_header(next(self._reader._iter_blocks(self._lines(0, header_end)))[1])
+
+        super(MappedOntology, self).__init__()
+        self.tags = header.tags
+
+        terms, instances = {}, {}
+        for ordinal, (stanza_name, id_) in enumerate(zip(stanza_names, ids)):
+            if stanza_name == 'Term':
+                terms[id_] = ordinal
+            elif stanza_name == 'Instance':
+                instances[id_] = ordinal
+            else:
+                self.add_stanza(self._parse_stanza(ordinal))
+
+        self.terms = MappedStanzaSet(self, terms)
+        self.instances = MappedStanzaSet(self, instances)
+
+    def _lines(self, start, end):
+        return io.StringIO(self._map[start:end].decode('utf-8'), newline=None)
+
+    def _parse_stanza(self, ordinal):
+        blocks = self._reader._iter_blocks(self._lines(self._starts[ordinal], self._ends[ordinal]))
+        next(blocks)  # empty header
+        stanza, tag_value_pairs = next(blocks)
+        return self._reader._build_stanza(stanza, tag_value_pairs)
+
+    def _following_lines(self, position):
+        # the lines after the line at `position`, read as the tokenizer asks for them
+        end = self._map.find(b'\n', position)
+        while end != -1:
+            position = end + 1
+            end = self._map.find(b'\n', position)
+            yield self._map[position:len(self._map) if end == -1 else end].decode('utf-8')
+
+    def _read_tag_value(self, match):
+        # a value that continues with a trailing backslash is read from the lines that follow
+        line = match.group(0).decode('utf-8').strip()
+        tag, value = self._reader._tokenize(line, self._following_lines(match.end()))
+        return tag, self._reader._decode_value(tag, value.strip())
+
+    def _continued_lines(self):
+        # lines that continue a tag-value pair are neither stanza lines nor tag-value lines of their own
+        if self._continued is None:
+            self._continued = _continued_lines(self._map)
+        return self._continued
+
+    def _finditer(self, pattern, start=0, end=None):
+        continued = self._continued_lines()
+        for match in pattern.finditer(self._map, start, len(self._map) if end is None else end):
+            if match.start() not in continued:
+                yield match
+
+    def _scan(self):
+        starts, ends = array('q'), array('q')
+        stanza_names, ids = [], []
+
+        for match in self._finditer(RE_STANZA_LINE):
+            if starts:
+                ends.append(match.start())
+            starts.append(match.start())
+            stanza_names.append(match.group('stanza').decode('utf-8'))
+        if starts:
+            ends.append(len(self._map))
+
+        for start, end in zip(starts, ends):
+            match = next(self._finditer(RE_ID_LINE, start, end), None)
+            ids.append(self._read_tag_value(match)[1] if match else None)
+
+        return starts, ends, stanza_names, ids
+
+    def _scan_tags(self, pattern):
+        """
+        Yields ``(ordinal, tag, value)`` for every tag-value line matched by `pattern`.
+        """
+        starts = self._starts
+        for match in self._finditer(pattern, starts[0] if starts else 0):
+            tag, value = self._read_tag_value(match)
+            yield bisect_right(starts, match.start()) - 1, tag, value
+
+    def write_index(self, index_path):
+        """
+        Writes the stanza offsets and ids of the OBO file, so other processes can open it without scanning it.
+        """
+        starts, ends, stanza_names, ids = self._index
+        with open(index_path, 'wb') as fp:
+            fp.write(marshal.dumps((INDEX_VERSION, self._stat, starts.tobytes(), ends.tobytes(), stanza_names, ids)))
+
+    def _load_index(self, index_path):
+        try:
+            with open(index_path, 'rb') as fp:
+                version, stat, starts, ends, stanza_names, ids = marshal.loads(fp.read())
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        if version != INDEX_VERSION or tuple(stat) != self._stat:
+            return None
+        return array('q', starts), array('q', ends), stanza_names, ids
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
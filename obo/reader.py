@@ -1,9 +1,16 @@
+import codecs
+import io
+import mmap
+import os
 import pprint
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 from obo import Ontology, TermSubset, SynonymType, SynonymScope, Definition, XRef
-from obo.stanzas import Term, Instance, Stanza, Typedef, Relationship
+from obo.stanzas import Term, CompactTerm, Instance, Stanza, Typedef, Relationship, LazyValue, LazyTags, \
+    LAZY_DECODERS
 
 
 class ParseException(Exception):
@@ -11,6 +18,7 @@ class ParseException(Exception):
         super().__init__(': '.join([message, value]) if value else message)
 
 
+RE_NEWLINE = re.compile(r'\r\n|\r|\n')
 RE_STANZA = re.compile(r'^\[(?P<stanza>.+)\]$')
 RE_NAME_DESCRIPTION = re.compile(r'^(?P<name>[^ ]+) "(?P<description>(?:[^"\\]|\\.)*)"$')
 RE_XREF_DEFINITION = re.compile(r'^(?P<name>[^ ]+)( "(?P<description>(?:[^"\\]|\\.)*)")?$')
@@ -21,6 +29,14 @@ RE_XREF_DEFINITION_ITEM = re.compile(r'(?P<name>([^\\,]|\\\\|\\.)+)( "(?P<descri
 RE_XREF_DEFINITION_DIVIDER = re.compile(r',\s*')
 RE_RELATIONSHIP = re.compile('^(?P<type>.+) (?P<target_term>.+)$')
 
+RE_ESCAPE = re.compile(r'\\(.?)', re.DOTALL)  # other escaped characters stand for themselves; a final '\' is dropped
+
+UNESCAPES = {
+    'n': '\n',
+    't': '\t',
+    'W': ' ',
+}
+
 RE_SYNONYM_TYPEDEF = re.compile(r'^(?P<name>.+) '
                                 r'"(?P<description>(?:[^"\\]|\\.)*)"'
                                 r'( (?P<scope>(EXACT|BROAD|NARROW|RELATED)))?$')
@@ -28,217 +44,729 @@ RE_SYNONYM_TYPEDEF = re.compile(r'^(?P<name>.+) '
 BOOLEAN_TAG_NAMES = (
     'is_anonymous',
     'is_obsolete',
+    'is_anti_symmetric',
+    'is_cyclic',
+    'is_reflexive',
+    'is_symmetric',
+    'is_transitive',
     # TODO more tag names
 )
 
+# stanzas selected by the namespaces of a reader
+NAMESPACED_STANZA_NAMES = frozenset(('Term', 'Instance'))
+
+# tags with few distinct values, interned by every reader
+INTERNED_TAG_NAMES = frozenset((
+    'namespace',
+    'subset',
+    'created_by',
+))
+
+# tags with ids as values, shared within an ontology (see OBOReader.read)
+SHARED_TAG_NAMES = frozenset((
+    'is_a',
+    'union_of',
+    'disjoint_from',
+    'replaced_by',
+    'consider',
+    'domain',
+    'range',
+    'inverse_of',
+    'transitive_over',
+    'instance_of',
+))
+
+
+RE_ESCAPED_LINE = re.compile(rb'^[^\n]*\\[^\n]*', re.MULTILINE)
+
+
+def _unescape(s):
+    if '\\' not in s:
+        return s
+    # text and escaped characters alternate
+    parts = RE_ESCAPE.split(s)
+    parts[1::2] = [UNESCAPES.get(char, char) for char in parts[1::2]]
+    return ''.join(parts)
+
+
+def _same(value):
+    return value
+
+
+# The decoders of values that are expensive to decode, and which a lazy reader keeps as text. `intern` and `share`
+# are the pools of the reader (see OBOReader._decode_value); values decoded on access are not pooled.
+
+def _decode_relationship(value, intern=_same, share=_same):
+    match = RE_RELATIONSHIP.match(value)
+    if not match:
+        raise ParseException("Malformatted 'relationship'", value)
+    return share(Relationship(intern(_unescape(match.group('type'))), share(_unescape(match.group('target_term')))))
+
+
+def _decode_intersection_of(value, intern=_same, share=_same):
+    if RE_RELATIONSHIP.match(value):
+        return _decode_relationship(value, intern, share)
+    return share(str(value))  # target is tag id; str() so that a LazyValue is not kept
+
+
+def _decode_xref(value, intern=_same, share=_same):
+    match = RE_XREF_DEFINITION.match(value)
+    if not match:
+        raise ParseException("Malformatted 'xref'", value)
+    return share(XRef(share(_unescape(match.group('name'))), _unescape(match.group('description') or '') or None))
+
+
+def _decode_def(value, intern=_same, share=_same):
+    match = RE_DESCRIPTION_XREFS.match(value)
+    if not match:
+        raise ParseException("Malformatted 'def'", value)
+
+    description = match.group('description')
+    xrefs_value = match.group('xrefs')
+    xrefs = []
+
+    xref_match = RE_XREF_DEFINITION_ITEM.match(xrefs_value)
+    while xref_match:
+        pos = xref_match.end(1)
+        xrefs.append(share(XRef(share(_unescape(xref_match.group('name'))),
+                                _unescape(xref_match.group('description') or '') or None)))
+
+        if pos == len(xrefs_value):
+            break
+
+        comma_match = RE_XREF_DEFINITION_DIVIDER.match(xrefs_value, pos)
+
+        if not comma_match:
+            raise ParseException("Malformatted 'def'", value)
+
+        pos = comma_match.end(0)
+        xref_match = RE_XREF_DEFINITION_ITEM.match(xrefs_value, pos)
+
+    return Definition(description, *xrefs)
+
+
+LAZY_DECODERS.update({
+    'def': _decode_def,
+    'xref': _decode_xref,
+    'relationship': _decode_relationship,
+    'intersection_of': _decode_intersection_of,
+})
+
+
+def _unselected_tag(line, tags):
+    """
+    Returns whether the tag of a tag-value line is not in `tags`, if that is clear without tokenizing the line: the
+    line has no escapes and its tag no comment, modifier or quote.
+    """
+    colon = line.find(':')
+    if colon <= 0:
+        return False
+    tag = line[:colon]
+    return tag not in tags and '!' not in tag and '{' not in tag and '"' not in tag and '\\' not in line
+
+
+def _scan_escapes(line, escape=False, quote=False):
+    """
+    Scans a stripped tag-value line the way :meth:`OBOReader._tokenize_escaped` does and returns ``(escape, quote)``
+    at its end. If `escape` is true the value continues on the next line.
+    """
+    for char in line:
+        if escape:
+            escape = False
+        elif char == '\\':
+            escape = True
+        elif char == '!':
+            break  # comment
+        elif char == '{' and not quote:
+            break  # trailing modifier
+        elif char == '"':
+            quote = not quote
+    return escape, quote
+
+
+def _continued_lines(data):
+    """
+    Returns the offsets of the lines of `data` that continue the tag-value pair of the line before them.
+    """
+    continued = set()
+    following, quote = None, False
+    # only a line with a backslash in it can end with an escape
+    for match in RE_ESCAPED_LINE.finditer(data):
+        line = match.group().strip().decode('utf-8', 'surrogateescape')
+        if match.start() == following:
+            escape, quote = _scan_escapes(line, True, quote)
+        elif line.startswith(('[', '!')):
+            continue
+        else:
+            escape, quote = _scan_escapes(line)
+
+        if escape:
+            following = match.end() + 1
+            continued.add(following)
+    return continued
+
+
+def _stanza_boundaries(path, chunks):
+    """
+    Returns byte offsets that split the file at `path` into up to `chunks` pieces, each starting at a stanza line.
+    """
+    size = os.path.getsize(path)
+    offsets = [0]
+    if size == 0:
+        return offsets + [size]
+
+    with open(path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        continued = _continued_lines(data)
+        for i in range(1, chunks):
+            position = data.find(b'\n[', max(size * i // chunks, offsets[-1]))
+            # a stanza line following a line that ends with an escape is part of a tag-value pair; skip it
+            while position != -1 and position + 1 in continued:
+                position = data.find(b'\n[', position + 1)
+
+            if position == -1:
+                break
+            offsets.append(position + 1)
+
+    offsets.append(size)
+    return offsets
+
+
+def _read_chunk(args):
+    reader, path, start, end, default_namespace = args
+    with open(path, 'rb') as fp:
+        fp.seek(start)
+        lines = io.StringIO(fp.read(end - start).decode('utf-8'), newline=None)
+
+    with reader._sharing_values():
+        blocks = reader._iter_blocks(lines, default_namespace)
+        _, header = next(blocks)
+        return header, [reader._build_stanza(stanza, tag_value_pairs) for stanza, tag_value_pairs in blocks]
+
 
 class OBOReader(object):
-    def _unescape(self, s):
-        out, escape = '', False
-        for char in s:
-            if escape:
-                if char in 'ntW':
-                    out += {
-                        'n': '\n',
-                        't': '\t',
-                        'W': ' '
-                    }[char]
+    def __init__(self, fast_tokenizer=True, compact=False, pool=None, lazy=False, tags=None, stanza_types=None,
+                 namespaces=None):
+        """
+        :param fast_tokenizer: split tag-value lines with ``str.find`` where possible.
+        :param compact: read terms as :class:`CompactTerm`.
+        :param pool: a dict used to share equal strings and values; pass the same dict to several readers to share
+            values between the ontologies they read. Without a pool, tag names, relationship types, namespaces and
+            subsets are shared by everything the reader reads, and ids, xrefs and relationships are shared only
+            within an ontology returned by :meth:`read`.
+        :param lazy: keep the values of ``def``, ``xref``, ``relationship`` and ``intersection_of`` tags as text and
+            decode them when the tag is first accessed (see :class:`obo.stanzas.LazyTags`). Malformatted values then
+            raise :class:`ParseException` on access rather than while reading. Cannot be combined with `compact`.
+        :param tags: if set, only tags with these names are read in stanzas; the values of other tags are not decoded.
+            The ``id`` tag is always read, and so is ``namespace`` if `namespaces` is set. Header tags are not affected.
+        :param stanza_types: if set, only stanzas of these types, such as ``'Term'``, are read; others are skipped
+            line by line without being tokenized.
+        :param namespaces: if set, only terms and instances in these namespaces are read. Those without a
+            ``namespace`` tag are in the ``default-namespace`` of the header. Typedefs and other stanzas are always
+            read, so that relations keep their properties, such as transitivity.
+        """
+        if lazy and compact:
+            raise ValueError('A reader cannot be both lazy and compact')
+        self.fast_tokenizer = fast_tokenizer
+        self.compact = compact
+        self.pool = pool
+        self._names = {} if pool is None else pool
+        self._values = pool
+        self.lazy = lazy
+        self.stanza_types = None if stanza_types is None else frozenset(stanza_types)
+        self.namespaces = None if namespaces is None else frozenset(namespaces)
+        self.tags = None
+        if tags is not None:
+            self.tags = frozenset(tags) | {'id'} | ({'namespace'} if namespaces is not None else set())
+
+    def __getstate__(self):
+        # worker processes start with an empty pool
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['_names'] = {}
+        state['_values'] = None
+        return state
+
+    def _intern(self, value):
+        try:
+            return self._names[value]
+        except KeyError:
+            self._names[value] = value
+            return value
+
+    def _share(self, value):
+        values = self._values
+        if values is None:
+            return value
+        try:
+            return values[value]
+        except KeyError:
+            values[value] = value
+            return value
+
+    @contextmanager
+    def _sharing_values(self):
+        """
+        Shares ids, xrefs and relationships between the values decoded in the block, unless the reader has a pool.
+        """
+        if self._values is not None:
+            yield
+            return
+        self._values = {}
+        try:
+            yield
+        finally:
+            self._values = None
+
+    @staticmethod
+    def _unescape(s):
+        return _unescape(s)
+
+    def _tokenize_escaped(self, line, lines):
+        """
+        Splits a tag-value line into tag and raw value one character at a time.
+
+        1. strip unescaped '!'s.
+        2. if line ends with '\\', read next line, then continue with #1
+        3. split at first unescaped ':' and ignore everything from first unescaped '{' or '!'
+
+        Returns ``(None, part)`` if the line has no tag.
+        """
+        tag = None
+        part = ''
+        escape, quote = False, False
+
+        while True:
+            for char in line:
+                if escape:
+                    part += char
+                    escape = False
+                elif char == '\\':
+                    part += char
+                    escape = True
+                elif not tag and char == ':':
+                    tag = part
+                    part = ''
+                elif char == '!':  # and not quote? OBO Spec is not very specific on all of this.
+                    break  # comment
+                elif char == '{' and not quote:
+                    break  # trailing modifier
                 else:
-                    out += char
-                escape = False
-            elif char == '\\':
-                escape = True
+                    if char == '"':
+                        quote = not quote
+                    part += char
+            if escape:
+                try:
+                    line = next(lines).strip()
+                except StopIteration:
+                    raise ParseException("Unterminated tag-value pair at end of file.", line)
             else:
-                out += char
-        return out
+                break
 
-    def read(self, fp):
-        stanza = None
-        header = None
-        stanzas = []
-        tag_value_pairs = []
+        #if quote:
+        #    raise ParseException("Unterminated quote in tag-value pair", line, tag, value)
 
-        lines = iter(fp)
+        return tag, part
 
-        while True:
-            try:
-                line = next(lines).strip()
-            except StopIteration:
+    def _tokenize(self, line, lines):
+        """
+        Splits a tag-value line into tag and raw value using ``str.find``.
+
+        Lines containing a backslash may contain escapes or continue on the next line and are handed over to
+        :meth:`_tokenize_escaped`. Otherwise the results are identical.
+        """
+        if '\\' in line:
+            return self._tokenize_escaped(line, lines)
+
+        end = line.find('!')
+        if end == -1:
+            end = len(line)
+
+        # a '{' starts a trailing modifier unless it is quoted
+        brace = line.find('{', 0, end)
+        while brace != -1:
+            if not line.count('"', 0, brace) % 2:
+                end = brace
                 break
+            brace = line.find('{', brace + 1, end)
+
+        colon = line.find(':', 0, end)
+        if colon == -1:
+            return None, line[:end]
+        elif colon == 0:
+            # empty tag; the escape-aware scanner has the (odd) reference behavior for this
+            return self._tokenize_escaped(line, lines)
+        return line[:colon], line[colon + 1:end]
+
+    def _decode_value(self, tag, value):
+        """
+        Decodes the raw value of a tag-value pair in a stanza or the header.
+
+        Ids, names of namespaces and subsets, relationships and xrefs recur many times in an ontology and are shared
+        through the pools of the reader (see :meth:`_intern` and :meth:`_share`).
+        """
+        intern = self._intern
+        share = self._share
+
+        if tag in BOOLEAN_TAG_NAMES:
+            if value not in ('true', 'false'):
+                raise ParseException('Tag must be one of "true", "false"', value)
+            value = value == 'true'
+
+        # if tag in ('union_of', 'disjoint_from'):
+        # target is tag id
+
+        elif tag in LAZY_DECODERS:
+            value = LAZY_DECODERS[tag](value, intern, share)
+        elif tag in INTERNED_TAG_NAMES:
+            value = intern(value)
+        elif tag in SHARED_TAG_NAMES:
+            value = share(value)
+
+        return value
+
+    def _decode_lazily(self, tag, value):
+        if tag in LAZY_DECODERS:
+            return LazyValue(value)
+        return self._decode_value(tag, value)
+
+    def _value_decoder(self):
+        return self._decode_lazily if self.lazy else self._decode_value
+
+    def _selected(self, stanza, tag_value_pairs, default_namespace):
+        """
+        Returns whether a `stanza` with `tag_value_pairs` is in one of the selected namespaces. Only terms and
+        instances are selected by namespace.
+        """
+        if self.namespaces is None or stanza not in NAMESPACED_STANZA_NAMES:
+            return True
+        namespace = default_namespace
+        for name, value in tag_value_pairs:
+            if name == 'namespace':
+                namespace = value
+                break
+        return namespace in self.namespaces
+
+    @staticmethod
+    def _default_namespace(header):
+        for name, value in header:
+            if name == 'default-namespace':
+                return value
+        return None
+
+    def _decode_header_value(self, name, value):
+        if name == 'subsetdef':
+            match = RE_NAME_DESCRIPTION.match(value)
+
+            if match:
+                value = TermSubset(self._unescape(match.group('name')), self._unescape(match.group('description')))
+            else:
+                raise ParseException("Malformatted 'subsetdef'", value)
+        elif name == 'synonymtypedef':
+
+            match = RE_SYNONYM_TYPEDEF.match(value)
+
+            if match:
+                scope = match.group('scope')
+                value = SynonymType(self._unescape(match.group('name')),
+                                    self._unescape(match.group('description')),
+                                    scope=SynonymScope[scope] if scope else None)
+            else:
+                raise ParseException("Malformatted 'synonymtypedef'", value)
+
+        return value
+
+    def _iter_blocks(self, fp, default_namespace=None):
+        """
+        Yields ``(stanza_name, tag_value_pairs)`` for each block in the file. The first block is always the header and
+        has a stanza name of ``None``. Stanzas and tags that are not selected by the reader are left out.
+
+        :param default_namespace: the namespace of stanzas without a ``namespace`` tag, if the file has no header
+            that sets it.
+        """
+        blocks = _BlockParser(self, default_namespace)
+        yield from blocks.feed(fp)
+        yield from blocks.close()
+
+    def _build_header(self, tag_value_pairs):
+        ontology = Ontology()
+        for name, value in tag_value_pairs:
+            if type(value) is LazyValue:
+                value = LAZY_DECODERS[name](value)
+            ontology.add_tag(name, self._decode_header_value(name, value))
+        return ontology
+
+    def _build_stanza(self, stanza, tag_value_pairs):
+        tags_dict = defaultdict(list)
+        for name, value in tag_value_pairs:
+            tags_dict[name].append(value)
+
+        if stanza == 'Term':
+            # TODO attach subset.
+            if self.compact:
+                return CompactTerm(**tags_dict)
+            stanza = Term(**tags_dict)
+        elif stanza == 'Typedef':
+            stanza = Typedef(**tags_dict)
+        elif stanza == 'Instance':
+            stanza = Instance(**tags_dict)
+        else:
+            # Parsers/serializers round-trip (successfully load and save) unrecognized stanzas.
+            stanza = Stanza(stanza, **tags_dict)
 
-            if line.startswith('['):
+        if self.lazy:
+            stanza.tags = LazyTags(list, stanza.tags)
+        return stanza
+
+    def iter_stanzas(self, fp):
+        """
+        Reads an OBO file one stanza at a time.
+
+        The first item is an :class:`Ontology` holding only the header tags. It is followed by a :class:`Term`,
+        :class:`Typedef`, :class:`Instance` or (unrecognized) :class:`Stanza` for each stanza, yielded as soon as the
+        stanza is complete. Stanzas are not added to the header ontology.
+        """
+        blocks = self._iter_blocks(fp)
+
+        _, header = next(blocks)
+        yield self._build_header(header)
+
+        for stanza, tag_value_pairs in blocks:
+            yield self._build_stanza(stanza, tag_value_pairs)
+
+    def read(self, fp):
+        with self._sharing_values():
+            stanzas = self.iter_stanzas(fp)
+            ontology = next(stanzas)
+
+            for stanza in stanzas:
+                ontology.add_stanza(stanza)
+
+        return ontology
+
+    def read_parallel(self, path, processes=None, chunks_per_process=4):
+        """
+        Reads the OBO file at `path` using a pool of `processes` worker processes.
+
+        The file is split at stanza lines into chunks that are parsed independently. The resulting ontology is the
+        same as from :meth:`read`, including the order of `unrecognized_stanzas`.
+        """
+        processes = processes or os.cpu_count() or 1
+        offsets = _stanza_boundaries(path, processes * chunks_per_process)
+
+        default_namespace = None
+        if self.namespaces is not None:
+            # chunks after the first have no header of their own
+            with open(path, 'r', encoding='utf-8') as fp:
+                default_namespace = self._default_namespace(next(self._iter_blocks(fp))[1])
+
+        chunks = [(self, path, start, end, default_namespace) for start, end in zip(offsets, offsets[1:])
+                  if start != end] or [(self, path, 0, 0, None)]
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = executor.map(_read_chunk, chunks)
+
+            header, stanzas = next(results)
+            ontology = self._build_header(header)
+            for stanza in stanzas:
+                ontology.add_stanza(stanza)
+
+            for _, stanzas in results:
+                for stanza in stanzas:
+                    ontology.add_stanza(stanza)
+
+        return ontology
+
+
+class _BlockParser(object):
+    """
+    Groups the lines of an OBO file into blocks of tag-value pairs, the state machine of both
+    :meth:`OBOReader._iter_blocks` and :class:`OBOPushParser`.
+
+    Lines may be fed in any number of parts. A tag-value pair that continues on the next line is kept until its last
+    line has been fed; each line is scanned for escapes once and the pair is tokenized when it is complete.
+    """
+
+    def __init__(self, reader, default_namespace=None):
+        self.reader = reader
+        self._tokenize = reader._tokenize if reader.fast_tokenizer else reader._tokenize_escaped
+        self._decode_value = reader._value_decoder()
+        self._default_namespace = default_namespace
+        self._header = True
+        self._stanza = None
+        self._tag_value_pairs = []
+        self._skip = False
+        self._tags = None  # the selected tags; all tags of the header are read
+        self._continued = None  # lines of a tag-value pair that continues on the next line
+        self._quote = False  # whether the continued lines end within quotes
+
+    def feed(self, lines):
+        """
+        Parses `lines` and yields each block that they complete.
+        """
+        tokenize = self._tokenize
+        decode_value = self._decode_value
+        intern = self.reader._intern
+        tag_value_pairs, skip, tags = self._tag_value_pairs, self._skip, self._tags
+
+        for line in lines:
+            line = line.strip()
+
+            if self._continued is not None:
+                self._continue(line)
+            elif line.startswith('['):
                 # stanza
                 match = RE_STANZA.match(line)
                 if not match:
                     raise ValueError("Bad stanza tag format")
 
-                if stanza is not None:
-                    stanzas.append((stanza, tag_value_pairs))
-                else:
-                    header = tag_value_pairs
-
-                stanza = match.group('stanza')
-                tag_value_pairs = []
+                block = self._end_block()
+                self._start_block(match.group('stanza'))
+                tag_value_pairs, skip, tags = self._tag_value_pairs, self._skip, self._tags
+                if block is not None:
+                    yield block
+            elif skip:
+                # a stanza that is not read; only line continuations matter
+                if '\\' in line:
+                    self._continue(line, first=True)
             elif line.startswith('!'):
                 # skip comments
                 pass
             elif not line:
                 # empty line. ignore
                 pass
+            elif tags is not None and _unselected_tag(line, tags):
+                # a tag that is not read; its value is neither tokenized nor decoded
+                pass
+            elif '\\' in line:
+                # may continue on the next line
+                self._continue(line, first=True)
             else:
                 # tag-value pair
+                tag, value = tokenize(line, None)  # without a backslash the line cannot continue
 
-                # 1. strip unescaped '!'s.
-                # 2. if line ends with '\', read next line, then continue with #1
-                # 3. split at first unescaped ':' and ignore everything from first unescaped '{' or '!'
-
-                tag, value = None, None
-                part = ''
-                escape, quote = False, False
-
-                while True:
-                    for char in line:
-                        if escape:
-                            part += char
-                            escape = False
-                        elif char == '\\':
-                            part += char
-                            escape = True
-                        elif not tag and char == ':':
-                            tag = part
-                            part = ''
-                        elif char == '!':  # and not quote? OBO Spec is not very specific on all of this.
-                            break  # comment
-                        elif char == '{' and not quote:
-                            break  # trailing modifier
-                        else:
-                            if char == '"':
-                                quote = not quote
-                            part += char
-                    if escape:
-                        try:
-                            line = next(lines).strip()
-                        except StopIteration:
-                            raise ParseException("Unterminated tag-value pair at end of file.", line)
-                    else:
-                        break
-
-                #if quote:
-                #    raise ParseException("Unterminated quote in tag-value pair", line, tag, value)
-
-                if tag is not None:
-                    value = part.strip()
-                else:
+                if tag is None:
                     raise ParseException('Tag without value', line)
 
-                if tag in BOOLEAN_TAG_NAMES:
-                    if value not in ('true', 'false'):
-                        raise ParseException('Tag must be one of "true", "false"', line)
-                    value = value == 'true'
-#
-
-                # if tag in ('union_of', 'disjoint_from'):
-                # target is tag id
-
-                elif tag == 'intersection_of':
-                    match = RE_RELATIONSHIP.match(value)
-
-                    if match:
-                        value = Relationship(self._unescape(match.group('type')),
-                                             self._unescape(match.group('target_term')))
-                    # else:
-                    #     pass  # target is tag id
-                elif tag == 'relationship':
-                    match = RE_RELATIONSHIP.match(value)
-
-                    if match:
-                        value = Relationship(self._unescape(match.group('type')),
-                                             self._unescape(match.group('target_term')))
-                    else:
-                        raise ParseException("Malformatted 'relationship'", value)
-                elif tag == 'xref':
-                    match = RE_XREF_DEFINITION.match(value)
-
-                    if match:
-                        value = XRef(self._unescape(match.group('name')),
-                                     self._unescape(match.group('description') or '') or None)
-                    else:
-                        raise ParseException("Malformatted 'xref'", value)
-                elif tag == 'def':
-                    match = RE_DESCRIPTION_XREFS.match(value)
-
-                    if match:
-                        description = match.group('description')
-                        xrefs_value = match.group('xrefs')
-                        xrefs = []
-
-                        xref_match = RE_XREF_DEFINITION_ITEM.match(xrefs_value)
-                        while xref_match:
-                            pos = xref_match.end(1)
-                            xrefs.append(XRef(self._unescape(xref_match.group('name')),
-                                              self._unescape(xref_match.group('description') or '') or None))
-
-                            if pos == len(xrefs_value):
-                                break
-
-                            comma_match = RE_XREF_DEFINITION_DIVIDER.match(xrefs_value, pos)
-
-                            if not comma_match:
-                                raise ParseException("Malformatted 'def'", value)
-
-                            pos = comma_match.end(0)
-                            xref_match = RE_XREF_DEFINITION_ITEM.match(xrefs_value, pos)
-
-                        value = Definition(description, *xrefs)
-                    else:
-                        raise ParseException("Malformatted 'def'", value)
-
-                tag_value_pairs.append((tag, value))
-
-        if stanza is not None:
-            stanzas.append((stanza, tag_value_pairs))
-        else:
-            header = tag_value_pairs
-
-        ontology = Ontology()
+                if tags is not None and tag not in tags:
+                    continue
 
-        for name, value in header:
-            if name == 'subsetdef':
-                match = RE_NAME_DESCRIPTION.match(value)
-
-                if match:
-                    value = TermSubset(self._unescape(match.group('name')), self._unescape(match.group('description')))
-                else:
-                    raise ParseException("Malformatted 'subsetdef'", value)
-            elif name == 'synonymtypedef':
+                tag = intern(tag)
+                tag_value_pairs.append((tag, decode_value(tag, value.strip())))
 
-                match = RE_SYNONYM_TYPEDEF.match(value)
-
-                if match:
-                    scope = match.group('scope')
-                    value = SynonymType(self._unescape(match.group('name')),
-                                        self._unescape(match.group('description')),
-                                        scope=SynonymScope[scope] if scope else None)
-                else:
-                    raise ParseException("Malformatted 'synonymtypedef'", value)
-
-            ontology.add_tag(name, value)
-
-        for stanza, tags in stanzas:
-            tags_dict = defaultdict(list)
-            for name, value in tags:
-                tags_dict[name].append(value)
-
-            if stanza == 'Term':
-                ontology.terms.add(Term(**tags_dict))
-
-                # TODO attach subset.
-            elif stanza == 'Typedef':
-                ontology.typedefs.add(Typedef(**tags_dict))
-            elif stanza == 'Instance':
-                ontology.instances.add(Instance(**tags_dict))
+    def _continue(self, line, first=False):
+        if first:
+            escape, self._quote = _scan_escapes(line)
+            lines = [line]
+        else:
+            escape, self._quote = _scan_escapes(line, True, self._quote)
+            lines = self._continued
+            lines.append(line)
+
+        if escape:
+            self._continued = lines
+            return
+        self._continued = None
+
+        tag, value = self._tokenize(lines[0], iter(lines[1:]))
+        if self._skip:
+            return
+        if tag is None:
+            raise ParseException('Tag without value', lines[0])
+        if self._tags is not None and tag not in self._tags:
+            return
+
+        tag = self.reader._intern(tag)
+        self._tag_value_pairs.append((tag, self._decode_value(tag, value.strip())))
+
+    def _start_block(self, stanza):
+        stanza_types = self.reader.stanza_types
+        self._stanza = stanza
+        self._tag_value_pairs = []
+        self._skip = stanza_types is not None and stanza not in stanza_types
+
+    def _end_block(self):
+        # the block that has ended if it is selected, or None
+        reader = self.reader
+        if self._header:
+            self._header = False
+            self._default_namespace = reader._default_namespace(self._tag_value_pairs) or self._default_namespace
+            self._tags = reader.tags
+            return None, self._tag_value_pairs
+        elif not self._skip and reader._selected(self._stanza, self._tag_value_pairs, self._default_namespace):
+            return self._stanza, self._tag_value_pairs
+        return None
+
+    def close(self):
+        """
+        Yields the last block once all lines have been fed.
+        """
+        if self._continued is not None:
+            raise ParseException("Unterminated tag-value pair at end of file.", self._continued[-1])
+        block = self._end_block()
+        if block is not None:
+            yield block
+
+
+class OBOPushParser(object):
+    """
+    An incremental OBO parser that is fed the file in chunks of any size.
+
+    Items are produced in the same order as by :meth:`OBOReader.iter_stanzas`: first an :class:`Ontology` with the
+    header tags, then each stanza once it is complete. Each item is passed to `callback` or, if there is no callback,
+    appended to :attr:`events`, a :class:`collections.deque`.
+
+    :param reader: the :class:`OBOReader` used to decode values and build stanzas.
+    :param encoding: used to decode chunks given as bytes.
+    """
+
+    def __init__(self, callback=None, reader=None, encoding='utf-8'):
+        self.reader = reader or OBOReader()
+        self.callback = callback
+        self.events = deque()
+
+        self._blocks = _BlockParser(self.reader)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = []  # the parts of the last line, which is not complete yet
+
+    def feed(self, chunk):
+        """
+        Parses the next chunk of the file, a `str` or `bytes`.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        if not RE_NEWLINE.search(chunk):
+            # the line goes on; its parts are joined once it is complete
+            self._buffer.append(chunk)
+            return
+        self._buffer.append(chunk)
+        text = ''.join(self._buffer)
+
+        # a '\r' at the end may be the first half of a '\r\n'
+        tail = ''
+        if text.endswith('\r'):
+            text, tail = text[:-1], '\r'
+
+        lines = RE_NEWLINE.split(text)
+        self._buffer = [lines.pop() + tail]
+        self._emit(self._blocks.feed(lines))
+
+    def close(self):
+        """
+        Parses the rest of the file and produces the last stanza.
+        """
+        text = ''.join(self._buffer) + self._decoder.decode(b'', final=True)
+        self._buffer = []
+        self._emit(self._blocks.feed(RE_NEWLINE.split(text)))
+        self._emit(self._blocks.close())
+
+    def _emit(self, blocks):
+        for stanza, tag_value_pairs in blocks:
+            if stanza is None:
+                item = self.reader._build_header(tag_value_pairs)
             else:
-                # Parsers/serializers round-trip (successfully load and save) unrecognized stanzas.
-                self.unrecognized_stanzas.append(Stanza(stanza, **tags_dict))
+                item = self.reader._build_stanza(stanza, tag_value_pairs)
 
-        return ontology
+            if self.callback is None:
+                self.events.append(item)
+            else:
+                self.callback(item)
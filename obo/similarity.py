@@ -0,0 +1,184 @@
+"""
+Semantic similarity of terms and term sets based on information content. Requires NumPy.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from obo.arrays import np
+from obo.graph import IS_A
+
+METHODS = ('resnik', 'lin', 'jaccard')
+
+_worker_state = None
+
+
+def _init_worker(scores, columns, combine):
+    global _worker_state
+    _worker_state = scores, columns, combine
+
+
+def _similarity_rows(rows):
+    scores, columns, combine = _worker_state
+    return SemanticSimilarity._rows(scores, columns, rows, combine)
+
+
+def _combine(scores, combine):
+    if combine == 'bma':
+        return (scores.max(axis=1).mean() + scores.max(axis=0).mean()) / 2
+    elif combine == 'max':
+        return scores.max()
+    elif combine == 'avg':
+        return scores.mean()
+    raise ValueError('Unknown combination: {}'.format(combine))
+
+
+class SemanticSimilarity(object):
+    """
+    Similarity of terms over the `relations` of an ontology, usually the ``is_a`` hierarchy.
+
+    The information content (IC) of a term is ``-log(p)``, where `p` is the share of annotations that are to the
+    term or its descendants (see :meth:`obo.arrays.GraphArrays.information_content`). Terms are compared by:
+
+    - ``'resnik'``: the IC of their most informative common ancestor (MICA);
+    - ``'lin'``: the IC of the MICA relative to the average IC of the two terms;
+    - ``'jaccard'``: the number of common ancestors relative to the number of ancestors of either term.
+
+    Ancestors of a term include the term itself.
+
+    :param counts: a mapping of term ids to annotation counts. If ``None``, each term counts once.
+    """
+
+    def __init__(self, ontology, counts=None, relations=(IS_A,)):
+        self.arrays = arrays = ontology.arrays()
+        if relations is None:
+            relations = arrays.relations
+        self.relations = (relations,) if isinstance(relations, str) else tuple(relations)
+
+        ic = arrays.information_content(counts, self.relations)
+        # terms without annotations only have ancestors and descendants without annotations; they are similar to none
+        self.information_content = np.where(np.isfinite(ic), ic, 0.0)
+        self._indptr, self._indices = arrays._closure(self.relations)
+        self._mica = {}
+
+    def _ancestors(self, node):
+        ancestors = self._indices[self._indptr[node]:self._indptr[node + 1]]
+        return np.union1d(ancestors, [node])
+
+    def mica(self, a, b):
+        """
+        Returns the id of the most informative common ancestor of the terms `a` and `b`, or ``None`` if they have
+        no common ancestor.
+        """
+        node_a, node_b = self.arrays.nodes((a, b))
+        key = (node_a, node_b) if node_a <= node_b else (node_b, node_a)
+        try:
+            mica = self._mica[key]
+        except KeyError:
+            common = np.intersect1d(self._ancestors(node_a), self._ancestors(node_b), assume_unique=True)
+            mica = self._mica[key] = common[np.argmax(self.information_content[common])] if len(common) else None
+        return None if mica is None else self.arrays.ids[mica]
+
+    def similarity(self, a, b, method='resnik'):
+        """
+        Returns the similarity of the terms `a` and `b`.
+        """
+        return self.pairwise([a], [b], method)[0, 0]
+
+    def pairwise(self, ids_a, ids_b, method='resnik'):
+        """
+        Returns the similarity of every term in `ids_a` to every term in `ids_b` as an array of shape
+        ``(len(ids_a), len(ids_b))``.
+        """
+        if method not in METHODS:
+            raise ValueError('Unknown similarity method: {}'.format(method))
+
+        mask_a = self.arrays.ancestor_mask(ids_a, self.relations)
+        mask_b = self.arrays.ancestor_mask(ids_b, self.relations)
+        sizes_a, sizes_b = mask_a.sum(axis=1), mask_b.sum(axis=1)
+        # beyond the sizes, only nodes that are ancestors on both sides matter
+        columns = np.flatnonzero(mask_a.any(axis=0) & mask_b.any(axis=0))
+        mask_a, mask_b = mask_a[:, columns], mask_b[:, columns]
+
+        if method == 'jaccard':
+            # counts of common ancestors; floating point so that the product is done by BLAS, and exact
+            common = mask_a.astype(np.float64) @ mask_b.T.astype(np.float64)
+            either = sizes_a[:, None] + sizes_b[None, :] - common
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(either > 0, common / either, 0.0)
+
+        # each common ancestor sets the score of the pairs of terms below it, in order of IC so that the MICA is set
+        # last; this takes time in the number of such pairs rather than in the number of pairs times ancestors
+        ic = self.information_content[columns]
+        resnik = np.zeros((len(ids_a), len(ids_b)))
+        for column in np.argsort(ic, kind='stable'):
+            if ic[column] > 0:
+                rows_a, rows_b = np.flatnonzero(mask_a[:, column]), np.flatnonzero(mask_b[:, column])
+                resnik[np.ix_(rows_a, rows_b)] = ic[column]
+        if method == 'resnik':
+            return resnik
+
+        ic_a = self.information_content[self.arrays.nodes(ids_a)]
+        ic_b = self.information_content[self.arrays.nodes(ids_b)]
+        total = ic_a[:, None] + ic_b[None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, 2 * resnik / total, 0.0)
+
+    def term_set_similarity(self, ids_a, ids_b, method='resnik', combine='bma'):
+        """
+        Returns the similarity of two sets of terms, from the similarities of their terms combined by:
+
+        - ``'bma'``: the average of the best match of each term in either set;
+        - ``'max'``: the best match between any two terms;
+        - ``'avg'``: the average over all pairs of terms.
+        """
+        ids_a, ids_b = list(ids_a), list(ids_b)
+        if not ids_a or not ids_b:
+            return 0.0
+
+        return _combine(self.pairwise(ids_a, ids_b, method), combine)
+
+    def _term_scores(self, term_sets, method):
+        """
+        Returns the similarity of every pair of terms in `term_sets`, computed once from a single ancestor mask, and
+        for each set the positions of its terms in that matrix.
+        """
+        terms = sorted(set(id_ for ids in term_sets for id_ in ids))
+        position = {id_: i for i, id_ in enumerate(terms)}
+        columns = [np.array([position[id_] for id_ in ids], dtype=np.intp) for ids in term_sets]
+        return self.pairwise(terms, terms, method), columns
+
+    @staticmethod
+    def _rows(scores, columns, rows, combine):
+        # the upper triangle of each row; the similarity of term sets is symmetric
+        result = []
+        for i in rows:
+            if not len(columns[i]):
+                result.append([0.0] * (len(columns) - i))
+                continue
+            row = scores[columns[i]]
+            result.append([_combine(row[:, columns[j]], combine) if len(columns[j]) else 0.0
+                           for j in range(i, len(columns))])
+        return result
+
+    def all_vs_all(self, term_sets, method='resnik', combine='bma', processes=None, chunk_size=16):
+        """
+        Returns the similarity of each pair of term sets in the list `term_sets` as a square array.
+
+        :param processes: if set, rows are computed in chunks of `chunk_size` by a pool of this many processes.
+        """
+        term_sets = [list(ids) for ids in term_sets]
+        scores, columns = self._term_scores(term_sets, method)
+        chunks = [range(start, min(start + chunk_size, len(term_sets)))
+                  for start in range(0, len(term_sets), chunk_size)]
+
+        if processes:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(scores, columns, combine)) as executor:
+                rows = [row for chunk in executor.map(_similarity_rows, chunks) for row in chunk]
+        else:
+            rows = [row for chunk in chunks for row in self._rows(scores, columns, chunk, combine)]
+
+        result = np.zeros((len(term_sets), len(term_sets)))
+        for i, row in enumerate(rows):
+            result[i, i:] = row
+            result[i:, i] = row
+        return result
@@ -0,0 +1,211 @@
+"""
+A binary snapshot format for parsed ontologies.
+
+Snapshots are written with :mod:`marshal`, so they load much faster than an OBO file parses. They are meant as a
+cache: a snapshot is only readable by the Python version that wrote it.
+"""
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import tempfile
+from collections import defaultdict
+
+from obo import Ontology, BUILT_IN_TYPEDEFS, XRef, Definition, TermSubset, SynonymType, SynonymScope
+from obo.stanzas import Stanza, Term, CompactTerm, Typedef, Instance, Relationship, PropertyValue
+
+MAGIC = b'OBOSNAP1' + bytes(sys.version_info[:2])
+
+STANZA_CLASSES = {
+    'Term': Term,
+    'CompactTerm': CompactTerm,
+    'Typedef': Typedef,
+    'Instance': Instance,
+}
+
+
+def _encode_value(value):
+    # plain values are stored as they are; everything else becomes a tuple starting with a type code
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    elif isinstance(value, XRef):
+        return 'x', value.name, value.description
+    elif isinstance(value, Definition):
+        return 'd', value.description, tuple((xref.name, xref.description) for xref in value.xrefs)
+    elif isinstance(value, Relationship):
+        return 'r', value.type, value.target_term
+    elif isinstance(value, TermSubset):
+        return 's', value.name, value.description
+    elif isinstance(value, SynonymType):
+        return 'y', value.name, value.description, value.scope.name if value.scope else None
+    elif isinstance(value, PropertyValue):
+        return 'p', value.name, value.value, value.datatype
+    elif isinstance(value, Stanza):
+        return value.id
+    raise TypeError('Cannot encode tag value: {!r}'.format(value))
+
+
+def _decode_value(value):
+    if type(value) is not tuple:
+        return value
+
+    code = value[0]
+    if code == 'x':
+        return XRef(value[1], value[2])
+    elif code == 'd':
+        return Definition(value[1], *(XRef(name, description) for name, description in value[2]))
+    elif code == 'r':
+        return Relationship(value[1], value[2])
+    elif code == 's':
+        return TermSubset(value[1], value[2])
+    elif code == 'y':
+        return SynonymType(value[1], value[2], scope=SynonymScope[value[3]] if value[3] else None)
+    elif code == 'p':
+        return PropertyValue(value[1], value[2], value[3])
+    raise ValueError('Unknown value type in snapshot: {!r}'.format(code))
+
+
+def _encode_tags(obj):
+    return tuple((name, isinstance(values, set), tuple(_encode_value(value) for value in values))
+                 for name, values in obj.tags.items() if values)
+
+
+def _decode_tags(encoded):
+    tags = defaultdict(list)
+    for name, is_set, values in encoded:
+        if is_set:
+            tags[name] = set(_decode_value(value) for value in values)
+        else:
+            tags[name] = [_decode_value(value) for value in values]
+    return tags
+
+
+def _encode_stanza(stanza):
+    return stanza.__class__.__name__, stanza._stanza_name, _encode_tags(stanza)
+
+
+def _decode_stanza(encoded):
+    class_name, stanza_name, tags = encoded
+    cls = STANZA_CLASSES.get(class_name, Stanza)
+    stanza = cls.__new__(cls)
+    stanza.__setstate__((_decode_tags(tags), stanza_name))
+    return stanza
+
+
+def dump(ontology, fp, source_key=None):
+    """
+    Writes a snapshot of `ontology` to the binary file `fp`.
+
+    :param source_key: a marshallable value identifying the source of the ontology; see :func:`read_cached`.
+    """
+    stanzas = [_encode_stanza(stanza) for stanza in ontology.typedefs
+               if not any(stanza is typedef for typedef in BUILT_IN_TYPEDEFS)]
+    stanzas.extend(_encode_stanza(stanza) for stanza in ontology.terms)
+    stanzas.extend(_encode_stanza(stanza) for stanza in ontology.instances)
+    stanzas.extend(_encode_stanza(stanza) for stanza in ontology.unrecognized_stanzas)
+
+    _write_source_key(fp, source_key)
+    fp.write(marshal.dumps((_encode_tags(ontology), stanzas)))
+
+
+def _write_source_key(fp, source_key):
+    source_key = marshal.dumps(source_key)
+    fp.write(MAGIC)
+    fp.write(struct.pack('<Q', len(source_key)))
+    fp.write(source_key)
+
+
+def _read_source_key(fp):
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not an OBO snapshot, or written by a different Python version')
+    size, = struct.unpack('<Q', fp.read(8))
+    return marshal.loads(fp.read(size))
+
+
+def load(fp):
+    """
+    Reads an ontology from a snapshot in the binary file `fp`.
+    """
+    _read_source_key(fp)
+    return _load_ontology(fp)
+
+
+def _load_ontology(fp):
+    # marshal.load() reads file objects in small pieces; loading from one bytes object is much faster
+    return _loads_ontology(fp.read())
+
+
+def _loads_ontology(data):
+    header, stanzas = marshal.loads(data)
+
+    ontology = Ontology()
+    ontology.tags = _decode_tags(header)
+    for encoded in stanzas:
+        ontology.add_stanza(_decode_stanza(encoded))
+    return ontology
+
+
+def _file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def default_cache_dir():
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'obo')
+
+
+def read_cached(path, cache_dir=None):
+    """
+    Reads the OBO file at `path` through a snapshot cache.
+
+    Snapshots are stored in `cache_dir` and keyed by the modification time, size and SHA-256 hash of the source
+    file. A snapshot is used if the modification time and size are unchanged, or else if the hash is unchanged, in
+    which case the new modification time and size are stored with it. Any other snapshot is replaced after parsing
+    the source file.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    path = os.path.abspath(path)
+    cache_path = os.path.join(cache_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.snapshot')
+
+    stat = os.stat(path)
+    file_hash = None
+    data = None
+
+    try:
+        with open(cache_path, 'rb') as fp:
+            mtime, size, cached_hash = _read_source_key(fp)
+            if (mtime, size) == (stat.st_mtime_ns, stat.st_size):
+                return _load_ontology(fp)
+            file_hash = _file_hash(path)
+            if cached_hash == file_hash:
+                data = fp.read()
+                ontology = _loads_ontology(data)
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        data = None
+
+    source_key = (stat.st_mtime_ns, stat.st_size, file_hash or _file_hash(path))
+    if data is not None:
+        # the snapshot is unchanged; only the key is updated so that the next read need not hash the file again
+        def write(fp):
+            _write_source_key(fp, source_key)
+            fp.write(data)
+    else:
+        ontology = Ontology.read(path)
+
+        def write(fp):
+            dump(ontology, fp, source_key=source_key)
+
+    _replace(cache_dir, cache_path, write)
+    return ontology
+
+
+def _replace(cache_dir, cache_path, write):
+    # writes a new snapshot next to the old one and then replaces it, so that readers never see a partial snapshot
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=cache_dir, delete=False) as fp:
+        write(fp)
+    os.replace(fp.name, cache_path)
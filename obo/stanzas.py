@@ -1,4 +1,54 @@
+import weakref
 from collections import defaultdict
+from collections.abc import MutableMapping, MutableSet
+
+# tags that are indexed by a StanzaSet
+INDEXED_TAG_NAMES = frozenset(('id', 'name', 'alt_id', 'synonym'))
+
+
+# tag name -> function that decodes a raw value of the tag; filled in by obo.reader
+LAZY_DECODERS = {}
+
+
+class LazyValue(str):
+    """
+    The raw text of a tag value that is decoded on first access. See :class:`LazyTags`.
+
+    The text is all that is kept; the decoder is looked up in :data:`LAZY_DECODERS` by the name of the tag.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, str.__repr__(self))
+
+
+class LazyTags(defaultdict):
+    """
+    A mapping of tag names to values, like the ``defaultdict(list)`` of :class:`Object`, in which the values of a tag
+    may be :class:`LazyValue` objects. All values of a tag are decoded in place the first time the tag is accessed.
+    """
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super(LazyTags, self).__init__(*(args or (list,)))
+
+    def __getitem__(self, name):
+        values = super(LazyTags, self).__getitem__(name)
+        if type(values) is list and values and type(values[0]) is LazyValue:
+            decode = LAZY_DECODERS[name]
+            values[:] = [decode(value) if type(value) is LazyValue else value for value in values]
+        return values
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def values(self):
+        return [self[name] for name in self]
 
 
 class TagValueSetProperty(object):
@@ -12,9 +62,9 @@ class TagValueSetProperty(object):
 
     def __set__(self, stanza, value):
         if isinstance(value, set):
-            stanza.tags[self.name] = value
+            stanza._set_tag(self.name, value)
         else:
-            stanza.tags[self.name] = set(value)
+            stanza._set_tag(self.name, set(value))
 
 
 class TagValueProperty(object):
@@ -31,7 +81,7 @@ class TagValueProperty(object):
             return self.default
 
     def __set__(self, stanza, value):
-        stanza._tags[self.name] = [value]
+        stanza._set_tag(self.name, [value])
 
 
 class ForbiddenTagProperty(object):
@@ -64,10 +114,16 @@ class Object(object):
                 tags[name].append(value)
 
     def add_tag(self, name, value):
-        if isinstance(self.tags[name], set):
-            self.tags[name].add(value)
+        values = self.tags[name]
+        if isinstance(values, set):
+            values.add(value)
+        elif isinstance(values, list):
+            values.append(value)
         else:
-            self.tags[name].append(value)
+            self.tags[name] = tuple(values) + (value,)
+
+    def _set_tag(self, name, values):
+        self.tags[name] = values
 
     @staticmethod
     def _format_tag_group(name, values):
@@ -88,7 +144,7 @@ class Object(object):
 
 
 class Stanza(Object):
-    __slots__ = ('_stanza_name',)
+    __slots__ = ('_stanza_name', '_stanza_sets')
 
     id = TagValueProperty('id')
     name = TagValueProperty('name')
@@ -114,6 +170,52 @@ class Stanza(Object):
     def __init__(self, stanza_name, id=None, **kwargs):
         super(Stanza, self).__init__(id=id, **kwargs)
         self._stanza_name = stanza_name
+        self._stanza_sets = ()
+
+    def __getstate__(self):
+        return self.tags, self._stanza_name
+
+    def __setstate__(self, state):
+        self.tags, self._stanza_name = state
+        self._stanza_sets = ()
+
+    def _register(self, stanza_set):
+        # weak references without a callback are shared by all stanzas of a set
+        self._stanza_sets = tuple(ref for ref in self._stanza_sets if ref() is not None) + (weakref.ref(stanza_set),)
+
+    def _unregister(self, stanza_set):
+        self._stanza_sets = tuple(ref for ref in self._stanza_sets if ref() is not None and ref() is not stanza_set)
+
+    def _live_stanza_sets(self):
+        if not self._stanza_sets:
+            return ()
+        return [stanza_set for stanza_set in (ref() for ref in self._stanza_sets) if stanza_set is not None]
+
+    def add_tag(self, name, value):
+        stanza_sets = self._live_stanza_sets()
+        if name in INDEXED_TAG_NAMES:
+            for stanza_set in stanza_sets:
+                stanza_set._unindex(self)
+            super(Stanza, self).add_tag(name, value)
+            for stanza_set in stanza_sets:
+                stanza_set._index(self)
+        else:
+            super(Stanza, self).add_tag(name, value)
+            for stanza_set in stanza_sets:
+                stanza_set._touch()
+
+    def _set_tag(self, name, values):
+        stanza_sets = self._live_stanza_sets()
+        if name in INDEXED_TAG_NAMES:
+            for stanza_set in stanza_sets:
+                stanza_set._unindex(self)
+            super(Stanza, self)._set_tag(name, values)
+            for stanza_set in stanza_sets:
+                stanza_set._index(self)
+        else:
+            super(Stanza, self)._set_tag(name, values)
+            for stanza_set in stanza_sets:
+                stanza_set._touch()
 
     def __hash__(self):
         return hash(self.id)
@@ -131,16 +233,37 @@ class Stanza(Object):
 
 
 class Relationship(object):
+    """
+    Relationships are immutable and hashable, so that equal relationships can be shared.
+    """
     __slots__ = ('type', 'target_term')
 
     def __init__(self, type_, target_term):
-        self.type = type_
-        self.target_term = target_term
+        object.__setattr__(self, 'type', type_)
+        object.__setattr__(self, 'target_term', target_term)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'{}' object is immutable".format(self.__class__.__name__))
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return self.__class__, (self.type, self.target_term)
+
+    def __eq__(self, other):
+        return self.__class__ is other.__class__ and \
+            self.type == other.type and \
+            self.target_term == other.target_term
+
+    def __hash__(self):
+        return hash((self.type, self.target_term))
 
     def __repr__(self):
         return '<Relationship {} {}>'.format(self.type, self.target_term)
 
 class Term(Stanza):
+    __slots__ = ()
+
     _tag_order = (
         'id',
         'is_anonymous',
@@ -173,7 +296,193 @@ class Term(Stanza):
         else:
             return '<Term {}>'.format(self.id)
 
+
+_MISSING = object()
+
+
+class CompactTags(MutableMapping):
+    """
+    A compact mapping of tag names to values, used in place of the ``defaultdict(list)`` of a :class:`CompactTerm`.
+
+    The single values of the most common tags are kept in fixed slots. All other values are kept in tuples, or in a
+    set if one was assigned. Like the ``defaultdict``, looking up a missing tag returns an empty sequence, but it does
+    not add the tag.
+    """
+    __slots__ = ('_id', '_name', '_namespace', '_def', '_is_obsolete', '_other')
+
+    _slots = {
+        'id': '_id',
+        'name': '_name',
+        'namespace': '_namespace',
+        'def': '_def',
+        'is_obsolete': '_is_obsolete',
+    }
+
+    def __init__(self, tags=()):
+        self._id = self._name = self._namespace = self._def = self._is_obsolete = _MISSING
+        self._other = None
+        for name, values in dict(tags).items():
+            self[name] = values
+
+    def __getitem__(self, name):
+        slot = self._slots.get(name)
+        if slot is not None:
+            value = getattr(self, slot)
+            if value is not _MISSING:
+                return value,
+        if self._other is not None and name in self._other:
+            return self._other[name]
+        return ()
+
+    def __setitem__(self, name, values):
+        if not isinstance(values, (set, tuple)):
+            values = tuple(values)
+
+        slot = self._slots.get(name)
+        if slot is not None:
+            if type(values) is tuple and len(values) == 1:
+                setattr(self, slot, values[0])
+                if self._other is not None:
+                    self._other.pop(name, None)
+                return
+            setattr(self, slot, _MISSING)
+
+        if values:
+            if self._other is None:
+                self._other = {}
+            self._other[name] = values
+        elif self._other is not None:
+            self._other.pop(name, None)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self[name] = ()
+
+    def __contains__(self, name):
+        slot = self._slots.get(name)
+        if slot is not None and getattr(self, slot) is not _MISSING:
+            return True
+        return self._other is not None and name in self._other
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def __iter__(self):
+        for name, slot in self._slots.items():
+            if getattr(self, slot) is not _MISSING:
+                yield name
+        if self._other is not None:
+            yield from self._other
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self.items()),)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, dict(self.items()))
+
+
+class CompactTagValues(MutableSet):
+    """
+    The values of a tag of a :class:`CompactTerm`, as returned by its tag descriptors such as ``term.is_a``.
+
+    Changes are written through to the tags of the term by replacing the tuple or set of values, so the indexes of
+    the stanza sets that hold the term are kept up to date. Values can be indexed like the list of a :class:`Term`.
+    """
+    __slots__ = ('_stanza', '_name')
+
+    def __init__(self, stanza, name):
+        self._stanza = stanza
+        self._name = name
+
+    def _values(self):
+        return self._stanza.tags[self._name]
+
+    def __contains__(self, value):
+        return value in self._values()
+
+    def __iter__(self):
+        return iter(self._values())
+
+    def __len__(self):
+        return len(self._values())
+
+    def __getitem__(self, index):
+        values = self._values()
+        if isinstance(values, set):
+            values = list(values)
+        return values[index]
+
+    def add(self, value):
+        values = self._values()
+        if value not in values:
+            self.append(value)
+
+    def append(self, value):
+        values = self._values()
+        if isinstance(values, set):
+            self._stanza._set_tag(self._name, values | {value})
+        else:
+            self._stanza._set_tag(self._name, tuple(values) + (value,))
+
+    def discard(self, value):
+        values = self._values()
+        if value in values:
+            if isinstance(values, set):
+                self._stanza._set_tag(self._name, values - {value})
+            else:
+                self._stanza._set_tag(self._name, tuple(item for item in values if item != value))
+
+    def __eq__(self, other):
+        if isinstance(other, CompactTagValues):
+            other = other._values()
+        return self._values() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._values())
+
+
+class CompactTagValueSetProperty(TagValueSetProperty):
+    __slots__ = ()
+
+    def __get__(self, stanza, owner):
+        return CompactTagValues(stanza, self.name)
+
+
+class CompactTerm(Term):
+    """
+    A :class:`Term` that stores its tags in :class:`CompactTags`, which uses considerably less memory than the
+    default layout. Tag values are tuples or sets; the tag descriptors return :class:`CompactTagValues`, through
+    which values can be changed in place.
+    """
+    __slots__ = ()
+
+    def __init__(self, id, **kwargs):
+        super(CompactTerm, self).__init__(id, **kwargs)
+        self.tags = CompactTags(self.tags)
+
+    def __setstate__(self, state):
+        super(CompactTerm, self).__setstate__(state)
+        self.tags = CompactTags(self.tags)
+
+
+for _cls in reversed(Term.__mro__):
+    for _name, _value in list(vars(_cls).items()):
+        if type(_value) is TagValueSetProperty:
+            setattr(CompactTerm, _name, CompactTagValueSetProperty(_value.name))
+del _cls, _name, _value
+
+
 class Typedef(Stanza):
+    __slots__ = ()
+
     _tag_order = (
         'id',
         'is_anonymous',
@@ -231,6 +540,8 @@ class PropertyValue(object):
 
 
 class Instance(Stanza):
+    __slots__ = ()
+
     _tag_order = (
         'id',
         'is_anonymous',
@@ -0,0 +1,395 @@
+"""
+A persistent ontology in a SQLite database.
+
+:meth:`SQLiteOntology.create` writes an ontology to a database file once. Any number of processes can then open the
+file and query it without parsing OBO: stanzas are kept as OBO text and parsed when they are accessed, and names,
+alt_ids, synonyms, xrefs and the edges of the term graph are held in indexed tables.
+
+Tables:
+
+- ``stanzas``: the type, id, name, namespace and OBO text of each stanza;
+- ``tags``: one row per tag value of each stanza, as text;
+- ``xrefs``: the xrefs of each stanza, from ``xref`` tags and definitions;
+- ``synonyms``: the text and scope of each synonym;
+- ``edges``: ``(child, relation, parent)`` for each ``is_a`` and ``relationship`` tag of a term.
+"""
+import io
+import os
+import queue
+import sqlite3
+import threading
+from collections.abc import Mapping, Set
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+from obo import BUILT_IN_TYPEDEFS, Ontology
+from obo.graph import IS_A
+from obo.reader import OBOReader
+from obo.stanzas import Relationship
+from obo.util import RE_SYNONYM
+from obo.writer import OBOWriter
+
+STORE_VERSION = 1
+
+SCHEMA = (
+    'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE stanzas (rowid INTEGER PRIMARY KEY, type TEXT NOT NULL, id TEXT, name TEXT, namespace TEXT, '
+    'text TEXT NOT NULL)',
+    'CREATE INDEX stanzas_type_id ON stanzas (type, id)',
+    'CREATE INDEX stanzas_type_name ON stanzas (type, name)',
+    'CREATE TABLE tags (stanza INTEGER NOT NULL REFERENCES stanzas, tag TEXT NOT NULL, value TEXT NOT NULL)',
+    'CREATE INDEX tags_stanza ON tags (stanza)',
+    'CREATE INDEX tags_tag_value ON tags (tag, value)',
+    'CREATE TABLE xrefs (stanza INTEGER NOT NULL REFERENCES stanzas, tag TEXT NOT NULL, name TEXT NOT NULL, '
+    'description TEXT)',
+    'CREATE INDEX xrefs_name ON xrefs (name)',
+    'CREATE TABLE synonyms (stanza INTEGER NOT NULL REFERENCES stanzas, text TEXT NOT NULL, scope TEXT)',
+    'CREATE INDEX synonyms_text ON synonyms (text)',
+    'CREATE TABLE edges (child TEXT NOT NULL, relation TEXT NOT NULL, parent TEXT NOT NULL)',
+    'CREATE INDEX edges_child ON edges (child, relation, parent)',
+    'CREATE INDEX edges_parent ON edges (parent, relation, child)',
+)
+
+TABLES = ('meta', 'stanzas', 'tags', 'xrefs', 'synonyms', 'edges')
+
+# the transitive closure of the edges from or to a term over some relations
+CLOSURE_QUERY = '''
+WITH RECURSIVE closure(id) AS (
+    SELECT {to} FROM edges WHERE {from} = ?{relations}
+    UNION
+    SELECT edges.{to} FROM edges JOIN closure ON edges.{from} = closure.id{relations}
+)
+SELECT id FROM closure
+'''
+
+
+def _value_text(value):
+    if isinstance(value, Relationship):
+        return '{} {}'.format(value.type, value.target_term)
+    elif value is True:
+        return 'true'
+    elif value is False:
+        return 'false'
+    return str(value)
+
+
+class ConnectionPool(object):
+    """
+    A pool of up to `size` SQLite connections that can be shared between threads. Each connection is used by one
+    thread at a time; a thread waits when all are in use.
+
+    Connections are opened read-only. After :meth:`close`, connections that are in use are closed as they are
+    returned.
+    """
+
+    def __init__(self, path, size=4):
+        self.uri = 'file:{}?mode=ro'.format(pathname2url(os.path.abspath(path)))
+        self.size = size
+        self._connections = queue.LifoQueue()
+        self._opened = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                opened = self._opened < self.size and not self._closed
+                if opened:
+                    self._opened += 1
+            connection = self._connect() if opened else self._connections.get()
+        if connection is None:
+            # closed; pass the marker on to the next waiting thread
+            self._connections.put(None)
+            raise sqlite3.ProgrammingError('Cannot use a closed connection pool.')
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                closed = self._closed
+            if closed:
+                connection.close()
+            else:
+                self._connections.put(connection)
+
+    def execute(self, sql, parameters=()):
+        """
+        Returns all rows of a query.
+        """
+        with self.connection() as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                connection = self._connections.get_nowait()
+            except queue.Empty:
+                break
+            if connection is not None:
+                connection.close()
+        self._connections.put(None)
+
+
+class SQLiteStanzaSet(Mapping, Set):
+    """
+    A read-only, :class:`obo.util.StanzaSet`-compatible view of the stanzas of one type in a :class:`SQLiteOntology`.
+
+    Like a `StanzaSet`, iterating yields stanzas in order of id. Use :meth:`ids` to iterate over ids without parsing
+    stanzas.
+    """
+    _version = 0
+
+    def __init__(self, ontology, stanza_type):
+        self._ontology = ontology
+        self._type = stanza_type
+        self._stanzas = {}
+        self._len = None
+
+    def _query(self, sql, parameters=()):
+        return self._ontology._pool.execute(sql, (self._type,) + tuple(parameters))
+
+    def _stanza(self, id_, text):
+        try:
+            return self._stanzas[id_]
+        except KeyError:
+            stanza = self._stanzas[id_] = self._ontology._parse_stanza(text)
+            return stanza
+
+    def _stanzas_where(self, condition, parameters=(), size=256):
+        # the ids are read first and the text of `size` stanzas at a time, each in its own query, so no connection
+        # is held while the stanzas are consumed
+        rows = self._query('SELECT rowid, id FROM stanzas WHERE type = ? AND {} ORDER BY id, rowid'.format(condition),
+                           parameters)
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            missing = [rowid for rowid, id_ in batch if id_ not in self._stanzas]
+            texts = {}
+            if missing:
+                texts.update(self._ontology._pool.execute(
+                    'SELECT rowid, text FROM stanzas WHERE rowid IN ({})'.format(', '.join('?' * len(missing))),
+                    missing))
+            for rowid, id_ in batch:
+                yield self._stanza(id_, texts.get(rowid))
+
+    def __getitem__(self, id_):
+        try:
+            return self._stanzas[id_]
+        except KeyError:
+            rows = self._query('SELECT text FROM stanzas WHERE type = ? AND id = ? ORDER BY rowid LIMIT 1', (id_,))
+            if not rows:
+                raise KeyError(id_)
+            return self._stanza(id_, rows[0][0])
+
+    def __contains__(self, id_):
+        return id_ in self._stanzas or bool(self._query('SELECT 1 FROM stanzas WHERE type = ? AND id = ?', (id_,)))
+
+    def __len__(self):
+        if self._len is None:
+            self._len = self._query('SELECT count(*) FROM stanzas WHERE type = ?')[0][0]
+        return self._len
+
+    def __iter__(self):
+        return self._stanzas_where('1')
+
+    def ids(self):
+        return iter([id_ for id_, in self._query('SELECT id FROM stanzas WHERE type = ? ORDER BY id')])
+
+    def range(self, start=None, stop=None):
+        """
+        Iterates over the stanzas with an id from `start` (inclusive) to `stop` (exclusive), in order of id.
+        """
+        conditions, parameters = ['1'], []
+        if start is not None:
+            conditions.append('id >= ?')
+            parameters.append(start)
+        if stop is not None:
+            conditions.append('id < ?')
+            parameters.append(stop)
+        return self._stanzas_where(' AND '.join(conditions), parameters)
+
+    def prefix(self, prefix):
+        """
+        Iterates over the stanzas with an id that starts with `prefix`, in order of id.
+        """
+        if not prefix:
+            return iter(self)
+        # text compares by code point, so the ids with the prefix are those below the prefix with its last
+        # character incremented
+        return self.range(prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+    def _first(self, sql, parameters, key):
+        rows = self._query(sql, parameters)
+        if not rows:
+            raise KeyError(key)
+        return self[rows[0][0]]
+
+    def by_name(self, name):
+        return self._first('SELECT id FROM stanzas WHERE type = ? AND name = ? ORDER BY rowid LIMIT 1', (name,), name)
+
+    def by_alt_id(self, alt_id):
+        return self._first('SELECT stanzas.id FROM tags JOIN stanzas ON tags.stanza = stanzas.rowid '
+                           'WHERE stanzas.type = ? AND tags.tag = \'alt_id\' AND tags.value = ? '
+                           'ORDER BY stanzas.rowid LIMIT 1', (alt_id,), alt_id)
+
+    def by_synonym(self, text):
+        rows = self._query('SELECT stanzas.id FROM synonyms JOIN stanzas ON synonyms.stanza = stanzas.rowid '
+                           'WHERE stanzas.type = ? AND synonyms.text = ? ORDER BY stanzas.rowid', (text,))
+        return [self[id_] for id_, in rows]
+
+    def by_xref(self, name):
+        """
+        Returns the stanzas with an xref, in an ``xref`` tag or a definition, with the name `name`.
+        """
+        rows = self._query('SELECT DISTINCT stanzas.id FROM xrefs JOIN stanzas ON xrefs.stanza = stanzas.rowid '
+                           'WHERE stanzas.type = ? AND xrefs.name = ? ORDER BY stanzas.id', (name,))
+        return [self[id_] for id_, in rows]
+
+
+class SQLiteOntology(Ontology):
+    """
+    An :class:`Ontology` whose `terms` and `instances` are read on demand from a SQLite database written by
+    :meth:`create`. Typedefs and unrecognized stanzas are few and read when the database is opened.
+
+    The ontology is read-only and can be shared between threads, which draw connections from a pool of `pool_size`
+    connections.
+    """
+
+    def __init__(self, path, pool_size=4, reader=None):
+        self._reader = reader or OBOReader()
+        self._pool = ConnectionPool(path, pool_size)
+
+        meta = dict(self._pool.execute('SELECT key, value FROM meta'))
+        if int(meta['version']) != STORE_VERSION:
+            raise ValueError('Unsupported store version: {}'.format(meta['version']))
+
+        header = self._reader._build_header(next(self._reader._iter_blocks(io.StringIO(meta['header'])))[1])
+        super(SQLiteOntology, self).__init__()
+        self.tags = header.tags
+
+        for text, in self._pool.execute('SELECT text FROM stanzas WHERE type NOT IN (\'Term\', \'Instance\') '
+                                        'ORDER BY rowid'):
+            self.add_stanza(self._parse_stanza(text))
+
+        self.terms = SQLiteStanzaSet(self, 'Term')
+        self.instances = SQLiteStanzaSet(self, 'Instance')
+
+    def _parse_stanza(self, text):
+        blocks = self._reader._iter_blocks(io.StringIO(text))
+        next(blocks)  # empty header
+        stanza, tag_value_pairs = next(blocks)
+        return self._reader._build_stanza(stanza, tag_value_pairs)
+
+    @classmethod
+    def create(cls, path, ontology, **kwargs):
+        """
+        Writes `ontology` to a database at `path`, replacing any ontology stored there before, and opens it. Keyword
+        arguments are passed to :class:`SQLiteOntology`.
+
+        All rows are inserted in a single transaction.
+        """
+        writer = OBOWriter()
+        names = writer._names(ontology)
+
+        header = writer._format_object(names, ontology)
+        built_in_typedefs = set(BUILT_IN_TYPEDEFS)
+        stanzas = [typedef for typedef in ontology.typedefs if typedef not in built_in_typedefs] + \
+            list(ontology.terms) + list(ontology.instances) + list(ontology.unrecognized_stanzas)
+
+        stanza_rows, tag_rows, xref_rows, synonym_rows, edge_rows = [], [], [], [], []
+        for rowid, stanza in enumerate(stanzas, 1):
+            tags = stanza.tags
+            namespace = tags.get('namespace')
+            stanza_rows.append((rowid, stanza._stanza_name, stanza.id, stanza.name,
+                                namespace[0] if namespace else None, writer._format_stanza(names, stanza)))
+
+            for name in tags:
+                for value in tags[name]:
+                    tag_rows.append((rowid, name, _value_text(value)))
+
+            for xref in tags.get('xref', ()):
+                xref_rows.append((rowid, 'xref', getattr(xref, 'name', xref), getattr(xref, 'description', None)))
+            for definition in tags.get('def', ()):
+                for xref in getattr(definition, 'xrefs', ()):
+                    xref_rows.append((rowid, 'def', xref.name, xref.description))
+            for synonym in tags.get('synonym', ()):
+                match = RE_SYNONYM.match(synonym)
+                if match:
+                    synonym_rows.append((rowid, match.group('text'), match.group('scope')))
+
+            if stanza._stanza_name == 'Term':
+                for parent in tags.get('is_a', ()):
+                    edge_rows.append((stanza.id, IS_A, getattr(parent, 'id', parent)))
+                for relationship in tags.get('relationship', ()):
+                    edge_rows.append((stanza.id, relationship.type,
+                                      getattr(relationship.target_term, 'id', relationship.target_term)))
+
+        connection = sqlite3.connect(path, isolation_level=None)
+        try:
+            connection.execute('BEGIN')
+            for table in TABLES:
+                connection.execute('DROP TABLE IF EXISTS {}'.format(table))
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.executemany('INSERT INTO meta VALUES (?, ?)',
+                                   [('version', str(STORE_VERSION)), ('header', header)])
+            connection.executemany('INSERT INTO stanzas VALUES (?, ?, ?, ?, ?, ?)', stanza_rows)
+            connection.executemany('INSERT INTO tags VALUES (?, ?, ?)', tag_rows)
+            connection.executemany('INSERT INTO xrefs VALUES (?, ?, ?, ?)', xref_rows)
+            connection.executemany('INSERT INTO synonyms VALUES (?, ?, ?)', synonym_rows)
+            connection.executemany('INSERT INTO edges VALUES (?, ?, ?)', edge_rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+
+        return cls(path, **kwargs)
+
+    def _closure(self, id_, relations, upward):
+        if id_ not in self.terms:
+            raise KeyError('No term with id: {}'.format(id_))
+
+        parameters = [id_]
+        condition = ''
+        if relations is not None:
+            relations = (relations,) if isinstance(relations, str) else tuple(relations)
+            condition = ' AND edges.relation IN ({})'.format(', '.join('?' * len(relations)))
+        sql = CLOSURE_QUERY.format(to='parent' if upward else 'child', relations=condition,
+                                   **{'from': 'child' if upward else 'parent'})
+        if relations is not None:
+            parameters = [id_] + list(relations) + list(relations)
+        return frozenset(ancestor for ancestor, in self._pool.execute(sql, parameters))
+
+    def ancestors(self, id_, relations=(IS_A,)):
+        """
+        Returns the ids of all terms that the term `id_` reaches through edges of `relations` (all if ``None``),
+        computed by a recursive query.
+
+        Unlike :meth:`obo.graph.OntologyGraph.ancestors`, every chain of the given relations counts, whether or not
+        the relations are transitive. For ``is_a`` alone the results are the same.
+        """
+        return self._closure(id_, relations, True)
+
+    def descendants(self, id_, relations=(IS_A,)):
+        """
+        Returns the ids of all terms that reach the term `id_` through edges of `relations` (all if ``None``). See
+        :meth:`ancestors`.
+        """
+        return self._closure(id_, relations, False)
+
+    def close(self):
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
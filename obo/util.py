@@ -1,25 +1,274 @@
-from collections import Mapping
-from collections import MutableSet
+import re
+from bisect import bisect_left
+from collections.abc import Mapping
+from collections.abc import MutableSet
+from itertools import chain, islice
+from operator import itemgetter
+
+RE_SYNONYM = re.compile(r'^"(?P<text>(?:[^"\\]|\\.)*)"( (?P<scope>EXACT|BROAD|NARROW|RELATED))?')
+
+
+def synonym_text(value):
+    """
+    Returns the text of a raw ``synonym`` tag value such as ``"G quartet" EXACT []``.
+    """
+    match = RE_SYNONYM.match(value)
+    if match:
+        return match.group('text')
+    return value
+
+
+class SortedItems(object):
+    """
+    Key-value pairs sorted by key, with unique keys. Pairs are kept in buckets of at most `load` pairs so that
+    inserting or removing a pair only moves the pairs of one bucket. Pairs added in order of key are appended to the
+    last bucket.
+    """
+
+    def __init__(self, items=(), load=1000):
+        self.load = load
+        self._keys = []  # buckets of keys
+        self._values = []  # buckets of the values of those keys
+        self._maxes = []  # the last key of each bucket
+        self._len = 0
+        for key, value in sorted(items, key=itemgetter(0)):
+            self.set(key, value)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._keys)
+
+    def values(self):
+        return chain.from_iterable(self._values)
+
+    def _locate(self, key):
+        # the bucket that holds `key` if it is present, and the position of `key` in that bucket
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return i, 0
+        return i, bisect_left(self._keys[i], key)
+
+    def __contains__(self, key):
+        i, j = self._locate(key)
+        return i < len(self._maxes) and self._keys[i][j] == key
+
+    def set(self, key, value):
+        """
+        Sets the value of `key`, adding the key if it is new.
+        """
+        maxes = self._maxes
+        if not maxes or key > maxes[-1]:
+            if not maxes:
+                self._keys.append([])
+                self._values.append([])
+                maxes.append(key)
+            i = len(maxes) - 1
+            self._keys[i].append(key)
+            self._values[i].append(value)
+            maxes[i] = key
+        else:
+            i, j = self._locate(key)
+            keys = self._keys[i]
+            if keys[j] == key:
+                self._values[i][j] = value
+                return
+            keys.insert(j, key)
+            self._values[i].insert(j, value)
+        self._len += 1
+
+        keys = self._keys[i]
+        if len(keys) > self.load:
+            half = len(keys) // 2
+            values = self._values[i]
+            self._keys[i:i + 1] = [keys[:half], keys[half:]]
+            self._values[i:i + 1] = [values[:half], values[half:]]
+            maxes[i:i + 1] = [keys[half - 1], keys[-1]]
+
+    def remove(self, key):
+        """
+        Removes `key` and its value; raises :class:`KeyError` if the key is not present.
+        """
+        i, j = self._locate(key)
+        if i == len(self._maxes) or self._keys[i][j] != key:
+            raise KeyError(key)
+
+        keys = self._keys[i]
+        del keys[j]
+        del self._values[i][j]
+        self._len -= 1
+        if not keys:
+            del self._keys[i]
+            del self._values[i]
+            del self._maxes[i]
+        elif j == len(keys):
+            self._maxes[i] = keys[-1]
+
+    def irange(self, start=None, stop=None):
+        """
+        Iterates over the values of the keys from `start` (inclusive) to `stop` (exclusive), in order of key. Either
+        bound may be ``None``.
+        """
+        i, j = (0, 0) if start is None else self._locate(start)
+        for keys, values in zip(islice(self._keys, i, None), islice(self._values, i, None)):
+            end = len(keys) if stop is None or keys[-1] < stop else bisect_left(keys, stop)
+            yield from islice(values, j, end)
+            if end < len(keys):
+                return
+            j = 0
 
 
-# TODO make sorted (replace internal dict with sorted collection)
 class StanzaSet(Mapping, MutableSet):
+    """
+    A set of stanzas that is also a mapping from stanza id to stanza.
+
+    Stanzas are kept sorted by id: iteration is in order of id, and :meth:`range` and :meth:`prefix` select ids
+    without scanning the whole set.
+
+    A stanza without an id comes first.
+
+    In addition to the id, stanzas are indexed by name, alt_id and synonym text. The indexes are maintained through
+    :meth:`add`, :meth:`discard`, the tag descriptors and :meth:`Stanza.add_tag`. Changes made in place to a tag value
+    set (e.g. ``term.alt_ids.add(...)``) are not seen; call :meth:`reindex` after making them.
+    """
+
     def __init__(self, stanzas = ()):
         self._stanzas = {}
+        self._by_name = {}
+        self._by_alt_id = {}
+        self._by_synonym = {}
+        self._sorted = SortedItems()
+        self._version = 0
         for stanza in stanzas:
             self.add(stanza)
 
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def _keys(self, stanza):
+        # the index and key of each name, alt_id and synonym text of `stanza`
+        tags = stanza.tags
+        for name in tags.get('name', ()):
+            yield self._by_name, name
+        for alt_id in tags.get('alt_id', ()):
+            yield self._by_alt_id, alt_id
+        for synonym in tags.get('synonym', ()):
+            yield self._by_synonym, synonym_text(synonym)
+
+    def _index(self, stanza):
+        id_ = stanza.id
+        self._version += 1
+        self._stanzas[id_] = stanza
+        if id_ is not None:
+            # a stanza without an id, such as Instance(), cannot be sorted; see __iter__
+            self._sorted.set(id_, stanza)
+        for index, key in self._keys(stanza):
+            # a key maps to its stanza, or to a list of stanzas in the order they were indexed if several share it
+            entry = index.get(key)
+            if entry is None:
+                index[key] = stanza
+            elif type(entry) is list:
+                if not any(other is stanza for other in entry):
+                    entry.append(stanza)
+            elif entry is not stanza:
+                index[key] = [entry, stanza]
+
+    @staticmethod
+    def _remove_entry(index, key, stanza):
+        entry = index.get(key)
+        if entry is stanza:
+            del index[key]
+        elif type(entry) is list:
+            entry = [other for other in entry if other is not stanza]
+            index[key] = entry[0] if len(entry) == 1 else entry
+
+    def _unindex(self, stanza):
+        # the keys are derived from the tags, which the tag descriptors and Stanza.add_tag change only after this
+        id_ = stanza.id
+        self._version += 1
+
+        if self._stanzas.get(id_) is stanza:
+            del self._stanzas[id_]
+            if id_ is not None:
+                self._sorted.remove(id_)
+        for index, key in self._keys(stanza):
+            self._remove_entry(index, key, stanza)
+
     def discard(self, stanza):
-        self._stanzas.pop(stanza.id, None)
+        existing = self._stanzas.get(stanza.id)
+        if existing is not None:
+            self._unindex(existing)
+            existing._unregister(self)
 
     def __getitem__(self, id_):
         return self._stanzas[id_]
 
     def add(self, stanza):
-        self._stanzas[stanza.id] = stanza
+        existing = self._stanzas.get(stanza.id)
+        if existing is stanza:
+            return
+        elif existing is not None:
+            self.discard(existing)
+        self._index(stanza)
+        stanza._register(self)
+
+    def _touch(self):
+        # invalidates anything derived from the stanzas in this set, such as an OntologyGraph
+        self._version += 1
+
+    def reindex(self, stanza):
+        """
+        Updates the indexes after tag values of `stanza` have been changed in place. The keys it was indexed with are
+        no longer known, so this scans the indexes.
+        """
+        self._version += 1
+        for id_, existing in list(self._stanzas.items()):
+            if existing is stanza:
+                del self._stanzas[id_]
+                if id_ is not None:
+                    self._sorted.remove(id_)
+        for index in (self._by_name, self._by_alt_id, self._by_synonym):
+            for key, entry in list(index.items()):
+                if entry is stanza or type(entry) is list:
+                    self._remove_entry(index, key, stanza)
+        self._index(stanza)
+
+    def by_name(self, name):
+        # the stanza indexed first if several share the name
+        entry = self._by_name[name]
+        return entry[0] if type(entry) is list else entry
+
+    def by_alt_id(self, alt_id):
+        entry = self._by_alt_id[alt_id]
+        return entry[0] if type(entry) is list else entry
+
+    def by_synonym(self, text):
+        entry = self._by_synonym.get(text)
+        if entry is None:
+            return []
+        return list(entry) if type(entry) is list else [entry]
 
     def __len__(self):
         return len(self._stanzas)
 
     def __iter__(self):
-        return iter(self._stanzas.values())
+        if None in self._stanzas:
+            return chain((self._stanzas[None],), self._sorted.values())
+        return self._sorted.values()
+
+    def range(self, start=None, stop=None):
+        """
+        Iterates over the stanzas with an id from `start` (inclusive) to `stop` (exclusive), in order of id.
+        """
+        return self._sorted.irange(start, stop)
+
+    def prefix(self, prefix):
+        """
+        Iterates over the stanzas with an id that starts with `prefix`, in order of id, e.g.
+        ``terms.prefix('GO:00081')``.
+        """
+        for stanza in self._sorted.irange(prefix):
+            if not stanza.id.startswith(prefix):
+                return
+            yield stanza
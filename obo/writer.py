@@ -1,14 +1,18 @@
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from operator import attrgetter
 
 from obo import BUILT_IN_TYPEDEFS, Definition, XRef
 from obo.stanzas import Relationship
 
 ESCAPE_TRANSLATION_TABLE = str.maketrans({
-    '\\': r'\\\\',
+    '\\': '\\\\',
     '\n': '\\n',
     '\t': '\\t',
     ' ': '\\W',
+    '!': '\\!',
     '"': '\\"',
     '(': '\\(',
     ')': '\\)',
@@ -19,89 +23,179 @@ ESCAPE_TRANSLATION_TABLE = str.maketrans({
 })
 
 ESCAPE_XREF_TRANSLATION_TABLE = str.maketrans({
-    '\\': r'\\\\',
+    '\\': '\\\\',
     '\n': '\\n',
     '\t': '\\t',
     ':': '\\:',
     ' ': '\\W',
+    '!': '\\!',
     '"': '\\"',
+    ',': '\\,',
     # '[': '\\[',
     ']': '\\]',
+    '{': '\\{',
+})
+
+# quoted descriptions only need escapes for characters that would end the quote, line or value
+ESCAPE_DESCRIPTION_TRANSLATION_TABLE = str.maketrans({
+    '\\': '\\\\',
+    '\n': '\\n',
+    '\t': '\\t',
+    '!': '\\!',
+    '"': '\\"',
 })
 
+_worker_state = None
+
+
+def _init_worker(writer, names):
+    global _worker_state
+    _worker_state = writer, names
+
+
+def _format_chunk(stanzas):
+    writer, names = _worker_state
+    return ''.join(writer._format_stanza(names, stanza) for stanza in stanzas)
+
+
 class OBOWriter(object):
+    """
+    Writes ontologies in the OBO format.
+
+    :param buffer_size: number of characters collected before each write to the file.
+    :param processes: if set, stanzas are formatted in chunks of `chunk_size` by a pool of this many processes.
+    """
+
+    def __init__(self, buffer_size=1 << 20, processes=None, chunk_size=1000):
+        self.buffer_size = buffer_size
+        self.processes = processes
+        self.chunk_size = chunk_size
+        # escaped ids and formatted xrefs, which recur many times; kept for the duration of a write
+        self._escaped = {}
+        self._xrefs = {}
 
     def _escape(self, s):
-        return s.translate(ESCAPE_TRANSLATION_TABLE)
+        try:
+            return self._escaped[s]
+        except KeyError:
+            escaped = self._escaped[s] = s.translate(ESCAPE_TRANSLATION_TABLE)
+            return escaped
 
     def _escape_xref(self, s):
         return s.translate(ESCAPE_XREF_TRANSLATION_TABLE)
 
-    def _format_tag_value(self, ontology, name, value):
+    def _format_xref_name(self, xref):
+        if xref.identifier is None:
+            return self._escape_xref(xref.name)
+        return '{}:{}'.format(self._escape_xref(xref.database), self._escape_xref(xref.identifier))
+
+    def _format_xref(self, xref):
+        try:
+            return self._xrefs[xref]
+        except KeyError:
+            formatted = self._format_xref_name(xref)
+            if xref.description:
+                formatted += ' "{}"'.format(xref.description.translate(ESCAPE_DESCRIPTION_TRANSLATION_TABLE))
+            self._xrefs[xref] = formatted
+            return formatted
+
+    def _names(self, ontology):
+        """
+        Returns a table of escaped term names by id, used for the comments after term references.
+        """
+        return {term.id: term.name.translate(ESCAPE_TRANSLATION_TABLE)
+                for term in ontology.terms if term.name is not None}
+
+    def _format_tag_value(self, names, name, value):
         if isinstance(value, Relationship):
-            try:
-                target_term = ontology.terms[value.target_term]
-                return '{} {} ! {}'.format(self._escape(value.type),
-                                           self._escape(value.target_term),
-                                           self._escape(target_term.name))
-            except KeyError:
-                return '{} {} ! {}'.format(self._escape(value.type),
-                                           self._escape(value.target_term),
-                                           self._escape(value.target_term))
+            target_term = self._escape(value.target_term)
+            return '{} {} ! {}'.format(self._escape(value.type),
+                                       target_term,
+                                       names.get(value.target_term, target_term))
         elif name in ('is_a', 'intersection_of', 'union_of', 'disjoint_from'):
-            try:
-                target_term = ontology.terms[value]
-                return '{} ! {}'.format(self._escape(target_term.id), self._escape(target_term.name))
-            except KeyError:
-                return '{} ! {}'.format(self._escape(value), self._escape(value))
+            target_term = self._escape(value)
+            return '{} ! {}'.format(target_term, names.get(value, target_term))
         elif value is True:
             return 'true'
         elif value is False:
             return 'false'
         elif isinstance(value, Definition):
-            return '"{}" [{}]'.format(value.description, ', '.join(
-                '{}:{}'.format(self._escape_xref(xref.database), self._escape_xref(str(xref.identifier)))
-                for xref in value.xrefs))
+            # the reader does not split the description of an xref in a definition from its name
+            return '"{}" [{}]'.format(value.description, ', '.join(self._format_xref_name(xref)
+                                                                     for xref in value.xrefs))
         elif isinstance(value, XRef):
-            if value.description:
-                return '{}:{} "{}"'.format(self._escape_xref(value.database),
-                                           self._escape_xref(str(value.identifier)),
-                                           value.description)
-            else:
-                return '{}:{}'.format(self._escape_xref(value.database), self._escape_xref(str(value.identifier)))
+            return self._format_xref(value)
         return str(value)
 
-    def _write_tag_group(self, ontology, fp, name, values):
+    def _format_tag_group(self, names, lines, name, values):
         """
-        Formats tag name and values and writes them to fp.
+        Formats tag name and values and appends them to lines.
 
         If the same tag appears multiple times in a stanza, the tags should be ordered alphabetically on the tag value.
         """
-        # formatted_values = sorted(self._format_tag_value(ontology, name, value) for value in values)
+        # formatted_values = sorted(self._format_tag_value(names, name, value) for value in values)
         # for formatted_value in formatted_values:
-        #     fp.write('{}: {}\n'.format(name, formatted_value))
+        #     lines.append('{}: {}\n'.format(name, formatted_value))
         for value in values:
-            fp.write('{}: {}\n'.format(name, self._format_tag_value(ontology, name, value)))
+            lines.append('{}: {}\n'.format(name, self._format_tag_value(names, name, value)))
 
-    def _write_object(self, ontology, fp, obj):
+    def _format_object(self, names, obj):
+        lines = []
+        tags = obj.tags
         for name in obj._tag_order:
-            if name in obj.tags:
-                self._write_tag_group(ontology, fp, name, obj.tags[name])
-        for name in sorted(obj.tags):
+            if name in tags:
+                self._format_tag_group(names, lines, name, tags[name])
+        for name in sorted(tags):
             if name not in obj._tag_order:
-                self._write_tag_group(ontology, fp, name, obj.tags[name])
-        fp.write('\n')
+                self._format_tag_group(names, lines, name, tags[name])
+        lines.append('\n')
+        return ''.join(lines)
 
-    def _write_stanza(self, ontology, fp, stanza):
-        fp.write('[{}]\n'.format(stanza._stanza_name))
-        self._write_object(ontology, fp, stanza)
+    def _format_stanza(self, names, stanza):
+        return '[{}]\n'.format(stanza._stanza_name) + self._format_object(names, stanza)
 
-    def write(self, ontology, fp, saved_by=None):
-        # auto-generated-by: Python-OBO 0.0.0
+    def _formatted_stanzas(self, names, stanzas):
+        if not self.processes:
+            return (self._format_stanza(names, stanza) for stanza in stanzas)
 
-        self._write_object(ontology, fp, ontology)
+        chunks = (stanzas[i:i + self.chunk_size] for i in range(0, len(stanzas), self.chunk_size))
+        return self._format_in_pool(names, chunks)
 
-        stanzas = (ontology.typedefs - set(BUILT_IN_TYPEDEFS)) | ontology.terms | ontology.instances
+    def _format_in_pool(self, names, chunks):
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self, names)) as executor:
+            # map() returns the formatted chunks in order
+            for formatted in executor.map(_format_chunk, chunks):
+                yield formatted
 
-        for stanza in sorted(stanzas, key=attrgetter('id')):
-            self._write_stanza(ontology, fp, stanza)
\ No newline at end of file
+    def write(self, ontology, fp, saved_by=None):
+        """
+        Writes `ontology` to `fp`, a text file or a path. Paths ending in ``.gz``, ``.bz2``, ``.xz`` or ``.zst`` are
+        compressed.
+        """
+        # auto-generated-by: Python-OBO 0.0.0
+        if isinstance(fp, (str, os.PathLike)):
+            from obo.compression import open_file
+            with open_file(fp, 'w', buffer_size=self.buffer_size) as fp:
+                return self.write(ontology, fp, saved_by)
+
+        self._escaped, self._xrefs = {}, {}
+        names = self._names(ontology)
+        built_in_typedefs = set(BUILT_IN_TYPEDEFS)
+
+        # a StanzaSet iterates in order of id, and Timsort merges such sorted runs in linear time and, unlike
+        # heapq.merge, in C. Other collections, such as a MappedStanzaSet, are sorted here.
+        runs = ([typedef for typedef in ontology.typedefs if typedef not in built_in_typedefs],
+                ontology.terms,
+                ontology.instances)
+        stanzas = sorted(chain.from_iterable(runs), key=attrgetter('id'))
+
+        buffer = [self._format_object(names, ontology)]
+        buffered = len(buffer[0])
+        for formatted in self._formatted_stanzas(names, stanzas):
+            buffer.append(formatted)
+            buffered += len(formatted)
+            if buffered >= self.buffer_size:
+                fp.write(''.join(buffer))
+                buffer, buffered = [], 0
+        fp.write(''.join(buffer))
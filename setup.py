@@ -9,5 +9,8 @@ setup(
     license='MIT',
     author='Lars Schöning',
     author_email='',
-    description=''
+    description='',
+    extras_require={
+        'arrays': ['numpy'],
+    }
 )
@@ -0,0 +1,12 @@
+import io
+
+from obo.writer import OBOWriter
+
+
+def obo_text(ontology):
+    """
+    Returns `ontology` as written by :class:`obo.writer.OBOWriter`.
+    """
+    output = io.StringIO()
+    OBOWriter().write(ontology, output)
+    return output.getvalue()
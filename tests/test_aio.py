@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+import asyncio
+import threading
+
+from obo import Ontology
+from obo.aio import LiveOntology
+from obo.reader import OBOReader
+from tests import obo_text
+
+
+class AsyncReadTestCase(TestCase):
+
+    def test_aread(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(path, 'r') as fp:
+                expected = Ontology.read(fp)
+
+            for chunk_size in (64, 1 << 16):
+                ontology = asyncio.run(Ontology.aread(path, chunk_size=chunk_size))
+                self.assertEqual(len(expected.terms), len(ontology.terms))
+                self.assertEqual(obo_text(expected), obo_text(ontology))
+
+    def test_aread_reader_options(self):
+        expected = Ontology.read('files/so-xp.obo', lazy=True, stanza_types={'Term'})
+        ontology = asyncio.run(Ontology.aread('files/so-xp.obo', lazy=True, stanza_types={'Term'}))
+        self.assertEqual(obo_text(expected), obo_text(ontology))
+        self.assertEqual(len(expected.typedefs), len(ontology.typedefs))
+        self.assertNotIn('part_of', ontology.typedefs)
+
+        with self.assertRaises(TypeError):
+            asyncio.run(Ontology.aread('files/so-xp.obo', reader=OBOReader(), lazy=True))
+
+    def test_aread_yields(self):
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.ensure_future(tick())
+            await Ontology.aread('files/taxrank.obo')
+            task.cancel()
+
+        asyncio.run(main())
+        self.assertGreater(len(ticks), 10)
+
+    def test_aread_parses_off_the_loop(self):
+        threads = set()
+
+        class Reader(OBOReader):
+            def _build_stanza(self, stanza, tag_value_pairs):
+                threads.add(threading.get_ident())
+                return super(Reader, self)._build_stanza(stanza, tag_value_pairs)
+
+        async def main():
+            await Ontology.aread('files/taxrank.obo', reader=Reader())
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(main())
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_live_ontology(self):
+        async def main():
+            live = LiveOntology()
+            self.assertIsNone(live.ontology)
+            first, second = await asyncio.gather(live.reload('files/taxrank.obo'), live.reload('files/so-xp.obo'))
+            self.assertIs(second, live.ontology)
+            self.assertIsNot(first, second)
+            self.assertIn('SO:0000001', live.ontology.terms)
+
+        asyncio.run(main())
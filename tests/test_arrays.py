@@ -0,0 +1,86 @@
+from unittest import TestCase, skipIf
+
+import math
+
+from obo import Ontology, Term, Typedef
+from obo.arrays import np
+from obo.stanzas import Relationship
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class GraphArraysTestCase(TestCase):
+
+    def setUp(self):
+        self.ontology = ontology = Ontology()
+        ontology.typedefs.add(Typedef('part_of', is_transitive=True))
+        ontology.terms |= {
+            Term('T:vehicle'),
+            Term('T:four_wheeled', is_a=['T:vehicle']),
+            Term('T:car', is_a=['T:four_wheeled', 'T:vehicle']),
+            Term('T:bike', is_a=['T:vehicle']),
+            Term('T:wheel', relationship=[Relationship('part_of', 'T:bike')]),
+        }
+        self.arrays = ontology.arrays()
+
+    def _values(self, values):
+        return {id_: values[self.arrays.index[id_]] for id_ in self.arrays.ids}
+
+    def test_csr(self):
+        arrays = self.arrays
+        self.assertIs(arrays, self.ontology.arrays())
+        self.assertEqual(len(arrays.ids) + 1, len(arrays.indptr))
+
+        node = arrays.index['T:car']
+        parents = arrays.indices[arrays.indptr[node]:arrays.indptr[node + 1]]
+        self.assertEqual({'T:four_wheeled', 'T:vehicle'}, set(arrays.ids[parents]))
+
+        node = arrays.index['T:wheel']
+        codes = arrays.relation_codes[arrays.indptr[node]:arrays.indptr[node + 1]]
+        self.assertEqual(['part_of'], [arrays.relations[code] for code in codes])
+
+    def test_depth(self):
+        self.assertEqual({'T:vehicle': 0, 'T:four_wheeled': 1, 'T:car': 2, 'T:bike': 1, 'T:wheel': 0},
+                         self._values(self.arrays.depth()))
+        self.assertEqual(2, self._values(self.arrays.depth(('is_a', 'part_of')))['T:wheel'])
+
+    def test_ancestor_mask(self):
+        mask = self.arrays.ancestor_mask(['T:car', 'T:wheel'], ('is_a', 'part_of'))
+        self.assertEqual((2, len(self.arrays)), mask.shape)
+        self.assertEqual({'T:car', 'T:four_wheeled', 'T:vehicle'}, set(self.arrays.ids[mask[0]]))
+        self.assertEqual({'T:wheel', 'T:bike', 'T:vehicle'}, set(self.arrays.ids[mask[1]]))
+
+        mask = self.arrays.ancestor_mask(['T:car'], include_self=False)
+        self.assertEqual({'T:four_wheeled', 'T:vehicle'}, set(self.arrays.ids[mask[0]]))
+
+        mask = self.arrays.ancestor_mask(['T:wheel'], None, include_self=False)
+        self.assertEqual(self.ontology.graph.ancestors('T:wheel', None), set(self.arrays.ids[mask[0]]))
+
+    def test_closure_is_shared(self):
+        self.arrays.ancestor_mask(['T:car'], ('is_a', 'part_of'))
+        self.assertEqual([('is_a', 'part_of')], list(self.ontology.__dict__.get('_closure_indexes', ())))
+
+    def test_information_content(self):
+        ic = self._values(self.arrays.information_content())
+        self.assertAlmostEqual(math.log(5 / 4), ic['T:vehicle'])
+        self.assertAlmostEqual(math.log(5 / 2), ic['T:four_wheeled'])
+        self.assertAlmostEqual(math.log(5), ic['T:car'])
+
+        ic = self._values(self.arrays.information_content({'T:car': 3, 'T:bike': 1}))
+        self.assertAlmostEqual(0, ic['T:vehicle'])
+        self.assertAlmostEqual(math.log(4 / 3), ic['T:car'])
+        self.assertEqual(float('inf'), ic['T:wheel'])
+
+        ic = self._values(self.arrays.information_content(relations=None))
+        self.assertAlmostEqual(math.log(5 / 2), ic['T:bike'])
+
+    def test_rebuilt(self):
+        self.ontology.terms.add(Term('T:truck', is_a=['T:four_wheeled']))
+        self.assertIsNot(self.arrays, self.ontology.arrays())
+        self.assertIn('T:truck', self.ontology.arrays().index)
+
+
+@skipIf(np is not None, 'NumPy is installed')
+class NoNumPyTestCase(TestCase):
+
+    def test_requires_numpy(self):
+        self.assertRaises(ImportError, Ontology().arrays)
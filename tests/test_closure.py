@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from obo import Ontology, Term, Typedef
+from obo.closure import ClosureIndex
+from obo.stanzas import Relationship
+
+
+class ClosureIndexTestCase(TestCase):
+
+    def test_sequence_ontology_closure(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = Ontology.read(fp)
+
+        index = ontology.closure_index()
+        graph = ontology.graph
+
+        self.assertGreater(index.nbytes, 0)
+        self.assertGreaterEqual(index.build_time, 0)
+
+        for term in ontology.terms:
+            ancestors = graph.ancestors(term.id, ('is_a', 'part_of'))
+            self.assertEqual(ancestors, index.ancestors(term.id))
+            for ancestor in ancestors:
+                self.assertTrue(index.is_ancestor(ancestor, term.id))
+
+        self.assertTrue(index.is_ancestor('SO:0000001', 'SO:0000147'))
+        self.assertFalse(index.is_ancestor('SO:0000147', 'SO:0000001'))
+        self.assertTrue(index.is_descendant('SO:0000147', 'SO:0000001'))
+        self.assertFalse(index.is_ancestor('SO:0000001', 'no such term'))
+
+    def test_invalidation(self):
+        ontology = Ontology()
+        ontology.typedefs.add(Typedef('part_of', is_transitive=True))
+        ontology.terms |= {Term('T:1'), Term('T:2', is_a=['T:1'])}
+
+        index = ontology.closure_index()
+        self.assertIs(index, ontology.closure_index())
+        self.assertIsInstance(index, ClosureIndex)
+        self.assertEqual({'T:1'}, index.ancestors('T:2'))
+
+        ontology.terms.add(Term('T:3', relationship=[Relationship('part_of', 'T:2')]))
+        index = ontology.closure_index()
+        self.assertEqual({'T:1', 'T:2'}, index.ancestors('T:3'))
+        self.assertEqual(sorted([ontology.graph.index['T:1'], ontology.graph.index['T:2']]),
+                         list(index.ancestor_array('T:3')))
+        self.assertEqual({'T:2'}, ontology.closure_index(['part_of']).ancestors('T:3'))
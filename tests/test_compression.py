@@ -0,0 +1,60 @@
+from unittest import TestCase, skipIf
+
+import os
+import shutil
+import tempfile
+
+from obo import Ontology
+from obo import compression
+from obo.compression import open_file, detect_compression
+from tests import obo_text
+
+
+class CompressionTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open('files/so-xp.obo', 'r') as fp:
+            self.ontology = Ontology.read(fp)
+        self.expected = obo_text(self.ontology)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _round_trip(self, extension, name):
+        path = os.path.join(self.directory, 'so-xp.obo' + extension)
+        self.ontology.write(path)
+        self.assertEqual(name, detect_compression(path))
+
+        for threaded in (False, True):
+            self.assertEqual(self.expected, obo_text(Ontology.read(path, threaded=threaded)))
+
+        # detected from magic bytes rather than from the extension
+        renamed = os.path.join(self.directory, 'renamed.obo')
+        os.rename(path, renamed)
+        self.assertEqual(self.expected, obo_text(Ontology.read(renamed)))
+
+    def test_plain(self):
+        self._round_trip('', None)
+
+    def test_gzip(self):
+        self._round_trip('.gz', 'gzip')
+
+    def test_bz2(self):
+        self._round_trip('.bz2', 'bz2')
+
+    def test_xz(self):
+        self._round_trip('.xz', 'xz')
+
+    @skipIf(compression.zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        self._round_trip('.zst', 'zstd')
+
+    def test_threaded_close_early(self):
+        path = os.path.join(self.directory, 'so-xp.obo.gz')
+        self.ontology.write(path)
+        with open_file(path, threaded=True, buffer_size=1024) as fp:
+            self.assertEqual('format-version: 1.2\n', fp.readline())
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, open_file, os.path.join(self.directory, 'x.obo'), 'w', compression='lz4')
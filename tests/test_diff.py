@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+import io
+
+from obo import Ontology
+from obo.diff import diff
+from obo.stanzas import Term
+from tests import obo_text
+
+
+class DiffTestCase(TestCase):
+
+    def setUp(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            self.text = fp.read()
+
+    def _read(self, text=None):
+        return Ontology.read(io.StringIO(self.text if text is None else text))
+
+    def _releases(self):
+        old, new = self._read(), self._read()
+        new.tags['data-version'] = ['next']
+
+        new.terms.discard(new.terms['SO:0000002'])
+        new.add_stanza(Term(id='SO:9999999', name='new_term', is_a=['SO:0000001']))
+        new.terms['SO:0000001'].name = 'renamed_region'
+        new.terms['SO:0000001'].add_tag('alt_id', 'SO:9999998')
+        new.terms['SO:0000003'].is_obsolete = True
+        return old, new
+
+    def test_identical(self):
+        result = diff(self._read(), self._read())
+        self.assertFalse(result)
+        self.assertEqual([], result.changed)
+
+    def test_diff(self):
+        old, new = self._releases()
+        result = diff(old, new)
+
+        self.assertEqual(['SO:9999999'], [stanza.id for stanza in result.added])
+        self.assertEqual(['SO:0000002'], [stanza.id for stanza in result.removed])
+        self.assertEqual(['SO:0000003'], result.obsoleted)
+        self.assertEqual({'data-version': ['next']}, result.header.added)
+
+        change = next(change for change in result.changed if change.id == 'SO:0000001')
+        self.assertEqual('Term', change.stanza_name)
+        self.assertEqual({'name', 'alt_id'}, set(change.tags))
+        self.assertEqual({'name': ['renamed_region'], 'alt_id': ['SO:9999998']}, change.added)
+        self.assertEqual({'name': [old.terms['SO:0000001'].name]}, change.removed)
+
+    def test_diff_files(self):
+        old, new = self._releases()
+        from_objects = diff(old, new)
+        from_files = diff(io.StringIO(obo_text(old)), io.StringIO(obo_text(new)))
+
+        self.assertEqual(sorted(stanza.id for stanza in from_objects.added),
+                         sorted(stanza.id for stanza in from_files.added))
+        self.assertEqual(sorted(stanza.id for stanza in from_objects.removed),
+                         sorted(stanza.id for stanza in from_files.removed))
+        self.assertEqual(sorted((change.id, sorted(change.tags)) for change in from_objects.changed),
+                         sorted((change.id, sorted(change.tags)) for change in from_files.changed))
+
+    def test_apply(self):
+        old, new = self._releases()
+        result = diff(io.StringIO(obo_text(old)), io.StringIO(obo_text(new)))
+
+        patched = result.apply(old)
+        self.assertEqual(obo_text(new), obo_text(patched))
+        self.assertEqual('SO:0000001', patched.term_by_name('renamed_region').id)
+        self.assertEqual('SO:0000001', patched.term_by_alt_id('SO:9999998').id)
+        self.assertFalse(diff(patched, new))
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import os
+import shutil
+import tempfile
+
+from obo import Ontology
+from obo.incremental import IncrementalLoader
+from tests import obo_text
+
+
+class IncrementalLoaderTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'so-xp.obo')
+        shutil.copy('files/so-xp.obo', self.path)
+        with open(self.path, 'r') as fp:
+            self.text = fp.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _edit(self, text):
+        with open(self.path, 'w') as fp:
+            fp.write(text)
+        # make sure the change is seen even if the modification time did not change
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    def _read(self):
+        with open(self.path, 'r') as fp:
+            return Ontology.read(fp)
+
+    def test_initial_load(self):
+        loader = IncrementalLoader(self.path)
+        added, removed = loader.reload()
+        self.assertEqual([], removed)
+        self.assertEqual(obo_text(self._read()), obo_text(loader.ontology))
+        self.assertEqual(([], []), loader.reload())
+
+    def test_reload_changed_stanza(self):
+        loader = IncrementalLoader(self.path)
+        loader.reload()
+        ontology = loader.ontology
+        region = ontology.terms['SO:0000001']
+        closure = ontology.closure_index()
+
+        self._edit(self.text.replace('name: region\n', 'name: renamed_region\n', 1))
+        added, removed = loader.reload()
+
+        self.assertIs(ontology, loader.ontology)
+        self.assertEqual(['SO:0000001'], [stanza.id for stanza in added])
+        self.assertEqual([region], removed)
+        self.assertEqual('renamed_region', ontology.terms['SO:0000001'].name)
+        self.assertEqual('SO:0000001', ontology.term_by_name('renamed_region').id)
+        self.assertRaises(KeyError, ontology.term_by_name, 'region')
+        self.assertIsNot(closure, ontology.closure_index())
+        self.assertEqual(obo_text(self._read()), obo_text(ontology))
+
+    def test_reload_added_removed_stanzas(self):
+        loader = IncrementalLoader(self.path)
+        loader.reload()
+
+        start = self.text.index('[Term]\nid: SO:0000002\n')
+        end = self.text.index('[Term]', start + 1)
+        text = self.text[:start] + self.text[end:]
+        text = text.replace('format-version: 1.2\n', 'format-version: 1.4\n')
+        text += '\n[Term]\nid: SO:9999999\nname: new_term\nis_a: SO:0000001\n'
+        self._edit(text)
+
+        added, removed = loader.reload()
+        self.assertEqual(['SO:9999999'], [stanza.id for stanza in added])
+        self.assertEqual(['SO:0000002'], [stanza.id for stanza in removed])
+        self.assertNotIn('SO:0000002', loader.ontology.terms)
+        self.assertEqual(['1.4'], loader.ontology.tags['format-version'])
+        self.assertIn('SO:9999999', loader.ontology.graph.descendants('SO:0000001'))
+        self.assertEqual(obo_text(self._read()), obo_text(loader.ontology))
+
+    def test_backslash_in_comment(self):
+        for line in ('! see C:\\', 'name: one ! C:\\'):
+            self._edit('format-version: 1.2\n\n[Term]\nid: A:1\n{}\n[Term]\nid: A:2\n'.format(line))
+            loader = IncrementalLoader(self.path)
+            loader.reload()
+            self.assertEqual(['A:1', 'A:2'], [term.id for term in self._read().terms])
+            self.assertEqual(['A:1', 'A:2'], [term.id for term in loader.ontology.terms])
+
+    def test_continued_value(self):
+        self._edit('format-version: 1.2\n\n[Term]\nid: A:1\ncomment: one \\\n[Term]\nid: A:2\n')
+        loader = IncrementalLoader(self.path)
+        loader.reload()
+        self.assertEqual(['A:1'], [term.id for term in loader.ontology.terms])
+        self.assertEqual(self._read().terms['A:1'].tags['comment'], loader.ontology.terms['A:1'].tags['comment'])
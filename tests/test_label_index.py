@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+import io
+
+from obo import Ontology, Term
+from obo.label_index import LabelIndex
+
+
+class LabelIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.ontology = Ontology()
+        self.ontology.add_stanza(Term(id='T:1', name='nucleus', synonym=['"cell nucleus" EXACT []']))
+        self.ontology.add_stanza(Term(id='T:2', name='nucleolus', synonym=['"nucleus part" NARROW []']))
+        self.ontology.add_stanza(Term(id='T:3', name='membrane', synonym=['"nuclear envelope" RELATED []']))
+        self.ontology.add_stanza(Term(id='T:4', name='plasma_membrane', **{'def': 'The membrane around a cell.'}))
+        self.index = LabelIndex(self.ontology)
+
+    def _ids(self, matches):
+        return [id_ for id_, _, _ in matches]
+
+    def test_search(self):
+        self.assertEqual(['T:1', 'T:2'], self._ids(self.index.search('nucleus')))
+        self.assertEqual(['T:1', 'T:2', 'T:3'], self._ids(self.index.search('nucle')))
+        self.assertEqual(['T:2'], self._ids(self.index.search('nucle', prefix=False) + self.index.search('nucleus part')))
+        self.assertEqual(['T:1', 'T:4'], self._ids(self.index.search('cell')))
+        self.assertEqual(['T:3', 'T:4'], self._ids(self.index.search('membrane')))
+        self.assertEqual([], self.index.search('nucleus membrane'))
+        self.assertEqual([], self.index.search(''))
+
+    def test_ranking(self):
+        matches = self.index.search('nucle')
+        self.assertEqual(('T:1', 'nucleus', 1.0), matches[0])
+        self.assertEqual(('T:2', 'nucleolus', 1.0), matches[1])
+        self.assertEqual([('T:1', 'cell nucleus', 0.9), ('T:4', 'The membrane around a cell.', 0.2)],
+                         self.index.search('cell'))
+        self.assertEqual([('T:3', 'nuclear envelope', 0.5)], self.index.search('envelope'))
+
+    def test_complete(self):
+        self.assertEqual(['T:1', 'T:2'], self._ids(self.index.complete('Nucleu')))
+        self.assertEqual(['T:1'], self._ids(self.index.complete('cell n')))
+        self.assertEqual(['T:4'], self._ids(self.index.complete('plasma')))
+        self.assertEqual([], self.index.complete('around'))
+
+    def test_fuzzy(self):
+        matches = self.index.fuzzy('nucleos')
+        self.assertEqual(['T:2', 'T:1'], self._ids(matches)[:2])
+        self.assertEqual(['T:3'], self._ids(self.index.fuzzy('membrain')))
+        self.assertEqual([], self.index.fuzzy('xyz'))
+
+    def test_dump_load(self):
+        buffer = io.BytesIO()
+        self.index.dump(buffer)
+        buffer.seek(0)
+        loaded = LabelIndex.load(buffer)
+        for query in ('nucle', 'cell', 'membrane'):
+            self.assertEqual(self.index.search(query), loaded.search(query))
+            self.assertEqual(self.index.complete(query), loaded.complete(query))
+            self.assertEqual(self.index.fuzzy(query), loaded.fuzzy(query))
+
+    def test_ontology_label_index(self):
+        index = self.ontology.label_index()
+        self.assertIs(index, self.ontology.label_index())
+        self.ontology.add_stanza(Term(id='T:5', name='nuclear pore'))
+        self.assertIsNot(index, self.ontology.label_index())
+        self.assertEqual(['T:5'], self._ids(self.ontology.label_index().complete('nuclear p')))
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import io
+import os
+import shutil
+import tempfile
+
+from obo import Ontology
+from obo.mapped import MappedOntology
+from obo.writer import OBOWriter
+
+
+class MappedOntologyTestCase(TestCase):
+
+    def setUp(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            self.ontology = Ontology.read(fp)
+
+    def test_lazy_parsing(self):
+        with MappedOntology('files/so-xp.obo') as mapped:
+            self.assertEqual(len(self.ontology.terms), len(mapped.terms))
+            self.assertEqual(len(self.ontology.typedefs), len(mapped.typedefs))
+            self.assertEqual(0, len(mapped.terms._stanzas))
+
+            self.assertIn('SO:0000002', mapped.terms)
+            self.assertEqual(str(self.ontology.terms['SO:0000002']), str(mapped.terms['SO:0000002']))
+            self.assertEqual(1, len(mapped.terms._stanzas))
+            self.assertEqual(sorted(self.ontology.terms._stanzas), sorted(mapped.terms.ids()))
+
+    def test_indexes(self):
+        with MappedOntology('files/so-xp.obo') as mapped:
+            self.assertEqual('SO:0000002', mapped.term_by_name('sequence_secondary_structure').id)
+            self.assertEqual('SO:0000104', mapped.term_by_alt_id('SO:0000358').id)
+            self.assertEqual(['SO:0000002'], [term.id for term in mapped.terms_by_synonym('sequence secondary structure')])
+            self.assertLess(len(mapped.terms._stanzas), 5)
+
+    def test_write(self):
+        with MappedOntology('files/so-xp.obo') as mapped:
+            output = io.StringIO()
+            OBOWriter().write(mapped, output)
+
+        with open('files/so-xp.obo', 'r') as fp:
+            self.assertEqual(fp.read(), output.getvalue())
+
+    def test_write_unsorted(self):
+        text = 'format-version: 1.2\n\n[Term]\nid: A:2\n\n[Term]\nid: A:1\n\n[Term]\nid: A:3\n'
+        with tempfile.NamedTemporaryFile('w', suffix='.obo', delete=False) as fp:
+            fp.write(text)
+        try:
+            expected, output = io.StringIO(), io.StringIO()
+            OBOWriter().write(Ontology.read(io.StringIO(text)), expected)
+            with MappedOntology(fp.name) as mapped:
+                OBOWriter().write(mapped, output)
+            self.assertEqual(expected.getvalue(), output.getvalue())
+        finally:
+            os.remove(fp.name)
+
+    def test_continued_values(self):
+        text = ('format-version: 1.2\n\n'
+                '[Term]\nid: A:1\ncomment: continued \\\n[Term]\n\n'
+                '[Term]\nid: A:2\nname: two\ncomment: again \\\nname: not a name\n! see C:\\\n\n'
+                '[Term]\nid: A:3\nname: three \\\r\n  continued\n')
+        with tempfile.NamedTemporaryFile('w', suffix='.obo', delete=False) as fp:
+            fp.write(text)
+        try:
+            ontology = Ontology.read(io.StringIO(text))
+            with MappedOntology(fp.name) as mapped:
+                self.assertEqual(['A:1', 'A:2', 'A:3'], sorted(mapped.terms.ids()))
+                self.assertEqual([str(term) for term in ontology.terms],
+                                 [str(mapped.terms[id_]) for id_ in sorted(mapped.terms.ids())])
+                self.assertEqual('A:2', mapped.term_by_name('two').id)
+                self.assertEqual('A:3', mapped.term_by_name(ontology.terms['A:3'].name).id)
+                self.assertRaises(KeyError, mapped.term_by_name, 'not a name')
+        finally:
+            os.remove(fp.name)
+
+    def test_index_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'so-xp.obo')
+            index_path = os.path.join(directory, 'so-xp.obo.idx')
+            shutil.copy('files/so-xp.obo', path)
+
+            with MappedOntology(path) as mapped:
+                mapped.write_index(index_path)
+
+            with MappedOntology(path, index_path=index_path) as mapped:
+                self.assertEqual(len(self.ontology.terms), len(mapped.terms))
+                self.assertEqual('SO:0000002', mapped.terms['SO:0000002'].id)
+        finally:
+            shutil.rmtree(directory)
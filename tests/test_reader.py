@@ -1,12 +1,331 @@
 from unittest import TestCase
 
-from obo import Ontology, Definition
-from obo.reader import OBOReader
-from obo.stanzas import Relationship
+import gc
+import io
+import os
+import tempfile
+import tracemalloc
+import weakref
+
+import obo
+from obo import Ontology, Definition, Term
+from obo.reader import OBOReader, OBOPushParser, ParseException
+from obo.stanzas import LazyValue, Relationship, Stanza
+from tests import obo_text
 
 
 class OBOReaderTestCase(TestCase):
-    pass
+
+    def test_tokenize_matches_escaped_tokenizer(self):
+        reader = OBOReader()
+        lines = [
+            'id: SO:0000001',
+            'name: region ! a comment',
+            'def: "A {quoted} brace." [SO:ke] {modifier="1"}',
+            'xref: http://example.org/x "with: colon"',
+            'synonym: "a" EXACT [] {source="x"} ! comment',
+            'relationship: part_of SO:0000002',
+            'is_obsolete: true',
+            'name {weird}: value',
+            'no tag here',
+            ':empty: tag',
+            'tag:',
+        ]
+
+        for line in lines:
+            self.assertEqual(reader._tokenize_escaped(line, iter(())), reader._tokenize(line, iter(())), line)
+
+    def test_tokenize_line_continuation(self):
+        reader = OBOReader()
+        self.assertEqual(('comment', ' first \\second'), reader._tokenize('comment: first \\', iter(['second'])))
+
+    def _read_str(self, path, **kwargs):
+        with open(path, 'r') as fp:
+            ontology = OBOReader(**kwargs).read(fp)
+        return [str(ontology)] + [str(stanza) for stanza in ontology.typedefs] + [str(stanza) for stanza in ontology.terms]
+
+    def test_fast_tokenizer_results(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            self.assertEqual(self._read_str(path, fast_tokenizer=False), self._read_str(path, fast_tokenizer=True))
+
+
+class LazyReadTestCase(TestCase):
+
+    def test_lazy_read_results(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(path, 'r') as fp:
+                ontology = OBOReader().read(fp)
+            with open(path, 'r') as fp:
+                lazy = OBOReader(lazy=True).read(fp)
+
+            self.assertEqual(obo_text(ontology), obo_text(lazy))
+            self.assertEqual([str(term) for term in ontology.terms], [str(term) for term in lazy.terms])
+
+    def test_decode_on_access(self):
+        ontology = OBOReader(lazy=True).read(io.StringIO(
+            '[Term]\nid: T:1\nname: one\ndef: "First." [REF:1]\nxref: X:1\nrelationship: part_of T:2\n'))
+        term = ontology.terms['T:1']
+
+        raw = dict.__getitem__(term.tags, 'def')
+        self.assertIsInstance(raw[0], LazyValue)
+        self.assertEqual('"First." [REF:1]', raw[0])
+        self.assertEqual('one', term.name)
+        self.assertIsInstance(dict.__getitem__(term.tags, 'xref')[0], LazyValue)
+
+        self.assertEqual('First.', term.definition.description)
+        self.assertEqual(['REF:1'], [xref.name for xref in term.definition.xrefs])
+        self.assertIsInstance(raw[0], Definition)
+        self.assertIs(term.definition, term.definition)
+        self.assertEqual([Relationship('part_of', 'T:2')], list(term.relationships))
+        self.assertEqual(['X:1'], [xref.name for xref in term.tags['xref']])
+
+    def test_lazy_push_parser(self):
+        parser = OBOPushParser(reader=OBOReader(lazy=True))
+        parser.feed('[Term]\nid: T:1\ndef: "First." [REF:1]\n')
+        parser.close()
+
+        term = [item for item in parser.events if isinstance(item, Term)][0]
+        self.assertIsInstance(dict.__getitem__(term.tags, 'def')[0], LazyValue)
+        self.assertEqual('First.', term.definition.description)
+
+    def test_lazy_values_are_text(self):
+        reader = OBOReader(lazy=True)
+        ontology = reader.read(io.StringIO('[Term]\nid: T:1\ndef: "First." [REF:1]\n'))
+        reader = weakref.ref(reader)
+        gc.collect()
+        self.assertIsNone(reader())
+        self.assertEqual('First.', ontology.terms['T:1'].definition.description)
+
+    def test_lazy_memory(self):
+        text = 'format-version: 1.2\n' + ''.join(
+            '\n[Term]\nid: T:{0}\nname: term {0}\ndef: "Term number {0}." [PMID:{0}, ISBN:{0}]\nxref: X:{0}\n'
+            'relationship: part_of T:{1}\n'.format(i, i // 2) for i in range(2000))
+
+        def measure(**kwargs):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                ontology = OBOReader(**kwargs).read(io.StringIO(text))
+                gc.collect()
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+
+        self.assertLess(measure(lazy=True), measure() * 0.95)
+
+    def test_lazy_and_compact(self):
+        with self.assertRaises(ValueError):
+            OBOReader(lazy=True, compact=True)
+
+
+class ProjectionTestCase(TestCase):
+    content = ('format-version: 1.2\n'
+               'default-namespace: a\n\n'
+               '[Term]\nid: T:1\nname: one\ndef: "First." [REF:1]\nis_a: T:2\n\n'
+               '[Term]\nid: T:2\nname: two\nnamespace: b\ncomment: continued \\\n[Term]\n\n'
+               '[Typedef]\nid: part_of\nname: part of\n\n'
+               '[Other]\nid: O:1\ncomment: skipped \\\n[Term]\n\n'
+               '[Term]\nid: T:3\nname: three\nnamespace: a\n')
+
+    def test_tags(self):
+        ontology = OBOReader(tags={'name', 'is_a'}).read(io.StringIO(self.content))
+
+        self.assertEqual(['T:1', 'T:2', 'T:3'], [term.id for term in ontology.terms])
+        self.assertEqual({'id', 'name', 'is_a'}, set(ontology.terms['T:1'].tags))
+        self.assertEqual({'id', 'name'}, set(ontology.terms['T:2'].tags))
+        self.assertEqual('a', ontology.tags['default-namespace'][0])
+
+    def test_stanza_types(self):
+        ontology = OBOReader(stanza_types={'Term'}).read(io.StringIO(self.content))
+
+        self.assertEqual(['T:1', 'T:2', 'T:3'], [term.id for term in ontology.terms])
+        self.assertEqual('continued \\[Term]', ontology.terms['T:2'].comment)
+        self.assertIsNone(ontology.typedefs.get('part_of'))
+        self.assertEqual([], ontology.unrecognized_stanzas)
+
+    def test_namespaces(self):
+        ontology = OBOReader(namespaces={'a'}, tags={'name'}).read(io.StringIO(self.content))
+
+        self.assertEqual(['T:1', 'T:3'], [term.id for term in ontology.terms])
+        self.assertEqual('part of', ontology.typedefs['part_of'].name)
+        self.assertEqual({'id', 'name', 'namespace'}, set(ontology.terms['T:3'].tags))
+
+    def test_namespaces_keep_typedefs(self):
+        ontology = OBOReader(namespaces={'b'}).read(io.StringIO(self.content))
+        self.assertEqual(['T:2'], [term.id for term in ontology.terms])
+        self.assertEqual('part of', ontology.typedefs['part_of'].name)
+
+        with open('files/so-xp.obo', 'r') as fp:
+            everything = Ontology.read(fp)
+        with open('files/so-xp.obo', 'r') as fp:
+            selected = Ontology.read(fp, namespaces={'no such namespace'})
+        self.assertEqual(0, len(selected.terms))
+        self.assertEqual([str(typedef) for typedef in everything.typedefs],
+                         [str(typedef) for typedef in selected.typedefs])
+
+    def test_unselected_tags_are_skipped(self):
+        reader = OBOReader(tags={'name'})
+        tokenized, tokenize = [], reader._tokenize
+        reader._tokenize = lambda line, lines: tokenized.append(line) or tokenize(line, lines)
+
+        ontology = reader.read(io.StringIO('[Term]\nid: T:1\nname: one\nrelationship: malformatted\n'))
+        self.assertEqual('one', ontology.terms['T:1'].name)
+        self.assertEqual(['id: T:1', 'name: one'], tokenized)
+
+    def test_projection_is_consistent(self):
+        kwargs = dict(tags={'name', 'namespace'}, stanza_types={'Term', 'Other'}, namespaces={'a'})
+        ontology = Ontology.read(io.StringIO(self.content), **kwargs)
+        stanzas = [str(stanza) for stanza in ontology.terms] + [str(stanza) for stanza in
+                                                                ontology.unrecognized_stanzas]
+
+        parser = OBOPushParser(reader=OBOReader(**kwargs))
+        for i in range(0, len(self.content), 7):
+            parser.feed(self.content[i:i + 7])
+        parser.close()
+        self.assertEqual(sorted(stanzas), sorted(str(stanza) for stanza in list(parser.events)[1:]))
+
+        with tempfile.NamedTemporaryFile('w', suffix='.obo', delete=False) as fp:
+            fp.write(self.content)
+        try:
+            parallel = OBOReader(**kwargs).read_parallel(fp.name, processes=2, chunks_per_process=3)
+            self.assertEqual(stanzas, [str(stanza) for stanza in parallel.terms] +
+                             [str(stanza) for stanza in parallel.unrecognized_stanzas])
+        finally:
+            os.remove(fp.name)
+
+    def test_sequence_ontology_terms(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            full = OBOReader().read(fp)
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = OBOReader(tags={'name', 'is_a'}, stanza_types={'Term'}).read(fp)
+
+        self.assertEqual(len(Ontology().typedefs), len(ontology.typedefs))
+        self.assertEqual([(term.id, term.name, term.is_a) for term in full.terms],
+                         [(term.id, term.name, term.is_a) for term in ontology.terms])
+
+
+class IterStanzasTestCase(TestCase):
+
+    def test_iter_stanzas(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = Ontology.read(fp)
+
+        with open('files/so-xp.obo', 'r') as fp:
+            stanzas = obo.iter_stanzas(fp)
+            header = next(stanzas)
+            terms = [stanza for stanza in stanzas if isinstance(stanza, Term)]
+
+        self.assertIsInstance(header, Ontology)
+        self.assertEqual(str(ontology), str(header))
+        self.assertEqual(len(header.terms), 0)
+        self.assertEqual([term.id for term in ontology.terms], [term.id for term in terms])
+
+    def test_iter_stanzas_is_lazy(self):
+        lines_read = []
+
+        def lines():
+            for line in ['format-version: 1.2', '', '[Term]', 'id: T:1', '', '[Term]', 'id: T:2', '']:
+                lines_read.append(line)
+                yield line
+
+        stanzas = obo.iter_stanzas(lines())
+        self.assertEqual('1.2', next(stanzas).tags['format-version'][0])
+        self.assertEqual('T:1', next(stanzas).id)
+        self.assertEqual(6, len(lines_read))
+
+    def test_read_unrecognized_stanza(self):
+        ontology = Ontology.read(io.StringIO('[Term]\nid: T:1\n\n[Annotation]\nid: A:1\n'))
+
+        self.assertEqual(1, len(ontology.terms))
+        self.assertEqual(1, len(ontology.unrecognized_stanzas))
+        self.assertIsInstance(ontology.unrecognized_stanzas[0], Stanza)
+        self.assertEqual('A:1', ontology.unrecognized_stanzas[0].id)
+
+
+class ParallelReadTestCase(TestCase):
+
+    def _stanzas(self, ontology):
+        return ([str(ontology)] +
+                [str(stanza) for stanza in ontology.typedefs] +
+                [str(stanza) for stanza in ontology.terms] +
+                [str(stanza) for stanza in ontology.unrecognized_stanzas])
+
+    def test_read_parallel(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(path, 'r') as fp:
+                ontology = OBOReader().read(fp)
+
+            self.assertEqual(self._stanzas(ontology), self._stanzas(OBOReader().read_parallel(path, processes=2)))
+
+    def test_read_parallel_boundaries(self):
+        content = 'format-version: 1.2\n\n'
+        for i in range(50):
+            content += '[Term]\nid: T:{0}\ncomment: continued \\\n[Term]\n\n[Other{0}]\nid: O:{0}\n\n'.format(i)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.obo', delete=False) as fp:
+            fp.write(content)
+        try:
+            ontology = OBOReader().read(io.StringIO(content))
+            parallel = OBOReader().read_parallel(fp.name, processes=3, chunks_per_process=7)
+
+            self.assertEqual(50, len(parallel.terms))
+            self.assertEqual('continued \\[Term]', parallel.terms['T:7'].comment)
+            self.assertEqual(self._stanzas(ontology), self._stanzas(parallel))
+        finally:
+            os.remove(fp.name)
+
+
+class PushParserTestCase(TestCase):
+
+    def _str(self, stanzas):
+        return [str(stanza) for stanza in stanzas]
+
+    def test_feed_chunks(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(path, 'r') as fp:
+                expected = self._str(obo.iter_stanzas(fp))
+            with open(path, 'rb') as fp:
+                data = fp.read()
+
+            for size in (1, 7, 4096):
+                items = []
+                parser = OBOPushParser(items.append)
+                for i in range(0, len(data), size):
+                    parser.feed(data[i:i + size])
+                parser.close()
+                self.assertEqual(expected, self._str(items))
+
+    def test_feed_str_events(self):
+        parser = OBOPushParser()
+        for chunk in ('format-version: 1.2\r', '\n\r\n[Term]\r\nid: A\r\nname: a\r', '\ncomment: first \\',
+                      '\nsecond\n[Typedef]\nid: r', '\nis_transitive: true'):
+            parser.feed(chunk)
+
+        header = parser.events.popleft()
+        self.assertEqual(['1.2'], header.tags['format-version'])
+        term = parser.events.popleft()
+        self.assertEqual(('A', 'a', 'first \\second'), (term.id, term.name, term.comment))
+        self.assertFalse(parser.events)
+
+        parser.close()
+        typedef = parser.events.popleft()
+        self.assertEqual(('r', True), (typedef.id, typedef.is_transitive))
+
+    def test_long_continued_value(self):
+        text = '[Term]\nid: A\ncomment: ' + 'a "quoted { word" \\\n' * 2000 + 'end ! comment \\\n[Term]\nid: B\n'
+        expected = [str(stanza) for stanza in obo.iter_stanzas(io.StringIO(text))]
+
+        parser = OBOPushParser()
+        for i in range(0, len(text), 5):
+            parser.feed(text[i:i + 5])
+        parser.close()
+        self.assertEqual(expected, self._str(parser.events))
+        self.assertEqual(3, len(expected))
+
+    def test_unterminated(self):
+        parser = OBOPushParser()
+        parser.feed('[Term]\nid: A\ncomment: first \\\n')
+        self.assertRaises(ParseException, parser.close)
 
 
 class GeneOntologyTestCase(TestCase):
@@ -1,22 +1,79 @@
 from unittest import TestCase
 
-from obo import Ontology, Term
+from obo import Ontology, Term, Typedef
+from obo.stanzas import Relationship
 
 
 class SearchTestCase(TestCase):
 
     def test_is_a_search(self):
-        vehicle = Term('T:001', 'vehicle')
-        car = Term('T:002', 'car', is_a=[vehicle])
-        four_wheeled_vehicle = Term('T:003', 'four_wheeled_vehicle', is_a=[vehicle])
-        car.is_a.add(four_wheeled_vehicle)
+        vehicle = Term('T:001', name='vehicle')
+        car = Term('T:002', name='car', is_a={vehicle})
+        four_wheeled_vehicle = Term('T:003', name='four_wheeled_vehicle', is_a={vehicle})
+        car.is_a = car.is_a | {four_wheeled_vehicle}
 
         ontology = Ontology()
-        ontology.terms.update({vehicle, car, four_wheeled_vehicle})
+        ontology.terms |= {vehicle, car, four_wheeled_vehicle}
 
-        #vehicle.search_incoming('is_a')
-        #car.search_outgoing('is_a')
+        self.assertEqual({'T:002', 'T:003'}, ontology.graph.descendants('T:001'))
+        self.assertEqual({'T:001', 'T:003'}, ontology.graph.ancestors('T:002'))
 
-        car.is_a.remove(vehicle)
+        car.is_a = car.is_a - {vehicle}
 
-        # search again.
\ No newline at end of file
+        self.assertEqual([('T:003', 'is_a')], ontology.graph.parents('T:002'))
+        self.assertEqual({'T:001', 'T:003'}, ontology.graph.ancestors('T:002'))
+        self.assertEqual([('T:003', 'is_a')], ontology.graph.children('T:001'))
+        self.assertEqual(['T:002', 'T:003', 'T:001'], ontology.graph.path_to_root('T:002'))
+
+
+class RelationshipSearchTestCase(TestCase):
+
+    def setUp(self):
+        self.ontology = ontology = Ontology()
+        ontology.typedefs.add(Typedef('part_of', is_transitive=True))
+        ontology.typedefs.add(Typedef('has_part'))
+        ontology.terms |= {
+            Term('T:cell'),
+            Term('T:organelle', relationship=[Relationship('part_of', 'T:cell')]),
+            Term('T:nucleus', is_a=['T:organelle']),
+            Term('T:nucleolus', relationship=[Relationship('part_of', 'T:nucleus')]),
+            Term('T:wheel'),
+            Term('T:car', relationship=[Relationship('has_part', 'T:wheel')]),
+            Term('T:sports_car', is_a=['T:car']),
+            Term('T:spoke', relationship=[Relationship('part_of', 'T:wheel')]),
+        }
+
+    def test_ancestors_by_relation(self):
+        graph = self.ontology.graph
+
+        self.assertEqual({'T:organelle'}, graph.ancestors('T:nucleus'))
+        self.assertEqual({'T:organelle', 'T:cell'}, graph.ancestors('T:nucleus', ('is_a', 'part_of')))
+        self.assertEqual({'T:nucleus', 'T:organelle', 'T:cell'}, graph.ancestors('T:nucleolus', ('is_a', 'part_of')))
+        self.assertEqual({'T:nucleus'}, graph.ancestors('T:nucleolus', 'part_of'))
+        self.assertEqual({'T:car', 'T:wheel'}, graph.ancestors('T:sports_car', None))
+
+    def test_non_transitive_relation(self):
+        graph = self.ontology.graph
+
+        # has_part is not transitive and part_of is not transitive over has_part
+        self.assertEqual({'T:car', 'T:wheel'}, graph.ancestors('T:sports_car', ('is_a', 'has_part', 'part_of')))
+        self.assertEqual({'T:spoke'}, graph.descendants('T:wheel', ('is_a', 'has_part', 'part_of')) - {'T:car',
+                                                                                                  'T:sports_car'})
+
+    def test_descendants(self):
+        graph = self.ontology.graph
+
+        self.assertEqual({'T:organelle', 'T:nucleus', 'T:nucleolus'}, graph.descendants('T:cell', ('is_a', 'part_of')))
+        self.assertTrue(graph.is_ancestor('T:cell', 'T:nucleolus', ('is_a', 'part_of')))
+        self.assertFalse(graph.is_ancestor('T:cell', 'T:nucleolus'))
+
+    def test_graph_is_rebuilt(self):
+        graph = self.ontology.graph
+        self.assertIs(graph, self.ontology.graph)
+
+        self.ontology.terms.add(Term('T:nucleoplasm', relationship=[Relationship('part_of', 'T:nucleus')]))
+        self.assertIsNot(graph, self.ontology.graph)
+        self.assertIn('T:nucleoplasm', self.ontology.graph.descendants('T:cell', ('is_a', 'part_of')))
+
+    def test_unknown_term(self):
+        self.assertRaises(KeyError, self.ontology.graph.ancestors, 'T:unknown')
@@ -0,0 +1,72 @@
+from unittest import TestCase, skipIf
+
+import math
+
+from obo import Ontology, Term
+from obo.arrays import np
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class SemanticSimilarityTestCase(TestCase):
+
+    def setUp(self):
+        from obo.similarity import SemanticSimilarity
+
+        self.ontology = ontology = Ontology()
+        ontology.terms |= {
+            Term('T:vehicle'),
+            Term('T:four_wheeled', is_a=['T:vehicle']),
+            Term('T:car', is_a=['T:four_wheeled']),
+            Term('T:truck', is_a=['T:four_wheeled']),
+            Term('T:bike', is_a=['T:vehicle']),
+        }
+        self.similarity = SemanticSimilarity(ontology, counts={'T:car': 2, 'T:truck': 1, 'T:bike': 1})
+
+    def test_mica(self):
+        self.assertEqual('T:four_wheeled', self.similarity.mica('T:car', 'T:truck'))
+        self.assertEqual('T:vehicle', self.similarity.mica('T:bike', 'T:car'))
+        self.assertEqual('T:car', self.similarity.mica('T:car', 'T:car'))
+        self.assertEqual('T:four_wheeled', self.similarity.mica('T:truck', 'T:car'))
+
+    def test_term_similarity(self):
+        similarity = self.similarity
+        ic_four_wheeled, ic_car, ic_truck = math.log(4 / 3), math.log(4 / 2), math.log(4)
+
+        self.assertAlmostEqual(ic_four_wheeled, similarity.similarity('T:car', 'T:truck'))
+        self.assertAlmostEqual(0, similarity.similarity('T:car', 'T:bike'))
+        self.assertAlmostEqual(2 * ic_four_wheeled / (ic_car + ic_truck),
+                               similarity.similarity('T:car', 'T:truck', 'lin'))
+        self.assertAlmostEqual(2 / 4, similarity.similarity('T:car', 'T:truck', 'jaccard'))
+        self.assertAlmostEqual(1, similarity.similarity('T:car', 'T:car', 'jaccard'))
+        self.assertRaises(ValueError, similarity.similarity, 'T:car', 'T:car', 'cosine')
+
+    def test_all_relations(self):
+        from obo.similarity import SemanticSimilarity
+
+        similarity = SemanticSimilarity(self.ontology, counts={'T:car': 2, 'T:truck': 1, 'T:bike': 1}, relations=None)
+        self.assertEqual('T:four_wheeled', similarity.mica('T:car', 'T:truck'))
+        self.assertAlmostEqual(self.similarity.similarity('T:car', 'T:truck'), similarity.similarity('T:car', 'T:truck'))
+
+    def test_pairwise(self):
+        ids = ['T:car', 'T:truck', 'T:bike']
+        for method in ('resnik', 'lin', 'jaccard'):
+            scores = self.similarity.pairwise(ids, ids, method)
+            self.assertEqual((3, 3), scores.shape)
+            for i, a in enumerate(ids):
+                for j, b in enumerate(ids):
+                    self.assertAlmostEqual(self.similarity.similarity(a, b, method), scores[i, j])
+
+    def test_term_sets(self):
+        similarity = self.similarity
+        self.assertAlmostEqual(similarity.similarity('T:car', 'T:truck'),
+                               similarity.term_set_similarity(['T:car'], ['T:truck']))
+        self.assertAlmostEqual(math.log(2), similarity.term_set_similarity(['T:car', 'T:bike'], ['T:car'], combine='max'))
+        self.assertEqual(0.0, similarity.term_set_similarity([], ['T:car']))
+
+        term_sets = [['T:car'], ['T:truck', 'T:bike'], ['T:bike']]
+        scores = similarity.all_vs_all(term_sets)
+        self.assertTrue(np.allclose(scores, scores.T))
+        for i, a in enumerate(term_sets):
+            for j, b in enumerate(term_sets):
+                self.assertAlmostEqual(similarity.term_set_similarity(a, b), scores[i, j])
+        self.assertTrue(np.allclose(scores, similarity.all_vs_all(term_sets, processes=2, chunk_size=1)))
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from obo import Ontology
+from obo import snapshot
+from tests import obo_text
+
+
+class SnapshotTestCase(TestCase):
+
+    def test_dump_load(self):
+        for path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(path, 'r') as fp:
+                ontology = Ontology.read(fp)
+
+            buffer = io.BytesIO()
+            snapshot.dump(ontology, buffer)
+            buffer.seek(0)
+            loaded = Ontology.read(buffer, format='snapshot')
+
+            self.assertEqual(len(ontology.terms), len(loaded.terms))
+            self.assertEqual(len(ontology.typedefs), len(loaded.typedefs))
+            self.assertEqual(str(ontology), str(loaded))
+            self.assertEqual(obo_text(ontology), obo_text(loaded))
+
+    def test_dump_lazy(self):
+        ontology = Ontology.read('files/so-xp.obo')
+        lazy = Ontology.read('files/so-xp.obo', lazy=True)
+
+        buffer = io.BytesIO()
+        snapshot.dump(lazy, buffer)
+        buffer.seek(0)
+        self.assertEqual(obo_text(ontology), obo_text(Ontology.read(buffer, format='snapshot')))
+
+    def test_not_a_snapshot(self):
+        self.assertRaises(ValueError, snapshot.load, io.BytesIO(b'format-version: 1.2\n'))
+
+    def test_read_cached(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'so-xp.obo')
+            cache_dir = os.path.join(directory, 'cache')
+            shutil.copy('files/so-xp.obo', path)
+
+            ontology = snapshot.read_cached(path, cache_dir=cache_dir)
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+
+            cached = snapshot.read_cached(path, cache_dir=cache_dir)
+            self.assertEqual(len(ontology.terms), len(cached.terms))
+
+            # touching the file requires a hash check, but the snapshot is still valid
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(len(ontology.terms), len(snapshot.read_cached(path, cache_dir=cache_dir).terms))
+
+            # after a hash check the new modification time is stored; the next read does not hash again
+            with mock.patch.object(snapshot, '_file_hash', wraps=snapshot._file_hash) as file_hash:
+                self.assertEqual(len(ontology.terms), len(snapshot.read_cached(path, cache_dir=cache_dir).terms))
+            file_hash.assert_not_called()
+
+            with open(path, 'w') as fp:
+                fp.write('format-version: 1.2\n\n[Term]\nid: T:1\n')
+            self.assertEqual(['T:1'], [term.id for term in snapshot.read_cached(path, cache_dir=cache_dir).terms])
+        finally:
+            shutil.rmtree(directory)
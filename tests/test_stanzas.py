@@ -0,0 +1,145 @@
+from unittest import TestCase
+
+import io
+import pickle
+
+from obo import XRef
+from obo.reader import OBOReader
+from obo.stanzas import CompactTags, CompactTerm, Term, Relationship
+from obo.util import StanzaSet
+from obo.writer import OBOWriter
+
+
+class CompactTermTestCase(TestCase):
+
+    def test_compact_tags(self):
+        tags = CompactTags({'id': ['T:1'], 'name': ['one'], 'is_a': ['T:0', 'T:00'], 'namespace': []})
+
+        self.assertEqual(('T:1',), tags['id'])
+        self.assertEqual(('T:0', 'T:00'), tags['is_a'])
+        self.assertEqual((), tags['namespace'])
+        self.assertNotIn('namespace', tags)
+        self.assertEqual(['id', 'name', 'is_a'], list(tags))
+        self.assertIsNone(tags.get('comment'))
+
+        tags['name'] = ['one', 'uno']
+        self.assertEqual(('one', 'uno'), tags['name'])
+        tags['name'] = ['eins']
+        self.assertEqual(('eins',), tags['name'])
+        self.assertEqual(3, len(tags))
+
+        del tags['is_a']
+        self.assertNotIn('is_a', tags)
+
+    def test_descriptors(self):
+        term = CompactTerm('T:1', name='one', is_a=['T:0'])
+        stanzas = StanzaSet([term])
+
+        self.assertEqual('one', term.name)
+        self.assertIsNone(term.comment)
+        self.assertFalse(term.is_obsolete)
+        self.assertEqual(('T:0',), term.is_a)
+
+        term.name = 'uno'
+        term.is_obsolete = True
+        term.add_tag('is_a', 'T:00')
+        term.xrefs = ['X:1']
+
+        self.assertIs(term, stanzas.by_name('uno'))
+        self.assertTrue(term.is_obsolete)
+        self.assertEqual(('T:0', 'T:00'), term.is_a)
+        self.assertEqual({'X:1'}, term.xrefs)
+        self.assertEqual(str(Term('T:1', name='uno', is_a=['T:0', 'T:00'], xref=['X:1'], is_obsolete=True)),
+                         str(term))
+
+    def test_descriptors_change_in_place(self):
+        term = CompactTerm('T:1', is_a=['T:0'], synonym=['"uno" EXACT []'])
+        stanzas = StanzaSet([term])
+
+        term.is_a.add('T:00')
+        term.is_a.add('T:00')
+        term.is_a.append('T:000')
+        term.synonyms.add('"eins" EXACT []')
+        term.alt_ids.add('T:01')
+        term.is_a.discard('T:0')
+
+        self.assertEqual(('T:00', 'T:000'), term.tags['is_a'])
+        self.assertEqual('T:00', term.is_a[0])
+        self.assertIn('T:000', term.is_a)
+        self.assertEqual(2, len(term.is_a))
+        self.assertEqual([term], stanzas.by_synonym('eins'))
+        self.assertIs(term, stanzas.by_alt_id('T:01'))
+
+        term.xrefs = {'X:1'}
+        term.xrefs.add('X:2')
+        term.xrefs.remove('X:1')
+        self.assertEqual({'X:2'}, term.tags['xref'])
+        self.assertRaises(KeyError, term.xrefs.remove, 'X:1')
+
+    def test_read_write_compact(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = OBOReader(compact=True).read(fp)
+
+        self.assertIsInstance(ontology.terms['SO:0000002'], CompactTerm)
+
+        output = io.StringIO()
+        OBOWriter().write(ontology, output)
+        with open('files/so-xp.obo', 'r') as fp:
+            self.assertEqual(fp.read(), output.getvalue())
+
+    def test_pickle(self):
+        term = CompactTerm('T:1', name='one', is_a=['T:0'])
+        copy = pickle.loads(pickle.dumps(term))
+        self.assertEqual(str(term), str(copy))
+        self.assertEqual(dict(term.tags.items()), dict(copy.tags.items()))
+
+    def test_read_parallel_compact(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = OBOReader(compact=True).read(fp)
+        parallel = OBOReader(compact=True).read_parallel('files/so-xp.obo', processes=2)
+
+        self.assertIsInstance(parallel.terms['SO:0000002'], CompactTerm)
+        self.assertEqual([str(term) for term in ontology.terms], [str(term) for term in parallel.terms])
+
+
+class ValueTestCase(TestCase):
+
+    def test_immutable_values(self):
+        for value, copy in ((XRef('GO:1', 'x'), XRef('GO:1', 'x')), (Relationship('part_of', 'GO:1'),
+                                                                      Relationship('part_of', 'GO:1'))):
+            self.assertEqual(value, copy)
+            self.assertEqual(hash(value), hash(copy))
+            self.assertEqual(value, pickle.loads(pickle.dumps(value)))
+            self.assertRaises(AttributeError, setattr, value, 'name', 'GO:2')
+
+        self.assertNotEqual(XRef('GO:1'), XRef('GO:1', 'x'))
+        self.assertNotEqual(Relationship('part_of', 'GO:1'), Relationship('has_part', 'GO:1'))
+        self.assertEqual(1, len({XRef('GO:1'), XRef('GO:1')}))
+
+    def test_shared_values(self):
+        pool = {}
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = OBOReader(pool=pool).read(fp)
+        with open('files/so-xp.obo', 'r') as fp:
+            other = OBOReader(pool=pool).read(fp)
+
+        relationships = {}
+        for term in ontology.terms:
+            for relationship in term.relationships:
+                self.assertIs(relationships.setdefault(relationship, relationship), relationship)
+
+        self.assertIs(ontology.terms['SO:0000002'].is_a[0], other.terms['SO:0000002'].is_a[0])
+
+    def test_streaming_pool(self):
+        reader = OBOReader()
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = reader.read(fp)
+        self.assertIs(ontology.terms['SO:0000002'].is_a[0], ontology.terms['SO:0000018'].is_a[0])
+        self.assertIsNone(reader._values)
+
+        # while streaming only values with few distinct values are kept by the reader
+        with open('files/so-xp.obo', 'r') as fp:
+            for _ in reader.iter_stanzas(fp):
+                pass
+        self.assertLess(len(reader._names), 100)
+        self.assertNotIn('SO:0000001', reader._names)
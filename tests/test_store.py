@@ -0,0 +1,137 @@
+from unittest import TestCase
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from obo import Ontology
+from obo.store import ConnectionPool, SQLiteOntology
+from obo.writer import OBOWriter
+
+
+class SQLiteOntologyTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open('files/so-xp.obo', 'r') as fp:
+            cls.ontology = Ontology.read(fp)
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'so-xp.sqlite')
+        SQLiteOntology.create(cls.path, cls.ontology).close()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.store = SQLiteOntology(self.path)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_stanzas(self):
+        self.assertEqual(len(self.ontology.terms), len(self.store.terms))
+        self.assertEqual(len(self.ontology.typedefs), len(self.store.typedefs))
+        self.assertEqual(0, len(self.store.terms._stanzas))
+
+        self.assertIn('SO:0000002', self.store.terms)
+        self.assertNotIn('SO:9999999', self.store.terms)
+        self.assertEqual(str(self.ontology.terms['SO:0000002']), str(self.store.terms['SO:0000002']))
+        self.assertEqual(1, len(self.store.terms._stanzas))
+        self.assertEqual([term.id for term in self.ontology.terms], list(self.store.terms.ids()))
+        self.assertRaises(KeyError, lambda: self.store.terms['SO:9999999'])
+
+    def test_iter_streams(self):
+        stanzas = iter(self.store.terms)
+        self.assertEqual(next(iter(self.ontology.terms)).id, next(stanzas).id)
+        self.assertEqual(1, len(self.store.terms._stanzas))
+        self.assertEqual(1, self.store._pool._connections.qsize())
+
+    def test_iter_does_not_hold_connections(self):
+        store = SQLiteOntology(self.path, pool_size=1)
+        try:
+            for term in store.terms:
+                self.assertEqual(term.name, store.terms.by_name(term.name).name)
+            ranges = [store.terms.range('SO:0000100') for _ in range(5)]
+            for stanzas in ranges:
+                next(stanzas)
+            self.assertEqual('SO:0000002', store.terms['SO:0000002'].id)
+        finally:
+            store.close()
+
+    def test_write(self):
+        output = io.StringIO()
+        OBOWriter().write(self.store, output)
+        with open('files/so-xp.obo', 'r') as fp:
+            self.assertEqual(fp.read(), output.getvalue())
+
+    def test_indexes(self):
+        self.assertEqual('SO:0000002', self.store.term_by_name('sequence_secondary_structure').id)
+        self.assertEqual('SO:0000104', self.store.term_by_alt_id('SO:0000358').id)
+        self.assertEqual(['SO:0000002'], [term.id for term in self.store.terms_by_synonym('sequence secondary structure')])
+        self.assertRaises(KeyError, self.store.term_by_name, 'no such name')
+        self.assertLess(len(self.store.terms._stanzas), 5)
+
+    def test_xrefs(self):
+        expected = sorted(term.id for term in self.ontology.terms
+                          if any(xref.name == 'SO:ke' for xref in getattr(term.definition, 'xrefs', ())))
+        self.assertEqual(expected, [term.id for term in self.store.terms.by_xref('SO:ke')])
+
+    def test_prefix_and_range(self):
+        self.assertEqual([term.id for term in self.ontology.terms.prefix('SO:00001')],
+                         [term.id for term in self.store.terms.prefix('SO:00001')])
+        self.assertEqual([term.id for term in self.ontology.terms.range('SO:0000100', 'SO:0000200')],
+                         [term.id for term in self.store.terms.range('SO:0000100', 'SO:0000200')])
+
+    def test_ancestors_and_descendants(self):
+        graph = self.ontology.graph
+        for term in list(self.ontology.terms)[::50]:
+            self.assertEqual(graph.ancestors(term.id), self.store.ancestors(term.id))
+            self.assertEqual(graph.descendants(term.id), self.store.descendants(term.id))
+        # chains of non-transitive relations are followed too
+        for term in list(self.ontology.terms)[::50]:
+            self.assertLessEqual(graph.ancestors(term.id, None), self.store.ancestors(term.id, None))
+        self.assertRaises(KeyError, self.store.ancestors, 'SO:9999999')
+
+    def test_threads(self):
+        ids = list(self.store.terms.ids())[:200]
+        store = SQLiteOntology(self.path, pool_size=2)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                names = list(executor.map(lambda id_: store.terms[id_].name, ids))
+                ancestors = list(executor.map(store.ancestors, ids))
+        finally:
+            store.close()
+
+        self.assertEqual([self.ontology.terms[id_].name for id_ in ids], names)
+        self.assertEqual([self.ontology.graph.ancestors(id_) for id_ in ids], ancestors)
+        self.assertLessEqual(store._pool._opened, 2)
+
+    def test_replace(self):
+        path = os.path.join(self.directory, 'replaced.sqlite')
+        SQLiteOntology.create(path, self.ontology).close()
+        with open('files/taxrank.obo', 'r') as fp:
+            taxrank = Ontology.read(fp)
+
+        with SQLiteOntology.create(path, taxrank) as store:
+            self.assertEqual(len(taxrank.terms), len(store.terms))
+            self.assertNotIn('SO:0000002', store.terms)
+
+    def test_read_only(self):
+        pool = ConnectionPool(self.path)
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.execute('DELETE FROM stanzas')
+        finally:
+            pool.close()
+
+    def test_close_in_use(self):
+        pool = ConnectionPool(self.path, size=1)
+        with pool.connection() as connection:
+            pool.close()
+        self.assertRaises(sqlite3.ProgrammingError, connection.execute, 'SELECT 1')
+        with self.assertRaises(sqlite3.ProgrammingError):
+            pool.execute('SELECT 1')
@@ -0,0 +1,174 @@
+from unittest import TestCase
+
+import pickle
+import random
+from copy import deepcopy
+
+from obo import Ontology, Term, Instance
+from obo.util import SortedItems, StanzaSet, synonym_text
+
+
+class StanzaSetTestCase(TestCase):
+
+    def test_synonym_text(self):
+        self.assertEqual('G quartet', synonym_text('"G quartet" EXACT []'))
+        self.assertEqual('a \\"b\\"', synonym_text('"a \\"b\\"" RELATED [SO:ke]'))
+
+    def test_indexes(self):
+        term = Term('T:1', name='one', alt_id=['T:01'], synonym=['"uno" EXACT []'])
+        stanzas = StanzaSet([term])
+
+        self.assertIs(term, stanzas.by_name('one'))
+        self.assertIs(term, stanzas.by_alt_id('T:01'))
+        self.assertEqual([term], stanzas.by_synonym('uno'))
+        self.assertEqual([], stanzas.by_synonym('one'))
+
+        stanzas.discard(term)
+        self.assertRaises(KeyError, stanzas.by_name, 'one')
+        self.assertRaises(KeyError, stanzas.by_alt_id, 'T:01')
+        self.assertEqual([], stanzas.by_synonym('uno'))
+
+    def test_indexes_follow_descriptors(self):
+        term = Term('T:1', name='one')
+        stanzas = StanzaSet([term])
+
+        term.name = 'eins'
+        term.alt_ids = ['T:01']
+        term.synonyms = {'"uno" EXACT []'}
+        term.add_tag('synonym', '"un" EXACT []')
+
+        self.assertRaises(KeyError, stanzas.by_name, 'one')
+        self.assertIs(term, stanzas.by_name('eins'))
+        self.assertIs(term, stanzas.by_alt_id('T:01'))
+        self.assertEqual([term], stanzas.by_synonym('uno'))
+        self.assertEqual([term], stanzas.by_synonym('un'))
+
+        term.id = 'T:2'
+        self.assertIs(term, stanzas['T:2'])
+        self.assertNotIn('T:1', stanzas)
+
+    def test_reindex(self):
+        term = Term('T:1', alt_id=['T:01'])
+        stanzas = StanzaSet([term])
+
+        term.tags['alt_id'].append('T:001')
+        term.tags['alt_id'].remove('T:01')
+        stanzas.reindex(term)
+
+        self.assertIs(term, stanzas.by_alt_id('T:001'))
+        self.assertRaises(KeyError, stanzas.by_alt_id, 'T:01')
+
+    def test_replace(self):
+        old, new = Term('T:1', name='old'), Term('T:1', name='new')
+        stanzas = StanzaSet([old])
+        stanzas.add(new)
+
+        self.assertIs(new, stanzas['T:1'])
+        self.assertRaises(KeyError, stanzas.by_name, 'old')
+
+        old.name = 'older'
+        self.assertRaises(KeyError, stanzas.by_name, 'older')
+
+    def test_shared_name(self):
+        first, second = Term('T:1', name='x', alt_id=['T:0']), Term('T:2', name='x', alt_id=['T:0'])
+        stanzas = StanzaSet([first, second])
+        self.assertIs(first, stanzas.by_name('x'))
+
+        stanzas.discard(first)
+        self.assertIs(second, stanzas.by_name('x'))
+        self.assertIs(second, stanzas.by_alt_id('T:0'))
+
+        stanzas.discard(second)
+        self.assertRaises(KeyError, stanzas.by_name, 'x')
+
+    def test_pickle(self):
+        term = Term('T:1', name='one')
+        StanzaSet([term])
+
+        term = pickle.loads(pickle.dumps(term))
+        self.assertEqual('one', term.name)
+        self.assertEqual('Term', term._stanza_name)
+
+    def test_pickle_ontology(self):
+        ontology = Ontology()
+        ontology.terms |= {Term('T:1', name='one'), Term('T:2', name='two')}
+
+        for copy in (pickle.loads(pickle.dumps(ontology)), deepcopy(ontology)):
+            term = copy.terms['T:1']
+            term.name = 'uno'
+            self.assertIs(term, copy.terms.by_name('uno'))
+            self.assertRaises(KeyError, copy.terms.by_name, 'one')
+
+            copy.terms.discard(term)
+            self.assertEqual(['T:2'], [term.id for term in copy.terms])
+        self.assertEqual(2, len(ontology.terms))
+
+    def test_sorted(self):
+        stanzas = StanzaSet(Term(id_) for id_ in ('GO:0008150', 'GO:0000001', 'GO:0008152', 'SO:0000001'))
+        stanzas.add(Term('GO:0008151'))
+        stanzas.discard(stanzas['GO:0000001'])
+
+        self.assertEqual(['GO:0008150', 'GO:0008151', 'GO:0008152', 'SO:0000001'], [term.id for term in stanzas])
+        self.assertEqual(['GO:0008150', 'GO:0008151', 'GO:0008152'],
+                         [term.id for term in stanzas.prefix('GO:000815')])
+        self.assertEqual(['GO:0008152'], [term.id for term in stanzas.prefix('GO:0008152')])
+        self.assertEqual([], list(stanzas.prefix('XX:')))
+        self.assertEqual(['GO:0008151', 'GO:0008152'], [term.id for term in stanzas.range('GO:0008151', 'SO:')])
+        self.assertEqual(['GO:0008150'], [term.id for term in stanzas.range(stop='GO:0008151')])
+
+    def test_sorted_after_id_change(self):
+        term = Term('T:2')
+        stanzas = StanzaSet([Term('T:1'), term, Term('T:3')])
+        term.id = 'T:4'
+
+        self.assertEqual(['T:1', 'T:3', 'T:4'], [term.id for term in stanzas])
+
+    def test_without_id(self):
+        instance = Instance()
+        stanzas = StanzaSet([instance, Instance(id='X:2'), Instance(id='X:1')])
+
+        self.assertEqual([None, 'X:1', 'X:2'], [stanza.id for stanza in stanzas])
+        self.assertEqual(['X:1', 'X:2'], [stanza.id for stanza in stanzas.range('X:')])
+        self.assertIs(instance, stanzas[None])
+
+        stanzas.discard(instance)
+        self.assertEqual(['X:1', 'X:2'], [stanza.id for stanza in stanzas])
+
+
+class SortedItemsTestCase(TestCase):
+
+    def test_random_operations(self):
+        rng = random.Random(0)
+        items, expected = SortedItems(load=8), {}
+        for _ in range(5000):
+            key = rng.randint(0, 300)
+            if rng.random() < 0.6:
+                items.set(key, -key)
+                expected[key] = -key
+            elif key in expected:
+                items.remove(key)
+                del expected[key]
+            else:
+                self.assertRaises(KeyError, items.remove, key)
+            self.assertEqual(key in expected, key in items)
+
+        self.assertEqual(sorted(expected), list(items))
+        self.assertEqual([-key for key in sorted(expected)], list(items.values()))
+        self.assertEqual(len(expected), len(items))
+        for _ in range(200):
+            start, stop = rng.randint(-5, 305), rng.randint(-5, 305)
+            self.assertEqual([-key for key in sorted(expected) if start <= key < stop],
+                             list(items.irange(start, stop)))
+            self.assertEqual([-key for key in sorted(expected) if start <= key], list(items.irange(start)))
+
+
+class OntologyLookupTestCase(TestCase):
+
+    def test_lookup_sequence_ontology(self):
+        with open('files/so-xp.obo', 'r') as fp:
+            ontology = Ontology.read(fp)
+
+        self.assertEqual('SO:0000002', ontology.term_by_name('sequence_secondary_structure').id)
+        self.assertEqual('SO:0000002', ontology.terms_by_synonym('sequence secondary structure')[0].id)
+        self.assertEqual('SO:0000104', ontology.term_by_alt_id('SO:0000358').id)
+        self.assertRaises(KeyError, ontology.term_by_name, 'no such term')
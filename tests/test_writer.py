@@ -2,10 +2,16 @@ from unittest import SkipTest
 from unittest import TestCase
 
 import io
+import random
 
-from obo import Ontology
+from obo import Ontology, Definition, Term, XRef
+from obo.reader import OBOReader
+from obo.stanzas import Relationship
 from obo.writer import OBOWriter
 
+# characters with a meaning in the OBO format, and a few ordinary ones
+ALPHABET = 'ab:Z09 \\"!{}[](),\n\t\xe9'
+
 
 class WriterTestCase(TestCase):
     def test_read_write_sequence_ontology(self):
@@ -56,3 +62,64 @@ class WriterTestCase(TestCase):
 
         self.maxDiff = 2000
         self.assertEqual(file, output.getvalue())
+
+    def test_write_buffered_parallel(self):
+        for obo_file_path in ('files/so-xp.obo', 'files/taxrank.obo'):
+            with open(obo_file_path, 'r') as fp:
+                ontology = Ontology.read(fp)
+
+            with open(obo_file_path, 'r') as fp:
+                file = fp.read()
+
+            for writer in (OBOWriter(buffer_size=100), OBOWriter(processes=2, chunk_size=100)):
+                output = io.StringIO()
+                writer.write(ontology, output)
+
+                self.assertEqual(file, output.getvalue())
+
+
+class EscapeRoundTripTestCase(TestCase):
+
+    def _text(self, rng, length=8):
+        return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, length)))
+
+    def _round_trip(self, ontology):
+        output = io.StringIO()
+        OBOWriter().write(ontology, output)
+        for fast_tokenizer in (True, False):
+            yield OBOReader(fast_tokenizer=fast_tokenizer).read(io.StringIO(output.getvalue()))
+
+    def test_unescape_inverts_escape(self):
+        rng = random.Random(0)
+        reader, writer = OBOReader(), OBOWriter()
+        for _ in range(1000):
+            text = self._text(rng, 20)
+            self.assertEqual(text, reader._unescape(writer._escape(text)))
+            self.assertEqual(text, reader._unescape(writer._escape_xref(text)))
+
+    def test_unescape(self):
+        reader = OBOReader()
+        self.assertEqual('plain', reader._unescape('plain'))
+        self.assertEqual('a b\tc\nd"e\\f', reader._unescape('a\\Wb\\tc\\nd\\"e\\\\f'))
+        self.assertEqual('end', reader._unescape('end\\'))
+
+    def test_fuzz_round_trip(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            ontology = Ontology()
+            expected = {}
+            for n in range(20):
+                relationship = Relationship(self._text(rng), self._text(rng))
+                xref = XRef(self._text(rng), rng.choice((None, self._text(rng))))
+                definition_xref = XRef(self._text(rng))
+                term = Term('T:{}'.format(n), name='term {}'.format(n), relationship=[relationship], xref=[xref],
+                            **{'def': Definition('Definition {}.'.format(n), definition_xref)})
+                ontology.add_stanza(term)
+                expected[term.id] = relationship, xref, definition_xref
+
+            for read in self._round_trip(ontology):
+                for id_, (relationship, xref, definition_xref) in expected.items():
+                    term = read.terms[id_]
+                    self.assertEqual([relationship], list(term.relationships))
+                    self.assertEqual([xref], term.tags['xref'])
+                    self.assertEqual([definition_xref], list(term.definition.xrefs))